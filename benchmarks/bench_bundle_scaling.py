@@ -0,0 +1,58 @@
+"""Measure how the zip bundle export scales with worker processes.
+
+The same "All Data" bundle is written with 1, 2, ... N worker processes
+(N = CPU count unless given). Each process writes one table of the
+snapshot, so the speedup is bounded by the number of non-empty tables and
+by the largest one.
+
+Usage: python benchmarks/bench_bundle_scaling.py [rows_per_table] [max_processes]   (default 200000, CPU count)
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+def build_db(path, rows):
+    from database import init_db
+    init_db.DB_PATH = path
+    init_db.init_db()
+    conn = init_db.get_connection()
+    c = conn.cursor()
+    rng = random.Random(42)
+    def day():
+        d = rng.randrange(3650)
+        return f'{2015 + d // 365}-{(d % 365) // 31 + 1:02d}-{d % 28 + 1:02d}'
+    c.execute('BEGIN')
+    c.executemany('INSERT INTO expenses (date, category, amount, description, payment_method) VALUES (?, ?, ?, ?, ?)',
+                  ((day(), 'Feed', rng.uniform(10, 5000), f'Expense {i}', 'Cash') for i in range(rows)))
+    c.executemany('INSERT INTO revenue (date, batch_id, amount) VALUES (?, ?, ?)',
+                  ((day(), 'B001', rng.uniform(10, 5000)) for _ in range(rows)))
+    c.executemany('INSERT INTO mortality (batch_id, date, count, reason) VALUES (?, ?, ?, ?)',
+                  (('B001', day(), rng.randrange(1, 5), f'Reason {i}') for i in range(rows)))
+    c.executemany('INSERT INTO feed_logs (batch_id, date, quantity_kg) VALUES (?, ?, ?)',
+                  (('B001', day(), rng.uniform(1, 100)) for _ in range(rows)))
+    conn.commit()
+    conn.close()
+    init_db.close_all_connections(reopen=True)
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    most = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count() or 1
+    from modules.export_module import ExportWorker
+    with tempfile.TemporaryDirectory() as tmp:
+        build_db(os.path.join(tmp, 'bench.db'), rows)
+        print(f'{rows} rows in each of 4 tables, {os.cpu_count()} CPUs')
+        baseline = None
+        for processes in sorted({1, *range(2, most + 1)}):
+            worker = ExportWorker("All Data", "Bundle", os.path.join(tmp, f'bundle{processes}.zip'))
+            worker.max_processes = processes
+            start = time.perf_counter()
+            worker.export_bundle()
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            print(f'{processes:3d} processes  {elapsed:7.2f}s  speedup {baseline / elapsed:4.2f}x')
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+"""Compare CSV with the Parquet and Arrow IPC exports for write time and file size.
+
+Each format is written by ExportWorker from the same expenses table.
+
+Usage: python benchmarks/bench_columnar_export.py [rows]   (default 1000000)
+"""
+import os
+import sys
+import tempfile
+import time
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from bench_excel_export import build_db
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    from modules.export_module import ExportWorker
+    with tempfile.TemporaryDirectory() as tmp:
+        build_db(os.path.join(tmp, 'bench.db'), rows)
+        print(f'{rows} expense rows')
+        for format_type, ext in (('CSV', 'csv'), ('Parquet', 'parquet'), ('Arrow', 'arrow')):
+            filename = os.path.join(tmp, f'expenses.{ext}')
+            worker = ExportWorker("Expenses", format_type, filename)
+            start = time.perf_counter()
+            if format_type == 'CSV':
+                worker.export_csv()
+            else:
+                worker.export_columnar()
+            elapsed = time.perf_counter() - start
+            print(f'{format_type:<8} {elapsed:7.2f}s  {os.path.getsize(filename) / 2**20:7.1f} MiB')
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Compare rebuilding the dashboard widget tree with updating it in place.
+
+"rebuild" reproduces the old refresh_data(): delete every child widget and
+build the cards, buttons and plots again. "in-place" is the current
+show_data(), which only calls setText/setData. Both are fed the same
+load_data() snapshot, so only the UI work is measured.
+
+Usage: python benchmarks/bench_dashboard_refresh.py [refreshes] [rows]   (default 50 10000)
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from PyQt6 import sip
+from PyQt6.QtWidgets import QApplication
+from database.init_db import get_connection
+from modules.dashboard import DashboardWidget
+from bench_excel_export import build_db
+
+def rebuild(widget, data):
+    layout = widget.layout()
+    while layout.count():
+        item = layout.takeAt(0)
+        child = item.widget()
+        if child is not None:
+            child.deleteLater()
+    # init_ui() creates its own layout, so drop the old one first
+    sip.delete(layout)
+    widget.init_ui()
+    widget.show_data(data)
+
+def in_place(widget, data):
+    widget.show_data(data)
+
+def measure(app, name, refresh, widget, data, refreshes):
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    start = time.perf_counter()
+    for _ in range(refreshes):
+        refresh(widget, data)
+        app.processEvents()
+    elapsed = time.perf_counter() - start
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    stats = after.compare_to(before, 'filename')
+    allocations = sum(stat.count_diff for stat in stats if stat.count_diff > 0)
+    print(f"{name:<10} {elapsed / refreshes * 1000:8.2f} ms/refresh  "
+          f"{allocations:8d} live Python allocations after {refreshes} refreshes")
+
+def main():
+    refreshes = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    rows = int(sys.argv[2]) if len(sys.argv) > 2 else 10_000
+    app = QApplication(sys.argv)
+    with tempfile.TemporaryDirectory() as tmp:
+        build_db(os.path.join(tmp, 'bench.db'), rows)
+        conn = get_connection()
+        data = DashboardWidget.load_data(conn.cursor())
+        conn.close()
+        widget = DashboardWidget()
+        widget.show()
+        app.processEvents()
+        measure(app, 'rebuild', rebuild, widget, data, refreshes)
+        measure(app, 'in-place', in_place, widget, data, refreshes)
+        widget.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Compare the old cell-by-cell Excel export with the write-only streamed one.
+
+"old" reproduces the original ExportWorker.export_excel(): fetchall() into a
+regular Workbook, one ws.cell() per value and new Font/PatternFill objects for
+every header cell. "new" is the current ExportWorker.export_excel(). Each run
+happens in its own process so peak RSS is measured independently.
+
+Usage: python benchmarks/bench_excel_export.py [rows ...]   (default 100000 1000000)
+"""
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+def build_db(path, rows):
+    from database import init_db
+    init_db.DB_PATH = path
+    init_db.init_db()
+    conn = init_db.get_connection()
+    c = conn.cursor()
+    rng = random.Random(42)
+    categories = ['Feed', 'Medicine', 'Electricity', 'Labour', 'Equipment']
+    def gen():
+        for i in range(rows):
+            day = rng.randrange(3650)
+            yield (f'{2015 + day // 365}-{(day % 365) // 31 + 1:02d}-{day % 28 + 1:02d}', rng.choice(categories),
+                   round(rng.uniform(10, 5000), 2), f'Expense {i}', rng.choice(['Cash', 'Bank Transfer']))
+    c.execute('BEGIN')
+    c.executemany('INSERT INTO expenses (date, category, amount, description, payment_method) VALUES (?, ?, ?, ?, ?)', gen())
+    conn.commit()
+    conn.close()
+    init_db.close_all_connections(reopen=True)
+
+def export_old(filename):
+    import openpyxl
+    from openpyxl.styles import Font, PatternFill
+    from database.init_db import get_connection
+    headers = ["Date", "Category", "Amount", "Description", "Payment Method"]
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute('SELECT date, category, amount, description, payment_method FROM expenses')
+    rows = c.fetchall()
+    for col, header in enumerate(headers, 1):
+        cell = ws.cell(row=1, column=col, value=header)
+        cell.font = Font(bold=True)
+        cell.fill = PatternFill(start_color="CCCCCC", end_color="CCCCCC", fill_type="solid")
+    for row_idx, row in enumerate(rows, 2):
+        for col_idx, value in enumerate(row, 1):
+            ws.cell(row=row_idx, column=col_idx, value=value)
+    conn.close()
+    wb.save(filename)
+
+def export_new(filename):
+    from modules.export_module import ExportWorker
+    ExportWorker("Expenses", "Excel", filename).export_excel()
+
+def run_one(variant, db_path, filename):
+    from database import init_db
+    init_db.DB_PATH = db_path
+    start = time.perf_counter()
+    {'old': export_old, 'new': export_new}[variant](filename)
+    elapsed = time.perf_counter() - start
+    # ru_maxrss is in KiB on Linux
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f'{variant:<4} {elapsed:8.2f}s  peak RSS {peak:8.1f} MiB  {os.path.getsize(filename) / 2**20:6.1f} MiB file')
+
+def main():
+    if sys.argv[1:2] == ['--run']:
+        run_one(*sys.argv[2:5])
+        return
+    sizes = [int(arg) for arg in sys.argv[1:]] or [100_000, 1_000_000]
+    for rows in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = os.path.join(tmp, 'bench.db')
+            build_db(db_path, rows)
+            print(f'{rows} expense rows')
+            for variant in ('old', 'new'):
+                subprocess.run([sys.executable, __file__, '--run', variant, db_path,
+                                os.path.join(tmp, f'{variant}.xlsx')], check=True)
+
+if __name__ == "__main__":
+    main()
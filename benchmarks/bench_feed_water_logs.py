@@ -0,0 +1,103 @@
+"""Compare the old N+1 feed/water log load with the paged rollup the view reads.
+
+"N+1" is the original FeedWaterLogsWidget.load_logs query pattern. "paged"
+reads the batch_daily_feed_water rollup through the same SqlTableModel
+configuration as FeedWaterLogsWidget, one keyset page at a time, on the
+calling thread; "first page" is what the view waits for before it paints.
+
+Usage: python benchmarks/bench_feed_water_logs.py [rows_per_table]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+def build_db(path, rows):
+    from database import init_db
+    init_db.DB_PATH = path
+    init_db.init_db()
+    conn = init_db.get_connection()
+    c = conn.cursor()
+    rng = random.Random(42)
+    batches = [f'B{i:03d}' for i in range(50)]
+    def gen(n):
+        for _ in range(n):
+            day = rng.randrange(3650)
+            yield (rng.choice(batches), f'{2015 + day // 365}-{(day % 365) // 31 + 1:02d}-{day % 28 + 1:02d}', rng.uniform(1, 100))
+    c.execute('BEGIN')
+    # The rollup triggers fill batch_daily_feed_water as the rows go in
+    c.executemany('INSERT INTO feed_logs (batch_id, date, quantity_kg) VALUES (?, ?, ?)', gen(rows))
+    c.executemany('INSERT INTO water_logs (batch_id, date, quantity_l) VALUES (?, ?, ?)', gen(rows))
+    conn.commit()
+    conn.close()
+    init_db.close_all_connections(reopen=True)
+
+def load_logs_n_plus_one(c):
+    # The original FeedWaterLogsWidget.load_logs query pattern
+    c.execute('''
+        SELECT DISTINCT batch_id, date FROM (
+            SELECT batch_id, date FROM feed_logs
+            UNION
+            SELECT batch_id, date FROM water_logs
+        ) ORDER BY date DESC
+    ''')
+    rows = []
+    for batch_id, date in c.fetchall():
+        c.execute('SELECT quantity_kg FROM feed_logs WHERE batch_id=? AND date=?', (batch_id, date))
+        feed = c.fetchone()
+        c.execute('SELECT quantity_l FROM water_logs WHERE batch_id=? AND date=?', (batch_id, date))
+        water = c.fetchone()
+        rows.append((batch_id, date, feed[0] if feed else '', water[0] if water else ''))
+    return rows
+
+def log_model(batch=None):
+    from utils.sql_table_model import SqlTableModel
+    # Same source, columns and order as FeedWaterLogsWidget
+    model = SqlTableModel(
+        'batch_daily_feed_water',
+        ['batch_id', 'date', 'CASE WHEN feed_rows > 0 THEN feed_kg END', 'CASE WHEN water_rows > 0 THEN water_l END'],
+        ["Batch ID", "Date", "Feed (kg)", "Water (L)"],
+        order_by=['date', 'batch_id'], descending=True)
+    if batch is not None:
+        model.set_filter('batch', 'batch_id = ?', [batch])
+    return model
+
+def first_page(c, batch=None):
+    model = log_model(batch)
+    return model._fetch(c, model._page_queries(None))
+
+def all_pages(c, batch=None):
+    model = log_model(batch)
+    rows = []
+    last = None
+    while True:
+        page = model._fetch(c, model._page_queries(last))
+        rows.extend(page)
+        if len(page) < model.page_size:
+            return rows
+        last = [page[-1][i] for i in model._key_index]
+
+def timed(label, func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    print(f'{label:<28} {time.perf_counter() - start:8.3f}s  ({len(result)} rows)')
+    return result
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    from database.init_db import get_connection
+    with tempfile.TemporaryDirectory() as tmp:
+        build_db(os.path.join(tmp, 'bench.db'), rows)
+        conn = get_connection()
+        c = conn.cursor()
+        print(f'{rows} rows per table')
+        timed('N+1 (old)', load_logs_n_plus_one, c)
+        timed('paged, first page', first_page, c)
+        timed('paged, every page', all_pages, c)
+        timed('paged, one batch', all_pages, c, 'B007')
+        conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Tables whose inserts, updates and deletes are journaled for delta exports
+TRACKED_TABLES = ['batches', 'feed_logs', 'water_logs', 'vaccinations', 'mortality', 'workers', 'expenses', 'revenue']
+
+JOURNAL_TABLES = {
+    # One row per change, in commit order; op is 'I', 'U' or 'D'
+    'change_journal': '''CREATE TABLE IF NOT EXISTS change_journal (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        table_name TEXT NOT NULL,
+        row_id INTEGER NOT NULL,
+        op TEXT NOT NULL
+    )''',
+    # As migration 6 created it; key_watermarks_by_table() re-keys it per table
+    'export_watermarks': '''CREATE TABLE IF NOT EXISTS export_watermarks (
+        destination TEXT PRIMARY KEY,
+        seq INTEGER NOT NULL,
+        exported_at TEXT NOT NULL
+    )''',
+}
+
+def trigger_statements():
+    """CREATE TRIGGER statements journaling every change to the tracked tables."""
+    statements = []
+    for table in TRACKED_TABLES:
+        bodies = {
+            'insert': [f"INSERT INTO change_journal (table_name, row_id, op) VALUES ('{table}', NEW.id, 'I')"],
+            'delete': [f"INSERT INTO change_journal (table_name, row_id, op) VALUES ('{table}', OLD.id, 'D')"],
+            'update': [
+                f"INSERT INTO change_journal (table_name, row_id, op) VALUES ('{table}', NEW.id, 'U')",
+                # A changed id moves the row: the old id is gone
+                f"INSERT INTO change_journal (table_name, row_id, op) SELECT '{table}', OLD.id, 'D' WHERE OLD.id <> NEW.id",
+            ],
+        }
+        for event, body in bodies.items():
+            statements.append(
+                f"CREATE TRIGGER IF NOT EXISTS trg_{table}_journal_{event} AFTER {event.upper()} ON {table} BEGIN "
+                + '; '.join(body) + '; END'
+            )
+    return statements
+
+def create_change_journal(c):
+    """Create the journal and watermark tables and the journaling triggers."""
+    for ddl in JOURNAL_TABLES.values():
+        c.execute(ddl)
+    c.execute('CREATE INDEX IF NOT EXISTS idx_change_journal_table_seq ON change_journal (table_name, seq)')
+    for statement in trigger_statements():
+        c.execute(statement)
+
+# Last journal seq of each table exported to each destination
+WATERMARKS_BY_TABLE = '''CREATE TABLE export_watermarks (
+    destination TEXT NOT NULL,
+    table_name TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    exported_at TEXT NOT NULL,
+    PRIMARY KEY (destination, table_name)
+)'''
+
+def key_watermarks_by_table(c):
+    """Replace the per-destination watermarks with per-(destination, table) ones.
+
+    Each existing watermark carries over to every tracked table, since it
+    covered them all.
+    """
+    c.execute('ALTER TABLE export_watermarks RENAME TO export_watermarks_old')
+    c.execute(WATERMARKS_BY_TABLE)
+    for table in TRACKED_TABLES:
+        c.execute('INSERT INTO export_watermarks (destination, table_name, seq, exported_at) '
+                  'SELECT destination, ?, seq, exported_at FROM export_watermarks_old', (table,))
+    c.execute('DROP TABLE export_watermarks_old')
+
+def journal_head(c):
+    """Highest journal seq ever written (0 before the first change).
+
+    Read from sqlite_sequence rather than MAX(seq), which would go back down
+    once prune_journal() has emptied the journal.
+    """
+    c.execute("SELECT IFNULL((SELECT seq FROM sqlite_sequence WHERE name = 'change_journal'), 0)")
+    return c.fetchone()[0]
+
+def read_watermark(c, destination, table):
+    """Journal seq of table last exported to destination, or None if it never was"""
+    c.execute('SELECT seq FROM export_watermarks WHERE destination = ? AND table_name = ?', (destination, table))
+    row = c.fetchone()
+    return row[0] if row else None
+
+def record_watermark(c, destination, table, seq):
+    c.execute(
+        "INSERT INTO export_watermarks (destination, table_name, seq, exported_at) VALUES (?, ?, ?, datetime('now')) "
+        "ON CONFLICT(destination, table_name) DO UPDATE SET seq = excluded.seq, exported_at = excluded.exported_at",
+        (destination, table, seq)
+    )
+
+def prune_journal(c, tables=TRACKED_TABLES):
+    """Drop each table's journal entries every destination has already exported"""
+    for table in tables:
+        c.execute(
+            'DELETE FROM change_journal WHERE table_name = ? AND seq <= '
+            '(SELECT IFNULL(MIN(seq), 0) FROM export_watermarks WHERE table_name = ?)',
+            (table, table)
+        )
+
+def changes_query(table, columns, since, until):
+    """(sql, params) selecting op, id and columns for each row changed in (since, until].
+
+    Each changed row appears once with its net operation: 'I' if it was
+    inserted in the window, 'D' if it no longer exists, 'U' otherwise; rows
+    both inserted and deleted in the window are left out. Deleted rows only
+    carry their id.
+    """
+    values = ', '.join(f't.{col}' for col in columns)
+    sql = f'''
+        WITH changed AS (
+            SELECT row_id, MIN(seq) AS first_seq FROM change_journal
+            WHERE table_name = ? AND seq > ? AND seq <= ?
+            GROUP BY row_id
+        )
+        SELECT CASE WHEN t.id IS NULL THEN 'D' WHEN j.op = 'I' THEN 'I' ELSE 'U' END,
+               changed.row_id, {values}
+        FROM changed
+        JOIN change_journal j ON j.seq = changed.first_seq
+        LEFT JOIN {table} t ON t.id = changed.row_id
+        WHERE NOT (t.id IS NULL AND j.op = 'I')
+        ORDER BY changed.row_id
+    '''
+    return sql, (table, since, until)
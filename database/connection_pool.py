@@ -0,0 +1,208 @@
+import queue
+import threading
+
+
+class PooledConnection:
+    """Handle returned by get_connection().
+
+    Behaves like a normal DB-API connection, but close() hands the underlying
+    connection back to the manager instead of closing it, so the SQLCipher key
+    derivation is only paid when a connection is first opened.
+    """
+
+    def __init__(self, manager, conn):
+        self._manager = manager
+        self._conn = conn
+        self._closed = False
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __enter__(self):
+        self._conn.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return self._conn.__exit__(exc_type, exc, tb)
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            self._manager.release(self._conn)
+
+
+class ConnectionManager:
+    """Keeps one long-lived connection for the GUI thread and a bounded pool
+    of connections shared by worker threads (export, background loaders).
+
+    Each close_all() starts a new generation; a worker connection opened in
+    an earlier one is closed when it comes back instead of being reused, as
+    it may still point at a database file that has since been replaced.
+    """
+
+    def __init__(self, connect, max_pool_size=4, timeout=10.0):
+        self._connect = connect
+        self.max_pool_size = max_pool_size
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._main_conn = None
+        self._main_leases = 0
+        self._idle = queue.LifoQueue()
+        self._pool_size = 0
+        self._local = threading.local()
+        self._closed = False
+        self._generation = 0
+        # Worker connections currently checked out
+        self._leased = 0
+
+    def acquire(self):
+        """Return a PooledConnection for the calling thread."""
+        if threading.current_thread() is threading.main_thread():
+            conn = self._acquire_main()
+        else:
+            conn = self._acquire_worker()
+        return PooledConnection(self, conn)
+
+    def release(self, conn):
+        if threading.current_thread() is threading.main_thread():
+            # A main connection from before close_all() is already closed
+            if conn is self._main_conn:
+                self._main_leases -= 1
+                if self._main_leases == 0:
+                    self._reset(conn)
+            return
+        leases = getattr(self._local, 'leases', 0) - 1
+        self._local.leases = leases
+        if leases > 0:
+            return
+        self._local.conn = None
+        with self._lock:
+            self._leased -= 1
+        if self._closed or self._local.generation != self._generation or not self._reset(conn):
+            self._discard(conn)
+        else:
+            self._idle.put((self._local.generation, conn))
+
+    def close_all(self, require_idle=False):
+        """Close every connection owned by the manager (call on shutdown).
+
+        With require_idle, raise RuntimeError instead if any connection is
+        still checked out, e.g. before the database file is replaced.
+        """
+        with self._lock:
+            if require_idle and (self._leased or self._main_leases):
+                raise RuntimeError("The database is in use by an export, backup or snapshot; "
+                                   "try again when it has finished")
+            self._closed = True
+            self._generation += 1
+            if self._main_conn is not None:
+                self._safe_close(self._main_conn)
+                self._main_conn = None
+                self._main_leases = 0
+            while True:
+                try:
+                    _, conn = self._idle.get_nowait()
+                except queue.Empty:
+                    break
+                self._safe_close(conn)
+                self._pool_size -= 1
+
+    def reopen(self):
+        """Allow new connections after close_all() (e.g. after a DB reset)."""
+        with self._lock:
+            self._closed = False
+
+    def _acquire_main(self):
+        if self._main_conn is not None and self._main_leases == 0 and not self._is_healthy(self._main_conn):
+            self._safe_close(self._main_conn)
+            self._main_conn = None
+        if self._main_conn is None:
+            self._main_conn = self._open()
+        self._main_leases += 1
+        return self._main_conn
+
+    def _acquire_worker(self):
+        # Nested get_connection() calls on the same worker share one connection
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            self._local.leases += 1
+            return conn
+        with self._lock:
+            self._leased += 1
+        try:
+            conn, generation = self._checkout()
+        except Exception:
+            with self._lock:
+                self._leased -= 1
+            raise
+        self._local.conn = conn
+        self._local.generation = generation
+        self._local.leases = 1
+        return conn
+
+    def _checkout(self):
+        """Return (connection, generation) for a worker thread."""
+        while True:
+            try:
+                generation, conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if generation == self._generation and self._is_healthy(conn):
+                return conn, generation
+            self._discard(conn)
+        with self._lock:
+            can_open = self._pool_size < self.max_pool_size
+            if can_open:
+                self._pool_size += 1
+            # Read before connecting, so a close_all() meanwhile marks the connection stale
+            generation = self._generation
+        if can_open:
+            try:
+                return self._open(), generation
+            except Exception:
+                with self._lock:
+                    self._pool_size -= 1
+                raise
+        try:
+            generation, conn = self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise RuntimeError("Timed out waiting for a database connection")
+        if generation != self._generation or not self._is_healthy(conn):
+            # Its slot is free again, so the next attempt can open a fresh connection
+            self._discard(conn)
+            return self._checkout()
+        return conn, generation
+
+    def _open(self):
+        if self._closed:
+            raise RuntimeError("Connection manager has been shut down")
+        return self._connect()
+
+    def _discard(self, conn):
+        self._safe_close(conn)
+        with self._lock:
+            self._pool_size -= 1
+
+    def _reset(self, conn):
+        """Roll back anything left uncommitted, as closing a connection would."""
+        try:
+            if getattr(conn, 'in_transaction', True):
+                conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _is_healthy(conn):
+        try:
+            conn.execute('SELECT 1').fetchone()
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _safe_close(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
@@ -1,6 +1,14 @@
 import os
+import sys
 import sqlite3
 import bcrypt
+import pathlib
+from contextlib import contextmanager
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from database.connection_pool import ConnectionManager
+from database.rollups import create_rollups
+from database.search import create_search_indexes, drop_search_indexes
+from database.changes import create_change_journal, key_watermarks_by_table
 
 DB_PATH = os.path.join(os.path.dirname(__file__), 'dash_poultry.db')
 ADMIN_USERNAME = 'a'
@@ -13,17 +21,91 @@ try:
 except ImportError:
     USE_SQLCIPHER = False
 
-def get_connection():
+def _configure(conn):
+    # WAL lets readers (exports, reports) run alongside the writer thread
+    conn.execute('PRAGMA journal_mode = WAL')
+    conn.execute('PRAGMA synchronous = NORMAL')
+    return conn
+
+def open_connection(path=None, read_only=False):
+    """Open a new dedicated connection (the pool and the writer thread use this).
+
+    path defaults to the app database; other paths (snapshots, backups) are
+    opened with the same key and settings. A read_only connection leaves the
+    file exactly as it is (no WAL switch), e.g. for a backup being restored.
+    """
+    path = path or DB_PATH
+    if read_only:
+        path = pathlib.Path(os.path.abspath(path)).as_uri() + '?mode=ro'
+    # check_same_thread is off because pooled connections move between worker threads
     if USE_SQLCIPHER:
-        conn = sqlcipher.connect(DB_PATH)
+        conn = sqlcipher.connect(path, timeout=10, check_same_thread=False, uri=read_only)
         conn.execute("PRAGMA key = 'dashpoultry_secret_key';")
-        return conn
     else:
-        return sqlite3.connect(DB_PATH)
+        conn = sqlite3.connect(path, timeout=10, check_same_thread=False, uri=read_only)
+    return conn if read_only else _configure(conn)
 
-def init_db():
+# Worker-thread connections: one per query pool thread, plus one each for an
+# export and a backup or snapshot job, which may all run at once
+QUERY_THREADS = 3
+BACKGROUND_JOBS = 2
+connection_manager = ConnectionManager(open_connection, max_pool_size=QUERY_THREADS + BACKGROUND_JOBS)
+
+def get_connection():
+    """Borrow a connection from the shared manager; close() returns it."""
+    return connection_manager.acquire()
+
+@contextmanager
+def read_snapshot():
+    """Borrow a connection holding one read transaction for the whole block.
+
+    Under WAL every query in the block sees the database as it was at the
+    start, while the writer thread keeps committing alongside. If the
+    connection is already in a transaction, that one is reused.
+    """
     conn = get_connection()
-    c = conn.cursor()
+    started = not conn.in_transaction
+    try:
+        if started:
+            conn.execute('BEGIN')
+            # A deferred BEGIN only takes its snapshot at the first read; take it now
+            conn.execute('SELECT 1 FROM sqlite_master LIMIT 1').fetchall()
+        yield conn
+    finally:
+        if started:
+            conn.rollback()
+        conn.close()
+
+def close_all_connections(reopen=False, require_idle=False):
+    """Close pooled connections, e.g. on shutdown or before replacing the DB file.
+
+    With require_idle, raise RuntimeError instead while any is checked out.
+    """
+    connection_manager.close_all(require_idle)
+    if reopen:
+        connection_manager.reopen()
+
+def replace_database(path):
+    """Atomically move the database file at path over DB_PATH.
+
+    Every pooled connection is closed first and the pool reopened after, so
+    the next get_connection() sees the new file. Raises RuntimeError, leaving
+    the database alone, while an export, backup or snapshot still holds a
+    connection. Callers must have stopped the writer thread and drained
+    background queries.
+    """
+    connection_manager.close_all(require_idle=True)
+    try:
+        # A stale WAL from the old database must not be replayed onto the new one
+        for sidecar in (DB_PATH + '-wal', DB_PATH + '-shm'):
+            if os.path.exists(sidecar):
+                os.remove(sidecar)
+        os.replace(path, DB_PATH)
+    finally:
+        connection_manager.reopen()
+
+def _migration_1_base_schema(c):
+    """Tables, legacy column fixes and seed data from the original schema."""
     # Admin table
     c.execute('''CREATE TABLE IF NOT EXISTS admin (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -160,8 +242,99 @@ def init_db():
         c.execute("INSERT INTO workers (worker_id, name, role, phone, email, address, salary, hire_date, status) VALUES ('W001', 'Rajesh Kumar', 'Farm Manager', '9876543210', 'rajesh@farm.com', 'Village Road, District', 25000.00, '2024-01-15', 'Active')")
         c.execute("INSERT INTO workers (worker_id, name, role, phone, email, address, salary, hire_date, status) VALUES ('W002', 'Priya Singh', 'Feeder', '8765432109', 'priya@farm.com', 'Main Street, City', 15000.00, '2024-02-01', 'Active')")
         c.execute("INSERT INTO workers (worker_id, name, role, phone, email, address, salary, hire_date, status) VALUES ('W003', 'Amit Patel', 'Cleaner', '7654321098', 'amit@farm.com', 'Industrial Area, Town', 12000.00, '2024-03-10', 'Active')")
-    conn.commit()
-    conn.close()
+
+def _migration_2_indexes(c):
+    """Indexes for the per-batch, per-date and status lookups the modules run."""
+    c.execute('CREATE INDEX IF NOT EXISTS idx_feed_logs_batch_date ON feed_logs (batch_id, date)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_water_logs_batch_date ON water_logs (batch_id, date)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_mortality_batch_date ON mortality (batch_id, date)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_vaccinations_batch_date ON vaccinations (batch_id, date)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_expenses_date ON expenses (date)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_revenue_date ON revenue (date)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_workers_status ON workers (status)')
+
+def _migration_3_rollups(c):
+    """Trigger-maintained daily/monthly aggregates used by the charts."""
+    create_rollups(c, ['daily_feed_water', 'monthly_financials', 'monthly_expense_by_category', 'revenue_by_batch'])
+
+def _migration_4_paging(c):
+    """Indexes matching the module tables' sort orders, for keyset paging."""
+    c.execute('CREATE INDEX IF NOT EXISTS idx_batches_date_in ON batches (date_in)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_mortality_date ON mortality (date)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_vaccinations_date ON vaccinations (date)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_workers_name ON workers (name)')
+    # Per-batch daily feed/water totals, so the log view pages a table instead of a GROUP BY
+    create_rollups(c, ['batch_daily_feed_water'])
+    c.execute('CREATE INDEX IF NOT EXISTS idx_batch_daily_feed_water_batch ON batch_daily_feed_water (batch_id, date)')
+
+def _migration_5_search(c):
+    """FTS5 indexes over the text columns the module search boxes look in."""
+    # Frozen: migration 7 replaces these indexes
+    create_search_indexes(c, {
+        'mortality': ['reason', 'batch_id'],
+        'expenses': ['description', 'category', 'payment_method'],
+        'workers': ['name', 'role', 'address', 'worker_id'],
+        'vaccinations': ['vaccine', 'batch_id', 'status'],
+    }, tokenize=None)
+
+def _migration_6_change_journal(c):
+    """Trigger-fed change journal and per-destination watermarks for delta exports."""
+    create_change_journal(c)
+
+def _migration_7_trigram_search(c):
+    """Trigram FTS indexes over every shown column, so substring and date searches match."""
+    drop_search_indexes(c)
+    create_search_indexes(c)
+
+def _migration_8_table_watermarks(c):
+    """Delta-export watermarks per (destination, table), so a one-table export leaves the others alone."""
+    key_watermarks_by_table(c)
+
+# Ordered schema migrations; migration N brings the DB to user_version N.
+# Only ever append to this list - never edit or reorder applied migrations.
+MIGRATIONS = [
+    _migration_1_base_schema,
+    _migration_2_indexes,
+    _migration_3_rollups,
+    _migration_4_paging,
+    _migration_5_search,
+    _migration_6_change_journal,
+    _migration_7_trigram_search,
+    _migration_8_table_watermarks,
+]
+SCHEMA_VERSION = len(MIGRATIONS)
+
+def get_schema_version(conn):
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+def run_migrations(conn):
+    """Apply pending migrations to conn, each in its own transaction.
+
+    Returns the list of versions that were applied (empty when up to date).
+    """
+    version = get_schema_version(conn)
+    applied = []
+    for number, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+        c = conn.cursor()
+        try:
+            c.execute('BEGIN')
+            migration(c)
+            c.execute(f'PRAGMA user_version = {number}')
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        applied.append(number)
+    return applied
+
+def init_db():
+    conn = get_connection()
+    try:
+        # Warm databases only pay for this single pragma read
+        if get_schema_version(conn) < SCHEMA_VERSION:
+            run_migrations(conn)
+    finally:
+        conn.close()
 
 if __name__ == "__main__":
     init_db() 
\ No newline at end of file
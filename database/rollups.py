@@ -0,0 +1,157 @@
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Pre-aggregated tables read by the dashboard and profit/loss charts.
+# Each has one or more *_rows counters so a key disappears once the last
+# source row feeding it is deleted.
+# Migrations create these by name: add a new rollup with a new migration and
+# never change the DDL or specs of one an applied migration created.
+ROLLUP_TABLES = {
+    'daily_feed_water': '''CREATE TABLE IF NOT EXISTS daily_feed_water (
+        date TEXT PRIMARY KEY,
+        feed_kg REAL NOT NULL DEFAULT 0,
+        feed_rows INTEGER NOT NULL DEFAULT 0,
+        water_l REAL NOT NULL DEFAULT 0,
+        water_rows INTEGER NOT NULL DEFAULT 0
+    )''',
+    'batch_daily_feed_water': '''CREATE TABLE IF NOT EXISTS batch_daily_feed_water (
+        date TEXT NOT NULL,
+        batch_id TEXT NOT NULL,
+        feed_kg REAL NOT NULL DEFAULT 0,
+        feed_rows INTEGER NOT NULL DEFAULT 0,
+        water_l REAL NOT NULL DEFAULT 0,
+        water_rows INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (date, batch_id)
+    )''',
+    'monthly_financials': '''CREATE TABLE IF NOT EXISTS monthly_financials (
+        month TEXT PRIMARY KEY,
+        revenue REAL NOT NULL DEFAULT 0,
+        revenue_rows INTEGER NOT NULL DEFAULT 0,
+        expenses REAL NOT NULL DEFAULT 0,
+        expense_rows INTEGER NOT NULL DEFAULT 0
+    )''',
+    'monthly_expense_by_category': '''CREATE TABLE IF NOT EXISTS monthly_expense_by_category (
+        month TEXT NOT NULL,
+        category TEXT NOT NULL,
+        amount REAL NOT NULL DEFAULT 0,
+        rows INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (month, category)
+    )''',
+    'revenue_by_batch': '''CREATE TABLE IF NOT EXISTS revenue_by_batch (
+        batch_id TEXT PRIMARY KEY,
+        amount REAL NOT NULL DEFAULT 0,
+        rows INTEGER NOT NULL DEFAULT 0
+    )''',
+}
+
+# Row-count columns per rollup table; a row is dropped when all reach zero
+ROLLUP_COUNTERS = {
+    'daily_feed_water': ['feed_rows', 'water_rows'],
+    'batch_daily_feed_water': ['feed_rows', 'water_rows'],
+    'monthly_financials': ['revenue_rows', 'expense_rows'],
+    'monthly_expense_by_category': ['rows'],
+    'revenue_by_batch': ['rows'],
+}
+
+# (source table, rollup table, {key column: expression over the source row},
+#  value column, source value column, counter column)
+# Expressions use "{r}" for the row alias (NEW/OLD in triggers).
+ROLLUP_SPECS = [
+    ('feed_logs', 'daily_feed_water', {'date': '{r}.date'}, 'feed_kg', 'quantity_kg', 'feed_rows'),
+    ('water_logs', 'daily_feed_water', {'date': '{r}.date'}, 'water_l', 'quantity_l', 'water_rows'),
+    ('feed_logs', 'batch_daily_feed_water', {'date': '{r}.date', 'batch_id': '{r}.batch_id'}, 'feed_kg', 'quantity_kg', 'feed_rows'),
+    ('water_logs', 'batch_daily_feed_water', {'date': '{r}.date', 'batch_id': '{r}.batch_id'}, 'water_l', 'quantity_l', 'water_rows'),
+    ('revenue', 'monthly_financials', {'month': "strftime('%Y-%m', {r}.date)"}, 'revenue', 'amount', 'revenue_rows'),
+    ('expenses', 'monthly_financials', {'month': "strftime('%Y-%m', {r}.date)"}, 'expenses', 'amount', 'expense_rows'),
+    ('expenses', 'monthly_expense_by_category',
+     {'month': "strftime('%Y-%m', {r}.date)", 'category': '{r}.category'}, 'amount', 'amount', 'rows'),
+    ('revenue', 'revenue_by_batch', {'batch_id': '{r}.batch_id'}, 'amount', 'amount', 'rows'),
+]
+
+def _key_sql(keys, row):
+    cols = list(keys)
+    exprs = [keys[col].format(r=row) for col in cols]
+    match = ' AND '.join(f'{col} = {expr}' for col, expr in zip(cols, exprs))
+    not_null = ' AND '.join(f'{expr} IS NOT NULL' for expr in exprs)
+    return cols, exprs, match, not_null
+
+def _add_row_sql(target, keys, value_col, source_col, counter, row):
+    cols, exprs, match, not_null = _key_sql(keys, row)
+    return [
+        f"INSERT OR IGNORE INTO {target} ({', '.join(cols)}) SELECT {', '.join(exprs)} WHERE {not_null}",
+        f"UPDATE {target} SET {value_col} = {value_col} + IFNULL({row}.{source_col}, 0), "
+        f"{counter} = {counter} + 1 WHERE {match}",
+    ]
+
+def _remove_row_sql(target, keys, value_col, source_col, counter, row):
+    _, _, match, _ = _key_sql(keys, row)
+    empty = ' AND '.join(f'{c} <= 0' for c in ROLLUP_COUNTERS[target])
+    return [
+        f"UPDATE {target} SET {value_col} = {value_col} - IFNULL({row}.{source_col}, 0), "
+        f"{counter} = {counter} - 1 WHERE {match}",
+        f"DELETE FROM {target} WHERE {match} AND {empty}",
+    ]
+
+def _specs(tables):
+    return [spec for spec in ROLLUP_SPECS if tables is None or spec[1] in tables]
+
+def trigger_statements(tables=None):
+    """CREATE TRIGGER statements keeping the rollups (all if tables is None) in step with their sources."""
+    statements = []
+    for source, target, keys, value_col, source_col, counter in _specs(tables):
+        args = (target, keys, value_col, source_col, counter)
+        bodies = {
+            'insert': _add_row_sql(*args, 'NEW'),
+            'delete': _remove_row_sql(*args, 'OLD'),
+            'update': _remove_row_sql(*args, 'OLD') + _add_row_sql(*args, 'NEW'),
+        }
+        for event, body in bodies.items():
+            name = f'trg_{target}_{source}_{event}'
+            statements.append(
+                f"CREATE TRIGGER IF NOT EXISTS {name} AFTER {event.upper()} ON {source} BEGIN "
+                + '; '.join(body) + '; END'
+            )
+    return statements
+
+def create_rollups(c, tables):
+    """Create the named rollup tables and their triggers, then fill them from the raw tables."""
+    for table in tables:
+        c.execute(ROLLUP_TABLES[table])
+    for statement in trigger_statements(tables):
+        c.execute(statement)
+    rebuild_rollups(c, tables)
+
+def rebuild_rollups(c, tables=None):
+    """Recompute rollup tables (all if tables is None) from scratch (cursor must be in a transaction)."""
+    for table in ROLLUP_TABLES if tables is None else tables:
+        c.execute(f'DELETE FROM {table}')
+    for source, target, keys, value_col, source_col, counter in _specs(tables):
+        cols = list(keys)
+        exprs = [keys[col].format(r=source) for col in cols]
+        not_null = ' AND '.join(f'{expr} IS NOT NULL' for expr in exprs)
+        c.execute(
+            f"SELECT {', '.join(exprs)}, SUM(IFNULL({source_col}, 0)), COUNT(*) FROM {source} "
+            f"WHERE {not_null} GROUP BY {', '.join(exprs)}"
+        )
+        match = ' AND '.join(f'{col} = ?' for col in cols)
+        placeholders = ', '.join('?' for _ in cols)
+        for row in c.fetchall():
+            key = row[:len(cols)]
+            total, count = row[len(cols):]
+            c.execute(f"INSERT OR IGNORE INTO {target} ({', '.join(cols)}) VALUES ({placeholders})", key)
+            c.execute(f"UPDATE {target} SET {value_col} = ?, {counter} = ? WHERE {match}", (total, count) + tuple(key))
+
+if __name__ == "__main__":
+    # python database/rollups.py - rebuild the rollup tables in place
+    from database.init_db import init_db, get_connection
+    init_db()
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute('BEGIN')
+        rebuild_rollups(cur)
+        conn.commit()
+        print("Rollup tables rebuilt.")
+    finally:
+        conn.close()
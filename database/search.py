@@ -0,0 +1,122 @@
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Full-text indexes behind the module search boxes: source table -> indexed
+# columns (every column the module's table shows). Each is an external-content
+# FTS5 table named {table}_fts over the source's integer id, so the text itself
+# is only stored once. The trigram tokenizer matches any substring of three or
+# more characters, as the LIKE search it replaced did, dates included.
+FTS_COLUMNS = {
+    'mortality': ['batch_id', 'date', 'count', 'reason'],
+    'expenses': ['date', 'category', 'amount', 'description', 'payment_method'],
+    'workers': ['worker_id', 'name', 'role', 'phone', 'email', 'address', 'salary', 'hire_date', 'status'],
+    'vaccinations': ['batch_id', 'date', 'vaccine', 'status'],
+}
+FTS_TOKENIZE = 'trigram'
+# Shorter words can't be looked up in a trigram index
+MIN_TERM_LENGTH = 3
+
+def fts_table(table):
+    return f'{table}_fts'
+
+def trigger_statements(fts_columns=FTS_COLUMNS):
+    """CREATE TRIGGER statements keeping every FTS index in step with its table."""
+    statements = []
+    for table, columns in fts_columns.items():
+        fts = fts_table(table)
+        cols = ', '.join(columns)
+        new_values = ', '.join(f'NEW.{col}' for col in columns)
+        old_values = ', '.join(f'OLD.{col}' for col in columns)
+        add = f"INSERT INTO {fts} (rowid, {cols}) VALUES (NEW.id, {new_values})"
+        remove = f"INSERT INTO {fts} ({fts}, rowid, {cols}) VALUES ('delete', OLD.id, {old_values})"
+        bodies = {
+            'insert': [add],
+            'delete': [remove],
+            'update': [remove, add],
+        }
+        for event, body in bodies.items():
+            statements.append(
+                f"CREATE TRIGGER IF NOT EXISTS trg_{fts}_{event} AFTER {event.upper()} ON {table} BEGIN "
+                + '; '.join(body) + '; END'
+            )
+    return statements
+
+def create_search_indexes(c, fts_columns=FTS_COLUMNS, tokenize=FTS_TOKENIZE):
+    """Create the FTS5 tables and triggers, then index the existing rows."""
+    options = f", tokenize='{tokenize}'" if tokenize else ''
+    for table, columns in fts_columns.items():
+        fts = fts_table(table)
+        c.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+            f"{', '.join(columns)}, content='{table}', content_rowid='id'{options})"
+        )
+    for statement in trigger_statements(fts_columns):
+        c.execute(statement)
+    rebuild_search_indexes(c, fts_columns)
+
+def drop_search_indexes(c, tables=FTS_COLUMNS):
+    """Drop the FTS tables of tables and their triggers."""
+    for table in tables:
+        fts = fts_table(table)
+        for event in ('insert', 'delete', 'update'):
+            c.execute(f'DROP TRIGGER IF EXISTS trg_{fts}_{event}')
+        c.execute(f'DROP TABLE IF EXISTS {fts}')
+
+def rebuild_search_indexes(c, fts_columns=FTS_COLUMNS):
+    """Re-index every FTS table from its source table."""
+    for table in fts_columns:
+        fts = fts_table(table)
+        c.execute(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
+
+def match_query(words):
+    """FTS5 MATCH expression requiring every word, or None if there are none.
+
+    Each word matches anywhere in any indexed column, case-insensitively, so
+    typing "new cas" finds "Newcastle Disease" and "2024-06" finds June 2024.
+    Words must be at least MIN_TERM_LENGTH characters long.
+    """
+    terms = ['"' + word.replace('"', '""') + '"' for word in words]
+    return ' '.join(terms) or None
+
+def _like_clause(table, word):
+    pattern = '%' + word.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+    columns = FTS_COLUMNS[table]
+    clause = '(' + ' OR '.join(f"{table}.{col} LIKE ? ESCAPE '\\'" for col in columns) + ')'
+    return clause, [pattern] * len(columns)
+
+def search_clause(table, text):
+    """(WHERE clause, params) restricting table to rows containing every word of text.
+
+    Words long enough go through the FTS index; shorter ones fall back to a
+    LIKE over the indexed columns. None when text is blank.
+    """
+    words = text.split()
+    if not words:
+        return None
+    clauses, params = [], []
+    query = match_query([word for word in words if len(word) >= MIN_TERM_LENGTH])
+    if query is not None:
+        fts = fts_table(table)
+        clauses.append(f'{table}.rowid IN (SELECT rowid FROM {fts} WHERE {fts} MATCH ?)')
+        params.append(query)
+    for word in words:
+        if len(word) < MIN_TERM_LENGTH:
+            clause, like_params = _like_clause(table, word)
+            clauses.append(clause)
+            params.extend(like_params)
+    return ' AND '.join(clauses), params
+
+if __name__ == "__main__":
+    # python database/search.py - rebuild the full-text indexes in place
+    from database.init_db import init_db, get_connection
+    init_db()
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute('BEGIN')
+        rebuild_search_indexes(cur)
+        conn.commit()
+        print("Search indexes rebuilt.")
+    finally:
+        conn.close()
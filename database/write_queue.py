@@ -0,0 +1,123 @@
+import queue
+import threading
+
+_STOP = object()
+
+
+class WriteJob:
+    """A queued write: func(cursor, *args) plus the callbacks to report back to."""
+
+    def __init__(self, func, args, on_success=None, on_error=None):
+        self.func = func
+        self.args = args
+        self.on_success = on_success
+        self.on_error = on_error
+        self.result = None
+        self.error = None
+
+
+class WriteQueue:
+    """Single background writer thread for the database.
+
+    Jobs are callables that take a cursor and must not commit themselves.
+    Whatever is queued while a transaction is being written is picked up as
+    one burst and group-committed together; each job runs in its own savepoint
+    so a failing job is rolled back without losing the rest of the burst.
+    on_complete(job) is called from the writer thread once the burst is done.
+    If the writer cannot open its connection, every queued job completes
+    with that error and the next submit() starts a new writer.
+    """
+
+    def __init__(self, connect, on_complete, max_batch=64):
+        self._connect = connect
+        self._on_complete = on_complete
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, func, *args, on_success=None, on_error=None):
+        job = WriteJob(func, args, on_success, on_error)
+        with self._lock:
+            # Queued under the lock, so a writer failing to connect either fails it or a new writer runs it
+            self._queue.put(job)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='db-writer', daemon=True)
+                self._thread.start()
+        return job
+
+    def stop(self, timeout=None):
+        """Finish the queued jobs, then stop the writer thread."""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is not None and thread.is_alive():
+            self._queue.put(_STOP)
+            thread.join(timeout)
+
+    def _run(self):
+        try:
+            conn = self._connect()
+        except Exception as e:
+            self._fail_queued(e)
+            return
+        try:
+            stopping = False
+            while not stopping:
+                job = self._queue.get()
+                if job is _STOP:
+                    break
+                batch = [job]
+                while len(batch) < self.max_batch:
+                    try:
+                        job = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if job is _STOP:
+                        stopping = True
+                        break
+                    batch.append(job)
+                self._write(conn, batch)
+        finally:
+            conn.close()
+
+    def _fail_queued(self, error):
+        with self._lock:
+            if self._thread is threading.current_thread():
+                self._thread = None
+            failed = []
+            while True:
+                try:
+                    job = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if job is not _STOP:
+                    job.error = error
+                    failed.append(job)
+        for job in failed:
+            self._on_complete(job)
+
+    def _write(self, conn, batch):
+        c = conn.cursor()
+        try:
+            c.execute('BEGIN IMMEDIATE')
+            for job in batch:
+                c.execute('SAVEPOINT write_job')
+                try:
+                    job.result = job.func(c, *job.args)
+                    c.execute('RELEASE write_job')
+                except Exception as e:
+                    job.error = e
+                    c.execute('ROLLBACK TO write_job')
+                    c.execute('RELEASE write_job')
+            conn.commit()
+        except Exception as e:
+            try:
+                conn.rollback()
+            except Exception:
+                pass
+            for job in batch:
+                if job.error is None:
+                    job.error = e
+        for job in batch:
+            self._on_complete(job)
@@ -1,14 +1,27 @@
 import sys
-from PyQt6.QtWidgets import QApplication
-from ui.login_window import LoginWindow
-from database.init_db import init_db
+from utils import startup
 
 def main():
+    # Must come before the app's own imports so they are timed too
+    if '--profile-startup' in sys.argv:
+        sys.argv.remove('--profile-startup')
+        startup.enable_profiling()
+    # The login window only needs PyQt6 and bcrypt; the main window and its
+    # plotting libraries are imported once the login has been submitted
+    from PyQt6.QtWidgets import QApplication
+    from ui.login_window import LoginWindow
+    from database.init_db import init_db, close_all_connections
+    from utils.data_manager import data_manager
+    startup.mark('imports')
     init_db()
+    startup.mark('init_db')
     app = QApplication(sys.argv)
+    app.aboutToQuit.connect(data_manager.shutdown)
+    app.aboutToQuit.connect(close_all_connections)
     window = LoginWindow()
     window.show()
+    startup.mark('login window shown')
     sys.exit(app.exec())
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
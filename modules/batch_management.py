@@ -1,12 +1,13 @@
-from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QTableWidget, QTableWidgetItem, QMessageBox, QLabel, QDialog, QFormLayout, QLineEdit, QDateEdit, QDialogButtonBox, QSpinBox, QDoubleSpinBox, QFileDialog, QAbstractItemView, QHeaderView, QToolTip)
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QTableView, QMessageBox, QLabel, QDialog, QFormLayout, QLineEdit, QDateEdit, QDialogButtonBox, QSpinBox, QDoubleSpinBox, QFileDialog, QAbstractItemView, QHeaderView, QToolTip)
 from PyQt6.QtCore import Qt, QDate
 from PyQt6.QtPrintSupport import QPrinter, QPrintDialog
 import csv
 import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from database.init_db import get_connection
 from utils.data_manager import data_manager
+from utils.sql_table_model import SqlTableModel, debounce_search
+from utils.refresh_scheduler import RefreshScheduler
 from PyQt6.QtGui import QKeySequence, QShortcut, QTextDocument
 
 class BatchDialog(QDialog):
@@ -81,8 +82,9 @@ class BatchDialog(QDialog):
 class BatchManagementWidget(QWidget):
     def __init__(self):
         super().__init__()
-        self.all_rows = []  # Store all rows for filtering
         self.init_ui()
+        self.refresher = RefreshScheduler(self, self.load_batches)
+        self.refresher.watch(data_manager.database_replaced)
         self.load_batches()
 
     def init_ui(self):
@@ -95,20 +97,19 @@ class BatchManagementWidget(QWidget):
         self.search_input = QLineEdit()
         self.search_input.setPlaceholderText("Search by Batch ID, Breed, etc...")
         self.search_input.setToolTip("Type to filter batches by ID, breed, etc.")
-        self.search_input.textChanged.connect(self.filter_table)
+        self.search_timer = debounce_search(self.search_input, self.filter_table)
         search_layout.addWidget(self.search_input)
         layout.addLayout(search_layout)
         # Table
-        self.table = QTableWidget()
-        self.table.setColumnCount(6)
-        self.table.setHorizontalHeaderLabels([
-            "Batch ID", "# Chicks", "Breed", "Date In", "Expected Out", "Mortality Rate"
-        ])
-        for i, header in enumerate(["Batch ID", "# Chicks", "Breed", "Date In", "Expected Out", "Mortality Rate"]):
-            self.table.horizontalHeaderItem(i).setToolTip(header)
-        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
-        self.table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
-        self.table.setSelectionMode(QTableWidget.SelectionMode.SingleSelection)
+        headers = ["Batch ID", "# Chicks", "Breed", "Date In", "Expected Out", "Mortality Rate"]
+        self.model = SqlTableModel(
+            'batches', ['batch_id', 'num_chicks', 'breed', 'date_in', 'expected_out', 'mortality_rate'], headers,
+            order_by=['date_in', 'rowid'], descending=True, parent=self)
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setEditTriggers(QTableView.EditTrigger.NoEditTriggers)
+        self.table.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
+        self.table.setSelectionMode(QTableView.SelectionMode.SingleSelection)
         self.table.verticalHeader().setVisible(False)
         self.table.setAlternatingRowColors(True)
         self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
@@ -154,28 +155,26 @@ class BatchManagementWidget(QWidget):
         QShortcut(QKeySequence("Delete"), self, self.delete_batch)
 
     def load_batches(self):
-        conn = get_connection()
-        c = conn.cursor()
-        c.execute('SELECT batch_id, num_chicks, breed, date_in, expected_out, mortality_rate FROM batches ORDER BY date_in DESC')
-        rows = c.fetchall()
-        self.all_rows = rows
-        self.populate_table(rows)
-        conn.close()
-
-    def populate_table(self, rows):
-        self.table.setRowCount(len(rows))
-        for row_idx, row in enumerate(rows):
-            for col_idx, value in enumerate(row):
-                item = QTableWidgetItem(str(value))
-                self.table.setItem(row_idx, col_idx, item)
+        self.model.reload()
 
     def filter_table(self):
-        text = self.search_input.text().lower()
-        if not text:
-            self.populate_table(self.all_rows)
-            return
-        filtered = [row for row in self.all_rows if any(text in str(cell).lower() for cell in row)]
-        self.populate_table(filtered) 
+        self.model.set_search(self.search_input.text())
+        self.model.reload()
+
+    def on_write_succeeded(self, title, message):
+        QMessageBox.information(self, title, message)
+        self.load_batches()
+        # Notify other modules that batches changed
+        try:
+            data_manager.notify_batch_change()
+        except Exception:
+            pass
+
+    def on_write_failed(self, action, error):
+        if isinstance(error, ValueError):
+            QMessageBox.warning(self, "Duplicate Batch", str(error))
+        else:
+            QMessageBox.critical(self, "Database Error", f"Failed to {action} batch: {error}")
 
     def add_batch(self):
         dialog = BatchDialog(self)
@@ -185,40 +184,25 @@ class BatchManagementWidget(QWidget):
             if not batch_id:
                 QMessageBox.warning(self, "Validation Error", "Batch ID cannot be empty.")
                 return
-            try:
-                conn = get_connection()
-                c = conn.cursor()
+            def insert(c):
                 c.execute('SELECT 1 FROM batches WHERE batch_id = ?', (batch_id,))
                 if c.fetchone():
-                    QMessageBox.warning(self, "Duplicate Batch", f"Batch ID '{batch_id}' already exists.")
-                    conn.close()
-                    return
+                    raise ValueError(f"Batch ID '{batch_id}' already exists.")
                 c.execute(
                     'INSERT INTO batches (batch_id, num_chicks, breed, date_in, expected_out, mortality_rate) VALUES (?,?,?,?,?,?)',
                     (batch_id, data.get('num_chicks'), data.get('breed'), data.get('date_in'), data.get('expected_out'), data.get('mortality_rate'))
                 )
-                conn.commit()
-                conn.close()
-                QMessageBox.information(self, "Success", f"Batch '{batch_id}' added successfully.")
-                self.load_batches()
-                # Notify other modules that batches changed
-                try:
-                    data_manager.notify_batch_change()
-                except Exception:
-                    pass
-            except Exception as e:
-                QMessageBox.critical(self, "Database Error", f"Failed to add batch: {e}")
-                try:
-                    conn.close()
-                except:
-                    pass
+            data_manager.submit_write(
+                insert,
+                on_success=lambda _: self.on_write_succeeded("Success", f"Batch '{batch_id}' added successfully."),
+                on_error=lambda e: self.on_write_failed("add", e))
 
     def edit_batch(self):
-        row = self.table.currentRow()
+        row = self.table.currentIndex().row()
         if row == -1:
             QMessageBox.warning(self, "No Selection", "Please select a batch to edit.")
             return
-        batch = [self.table.item(row, col).text() for col in range(self.table.columnCount())]
+        batch = self.model.row_text(row)
         dialog = BatchDialog(self, batch=batch)
         # Allow editing batch_id here (override dialog default)
         try:
@@ -234,17 +218,12 @@ class BatchManagementWidget(QWidget):
             if not new_id:
                 QMessageBox.warning(self, "Validation Error", "Batch ID cannot be empty.")
                 return
-            try:
-                conn = get_connection()
-                c = conn.cursor()
+            def update(c):
                 # If ID changed, ensure new ID isn't already used
                 if new_id != old_id:
                     c.execute('SELECT 1 FROM batches WHERE batch_id=?', (new_id,))
                     if c.fetchone():
-                        QMessageBox.warning(self, "Duplicate Batch", f"Batch ID '{new_id}' already exists.")
-                        conn.close()
-                        return
-                # Begin update within a transaction
+                        raise ValueError(f"Batch ID '{new_id}' already exists.")
                 # Update batches table (may change primary key value)
                 c.execute(
                     'UPDATE batches SET batch_id=?, num_chicks=?, breed=?, date_in=?, expected_out=?, mortality_rate=? WHERE batch_id=?',
@@ -258,48 +237,26 @@ class BatchManagementWidget(QWidget):
                     except Exception:
                         # If table doesn't exist or another issue, skip but continue
                         pass
-                conn.commit()
-                conn.close()
-                QMessageBox.information(self, "Success", f"Batch '{old_id}' updated to '{new_id}' successfully.")
-                self.load_batches()
-                try:
-                    data_manager.notify_batch_change()
-                except Exception:
-                    pass
-            except Exception as e:
-                QMessageBox.critical(self, "Database Error", f"Failed to update batch: {e}")
-                try:
-                    conn.close()
-                except:
-                    pass
+            data_manager.submit_write(
+                update,
+                on_success=lambda _: self.on_write_succeeded("Success", f"Batch '{old_id}' updated to '{new_id}' successfully."),
+                on_error=lambda e: self.on_write_failed("update", e))
 
     def delete_batch(self):
-        row = self.table.currentRow()
+        row = self.table.currentIndex().row()
         if row == -1:
             QMessageBox.warning(self, "No Selection", "Please select a batch to delete.")
             return
-        batch_id = self.table.item(row, 0).text()
+        batch_id = self.model.row_text(row)[0]
         resp = QMessageBox.question(self, "Confirm Delete", f"Delete batch '{batch_id}'? This cannot be undone.")
         if resp != QMessageBox.StandardButton.Yes:
             return
-        try:
-            conn = get_connection()
-            c = conn.cursor()
+        def delete(c):
             c.execute('DELETE FROM batches WHERE batch_id=?', (batch_id,))
-            conn.commit()
-            conn.close()
-            QMessageBox.information(self, "Deleted", f"Batch '{batch_id}' deleted.")
-            self.load_batches()
-            try:
-                data_manager.notify_batch_change()
-            except Exception:
-                pass
-        except Exception as e:
-            QMessageBox.critical(self, "Database Error", f"Failed to delete batch: {e}")
-            try:
-                conn.close()
-            except:
-                pass
+        data_manager.submit_write(
+            delete,
+            on_success=lambda _: self.on_write_succeeded("Deleted", f"Batch '{batch_id}' deleted."),
+            on_error=lambda e: self.on_write_failed("delete", e))
 
     def export_csv(self):
         path, _ = QFileDialog.getSaveFileName(self, "Save CSV", "batches.csv", "CSV Files (*.csv)")
@@ -308,23 +265,20 @@ class BatchManagementWidget(QWidget):
         try:
             with open(path, 'w', newline='', encoding='utf-8') as f:
                 writer = csv.writer(f)
-                headers = [self.table.horizontalHeaderItem(i).text() for i in range(self.table.columnCount())]
-                writer.writerow(headers)
-                for r in range(self.table.rowCount()):
-                    row = [self.table.item(r, c).text() if self.table.item(r, c) else '' for c in range(self.table.columnCount())]
-                    writer.writerow(row)
+                writer.writerow(self.model.headers)
+                writer.writerows(self.model.iter_rows())
             QMessageBox.information(self, "Exported", f"Batches exported to {path}")
         except Exception as e:
             QMessageBox.critical(self, "Export Error", f"Failed to export CSV: {e}")
 
     def print_table(self):
         try:
-            # Build simple HTML table from current view
-            headers = [self.table.horizontalHeaderItem(i).text() for i in range(self.table.columnCount())]
+            # Build simple HTML table from the rows matching the current search
+            headers = self.model.headers
             html = '<html><head><meta charset="utf-8"></head><body><table border="1" cellspacing="0" cellpadding="4">'
             html += '<tr>' + ''.join([f'<th>{h}</th>' for h in headers]) + '</tr>'
-            for r in range(self.table.rowCount()):
-                html += '<tr>' + ''.join([f'<td>{(self.table.item(r, c).text() if self.table.item(r, c) else "")}</td>' for c in range(self.table.columnCount())]) + '</tr>'
+            for row in self.model.iter_rows():
+                html += '<tr>' + ''.join([f'<td>{value if value is not None else ""}</td>' for value in row]) + '</tr>'
             html += '</table></body></html>'
             doc = QTextDocument()
             doc.setHtml(html)
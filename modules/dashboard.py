@@ -2,11 +2,11 @@ from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QFrame, Q
 from PyQt6.QtCore import Qt, pyqtSignal
 from PyQt6.QtGui import QPixmap
 import pyqtgraph as pg
-import numpy as np
 import os
 import sys
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from database.init_db import get_connection
+from utils.data_manager import data_manager
+from utils.refresh_scheduler import RefreshScheduler
 
 CARD_ICONS = [
     'dashboard', 'feed', 'water', 'profit', 'loss'
@@ -25,21 +25,16 @@ class DashboardWidget(QWidget):
     
     def __init__(self):
         super().__init__()
+        self.card_values = {}
         self.init_ui()
+        # One refresh per burst of changes, deferred while another page is shown
+        self.refresher = RefreshScheduler(self, self.refresh_data)
+        self.refresher.watch(data_manager.tables_changed, data_manager.database_replaced)
+        self.refresh_data()
 
     def init_ui(self):
-        # Reuse existing layout if present to avoid adding multiple layouts to the same widget
-        existing = self.layout()
-        if existing is None:
-            main_layout = QVBoxLayout(self)
-        else:
-            main_layout = existing
-            # Clear any existing items/widgets from the layout
-            while main_layout.count():
-                item = main_layout.takeAt(0)
-                widget = item.widget()
-                if widget is not None:
-                    widget.deleteLater()
+        # Built once; refresh_data() only updates the value labels and plot items
+        main_layout = QVBoxLayout(self)
         # Dashboard title
         title = QLabel("<b style='font-size:28px;'>Dashboard Overview</b>")
         subtitle = QLabel("<span style='color:#888;font-size:15px;'>Farm performance at a glance</span>")
@@ -47,19 +42,19 @@ class DashboardWidget(QWidget):
         main_layout.addWidget(subtitle)
         main_layout.addSpacing(10)
         
-        # Summary cards
+        # Summary cards; values are filled in when the first load comes back
         card_layout = QHBoxLayout()
         card_layout.setSpacing(24)
-        data = self.get_summary_data()
         cards = [
-            ("Total Batches", str(data['batches']), 'dashboard', 1),  # Index 1 for Batches module
-            ("Feed Used (kg)", str(data['feed']), 'feed', 2),         # Index 2 for Feed/Water module
-            ("Water Used (L)", str(data['water']), 'water', 2),       # Index 2 for Feed/Water module
-            ("Profit (₹)", f"₹{data['profit']:.2f}", 'profit', 7),    # Index 7 for Profit/Loss module
-            ("Loss (₹)", f"₹{data['loss']:.2f}", 'loss', 6),          # Index 6 for Expenses module
+            ("Total Batches", 'batches', 'dashboard', 1),   # Index 1 for Batches module
+            ("Feed Used (kg)", 'feed', 'feed', 2),          # Index 2 for Feed/Water module
+            ("Water Used (L)", 'water', 'water', 2),        # Index 2 for Feed/Water module
+            ("Profit (₹)", 'profit', 'profit', 7),          # Index 7 for Profit/Loss module
+            ("Loss (₹)", 'loss', 'loss', 6),                # Index 6 for Expenses module
         ]
-        for title, value, icon, module_index in cards:
-            card = self.create_card(title, value, icon, module_index)
+        for title, key, icon, module_index in cards:
+            card = self.create_card(title, "…", icon, module_index)
+            self.card_values[key] = card.value_label
             card_layout.addWidget(card)
         main_layout.addLayout(card_layout)
         main_layout.addSpacing(18)
@@ -150,6 +145,7 @@ class DashboardWidget(QWidget):
         value_label = QLabel(value)
         value_label.setStyleSheet("font-size: 24px; font-weight: bold; color: #059669; margin-top: 8px;")
         layout.addWidget(value_label)
+        card.value_label = value_label
         
         # Click indicator
         click_label = QLabel("Click to view details →")
@@ -162,30 +158,33 @@ class DashboardWidget(QWidget):
         
         return card
 
-    def get_summary_data(self):
-        conn = get_connection()
-        c = conn.cursor()
-        c.execute('SELECT COUNT(*) FROM batches')
-        batches = c.fetchone()[0]
-        c.execute('SELECT SUM(quantity_kg) FROM feed_logs')
-        feed = c.fetchone()[0] or 0
-        c.execute('SELECT SUM(quantity_l) FROM water_logs')
-        water = c.fetchone()[0] or 0
-        c.execute('SELECT SUM(amount) FROM revenue')
-        revenue = c.fetchone()[0] or 0
-        c.execute('SELECT SUM(amount) FROM expenses')
-        expenses = c.fetchone()[0] or 0
-        c.execute('SELECT SUM(count) FROM mortality')
-        mortality = c.fetchone()[0] or 0
-        loss = expenses + (mortality * 5)
-        profit = revenue - loss
-        conn.close()
+    @staticmethod
+    def load_data(c):
+        """Read everything the dashboard shows (runs on the query pool)"""
+        # Card totals come from one statement so they describe the same snapshot
+        c.execute('''
+            SELECT (SELECT COUNT(*) FROM batches),
+                   (SELECT SUM(quantity_kg) FROM feed_logs),
+                   (SELECT SUM(quantity_l) FROM water_logs),
+                   (SELECT SUM(amount) FROM revenue),
+                   (SELECT SUM(amount) FROM expenses),
+                   (SELECT SUM(count) FROM mortality)
+        ''')
+        batches, feed, water, revenue, expenses, mortality = c.fetchone()
+        loss = (expenses or 0) + ((mortality or 0) * 5)
+        profit = (revenue or 0) - loss
+        c.execute('SELECT date, feed_kg, feed_rows, water_l, water_rows FROM daily_feed_water ORDER BY date')
+        feed_water = c.fetchall()
+        c.execute('SELECT month, revenue, expenses FROM monthly_financials ORDER BY month')
+        monthly = c.fetchall()
         return {
             'batches': batches,
-            'feed': feed,
-            'water': water,
+            'feed': feed or 0,
+            'water': water or 0,
             'profit': profit,
             'loss': loss,
+            'feed_water': feed_water,
+            'monthly': monthly,
         }
 
     def chart_card(self, chart, title):
@@ -204,82 +203,50 @@ class DashboardWidget(QWidget):
         plot = pg.PlotWidget(title="Feed/Water Usage Over Time")
         plot.setMouseEnabled(False, False)
         plot.hideButtons()
-        conn = get_connection()
-        c = conn.cursor()
-        c.execute('SELECT date, SUM(quantity_kg) FROM feed_logs GROUP BY date ORDER BY date')
-        feed_data = c.fetchall()
-        feed_dates = [row[0] for row in feed_data]
-        feed_vals = [row[1] for row in feed_data]
-        c.execute('SELECT date, SUM(quantity_l) FROM water_logs GROUP BY date ORDER BY date')
-        water_data = c.fetchall()
-        water_dates = [row[0] for row in water_data]
-        water_vals = [row[1] for row in water_data]
-        conn.close()
-        x_feed = list(range(len(feed_dates)))
-        x_water = list(range(len(water_dates)))
-        plot.plot(x_feed, feed_vals, pen=pg.mkPen('#3b82f6', width=2), name='Feed (kg)', symbol='o', symbolBrush='#3b82f6')
-        plot.plot(x_water, water_vals, pen=pg.mkPen('#10b981', width=2), name='Water (L)', symbol='x', symbolBrush='#10b981')
-        ticks = list(zip(x_feed, feed_dates))
-        if len(ticks) > 10:
-            step = 2 if len(ticks) < 20 else 3
-            ticks = [tick for idx, tick in enumerate(ticks) if idx % step == 0]
-        plot.getPlotItem().getAxis('bottom').setTicks([ticks])
         plot.getPlotItem().setLabels(left='Quantity', bottom='Date')
         plot.getPlotItem().addLegend()
+        self.feed_curve = plot.plot([], [], pen=pg.mkPen('#3b82f6', width=2), name='Feed (kg)', symbol='o', symbolBrush='#3b82f6')
+        self.water_curve = plot.plot([], [], pen=pg.mkPen('#10b981', width=2), name='Water (L)', symbol='x', symbolBrush='#10b981')
         plot.setBackground('w')
+        self.feed_water_plot = plot
         return plot
 
     def create_profit_loss_chart(self):
         plot = pg.PlotWidget(title="Profit/Loss Trend (₹)")
         plot.setMouseEnabled(False, False)
         plot.hideButtons()
-        conn = get_connection()
-        c = conn.cursor()
-        c.execute('SELECT strftime("%Y-%m", date) as month, SUM(amount) FROM revenue GROUP BY month ORDER BY month')
-        revenue_data = c.fetchall()
-        c.execute('SELECT strftime("%Y-%m", date) as month, SUM(amount) FROM expenses GROUP BY month ORDER BY month')
-        expenses_data = c.fetchall()
-        conn.close()
-        
-        if revenue_data or expenses_data:
-            # Create combined months set
-            all_months = set()
-            revenue_dict = {}
-            expenses_dict = {}
-            
-            for month, amount in revenue_data:
-                all_months.add(month)
-                revenue_dict[month] = amount
-            
-            for month, amount in expenses_data:
-                all_months.add(month)
-                expenses_dict[month] = amount
-            
-            months = sorted(list(all_months))
-            x = list(range(len(months)))
-            revenue_vals = [revenue_dict.get(month, 0) for month in months]
-            expenses_vals = [expenses_dict.get(month, 0) for month in months]
-            profit_vals = [rev - exp for rev, exp in zip(revenue_vals, expenses_vals)]
-            
-            plot.plot(x, profit_vals, pen=pg.mkPen('#059669', width=3), name='Net Profit', symbol='o', symbolBrush='#059669')
-            
-            ticks = list(zip(x, months))
-            plot.getPlotItem().getAxis('bottom').setTicks([ticks])
-            plot.getPlotItem().setLabels(left='Profit (₹)', bottom='Month')
-            plot.getPlotItem().addLegend()
-        
+        plot.getPlotItem().setLabels(left='Profit (₹)', bottom='Month')
+        plot.getPlotItem().addLegend()
+        self.profit_curve = plot.plot([], [], pen=pg.mkPen('#059669', width=3), name='Net Profit', symbol='o', symbolBrush='#059669')
         plot.setBackground('w')
-        return plot 
+        self.profit_plot = plot
+        return plot
 
     def refresh_data(self):
         """Refresh dashboard data"""
-        # Clear existing layout
-        layout = self.layout()
-        if layout:
-            while layout.count():
-                item = layout.takeAt(0)
-                widget = item.widget()
-                if widget is not None:
-                    widget.deleteLater()
-        # Reinitialize UI with fresh data
-        self.init_ui() 
\ No newline at end of file
+        data_manager.submit_query(self.load_data, key='dashboard', on_result=self.show_data)
+
+    def show_data(self, data):
+        """Update the cards and plot items in place from a load_data() snapshot"""
+        self.card_values['batches'].setText(str(data['batches']))
+        self.card_values['feed'].setText(str(data['feed']))
+        self.card_values['water'].setText(str(data['water']))
+        self.card_values['profit'].setText(f"₹{data['profit']:.2f}")
+        self.card_values['loss'].setText(f"₹{data['loss']:.2f}")
+        
+        rows = data['feed_water']
+        feed_data = [(day, feed) for day, feed, feed_rows, _, _ in rows if feed_rows > 0]
+        water_vals = [water for _, _, _, water, water_rows in rows if water_rows > 0]
+        feed_dates = [row[0] for row in feed_data]
+        self.feed_curve.setData(list(range(len(feed_data))), [row[1] for row in feed_data])
+        self.water_curve.setData(list(range(len(water_vals))), water_vals)
+        ticks = list(enumerate(feed_dates))
+        if len(ticks) > 10:
+            step = 2 if len(ticks) < 20 else 3
+            ticks = [tick for idx, tick in enumerate(ticks) if idx % step == 0]
+        self.feed_water_plot.getPlotItem().getAxis('bottom').setTicks([ticks])
+        
+        monthly_data = data['monthly']
+        months = [row[0] for row in monthly_data]
+        self.profit_curve.setData(list(range(len(months))), [rev - exp for _, rev, exp in monthly_data])
+        self.profit_plot.getPlotItem().getAxis('bottom').setTicks([list(enumerate(months))])
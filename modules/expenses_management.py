@@ -1,13 +1,15 @@
-from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QTableWidget, QTableWidgetItem, 
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QTableView,
                              QMessageBox, QLabel, QComboBox, QDialog, QFormLayout, QDateEdit, QDialogButtonBox, 
                              QLineEdit, QFileDialog, QAbstractItemView, QHeaderView, QTextEdit, QDoubleSpinBox)
 from PyQt6.QtCore import Qt, QDate
+from PyQt6.QtGui import QColor
 import csv
 import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from database.init_db import get_connection
 from utils.data_manager import data_manager
+from utils.sql_table_model import SqlTableModel, debounce_search
+from utils.refresh_scheduler import RefreshScheduler
 
 class ExpenseDialog(QDialog):
     def __init__(self, parent=None, expense=None):
@@ -62,8 +64,9 @@ class ExpenseDialog(QDialog):
 class ExpensesManagementWidget(QWidget):
     def __init__(self):
         super().__init__()
-        self.all_rows = []  # Store all rows for filtering
         self.init_ui()
+        self.refresher = RefreshScheduler(self, self.load_expenses)
+        self.refresher.watch(data_manager.database_replaced)
         self.load_expenses()
 
     def init_ui(self):
@@ -77,7 +80,7 @@ class ExpensesManagementWidget(QWidget):
         filter_layout.addWidget(QLabel("Search:"))
         self.search_input = QLineEdit()
         self.search_input.setPlaceholderText("Search by description, category, etc...")
-        self.search_input.textChanged.connect(self.filter_table)
+        self.search_timer = debounce_search(self.search_input, self.filter_table)
         filter_layout.addWidget(self.search_input)
         
         filter_layout.addWidget(QLabel("Category:"))
@@ -117,12 +120,18 @@ class ExpensesManagementWidget(QWidget):
         layout.addLayout(stats_layout)
         
         # Table
-        self.table = QTableWidget()
-        self.table.setColumnCount(5)
-        self.table.setHorizontalHeaderLabels(["Date", "Category", "Amount (₹)", "Description", "Payment Method"])
-        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
-        self.table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
-        self.table.setSelectionMode(QTableWidget.SelectionMode.SingleSelection)
+        self.model = SqlTableModel(
+            'expenses', ['date', 'category', 'amount', 'description', 'payment_method'],
+            ["Date", "Category", "Amount (₹)", "Description", "Payment Method"],
+            order_by=['date', 'rowid'], descending=True,
+            full_text=True, parent=self)
+        self.model.background = self.cell_background
+        self.model.loaded.connect(self.load_stats)
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setEditTriggers(QTableView.EditTrigger.NoEditTriggers)
+        self.table.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
+        self.table.setSelectionMode(QTableView.SelectionMode.SingleSelection)
         self.table.verticalHeader().setVisible(False)
         self.table.setAlternatingRowColors(True)
         self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
@@ -150,48 +159,43 @@ class ExpensesManagementWidget(QWidget):
         layout.addLayout(btn_layout)
 
     def load_expenses(self):
-        conn = get_connection()
-        c = conn.cursor()
-        c.execute('SELECT date, category, amount, description, payment_method FROM expenses ORDER BY date DESC')
-        rows = c.fetchall()
-        self.all_rows = rows
-        self.populate_table(rows)
-        self.update_stats(rows)
-        conn.close()
+        self.model.reload()
 
-    def populate_table(self, rows):
-        self.table.setRowCount(len(rows))
-        for row_idx, row in enumerate(rows):
-            for col_idx, value in enumerate(row):
-                item = QTableWidgetItem(str(value) if value is not None else "")
-                if col_idx == 2:  # Amount column - make it stand out
-                    item.setBackground(Qt.GlobalColor.lightGray)
-                elif col_idx == 1:  # Category column - color code
-                    if value == "Feed":
-                        item.setBackground(Qt.GlobalColor.green)
-                    elif value == "Medicine":
-                        item.setBackground(Qt.GlobalColor.red)
-                    elif value == "Electricity":
-                        item.setBackground(Qt.GlobalColor.yellow)
-                    elif value == "Labor":
-                        item.setBackground(Qt.GlobalColor.blue)
-                self.table.setItem(row_idx, col_idx, item)
+    def cell_background(self, column, value):
+        if column == 2:  # Amount column - make it stand out
+            return QColor(Qt.GlobalColor.lightGray)
+        if column == 1:  # Category column - color code
+            if value == "Feed":
+                return QColor(Qt.GlobalColor.green)
+            elif value == "Medicine":
+                return QColor(Qt.GlobalColor.red)
+            elif value == "Electricity":
+                return QColor(Qt.GlobalColor.yellow)
+            elif value == "Labor":
+                return QColor(Qt.GlobalColor.blue)
+        return None
 
-    def update_stats(self, rows):
-        if not rows:
+    def load_stats(self):
+        where, params = self.model.where()
+        # Calculate monthly expenses alongside the totals
+        current_month = QDate.currentDate().toString('yyyy-MM')
+        def query(c):
+            c.execute(f'''SELECT SUM(amount), COUNT(*), SUM(CASE WHEN substr(date, 1, 7) = ? THEN amount END)
+                         FROM expenses WHERE {where}''', [current_month] + params)
+            return c.fetchone()
+        data_manager.submit_query(query, key='expenses_stats', on_result=lambda row: self.update_stats(*row))
+
+    def update_stats(self, total_expenses, total_records, monthly_expenses):
+        if not total_records:
             self.total_expenses_label.setText("Total Expenses: ₹0")
             self.monthly_expenses_label.setText("This Month: ₹0")
             self.avg_expense_label.setText("Avg per Record: ₹0")
             self.total_records_label.setText("Total Records: 0")
             return
         
-        total_expenses = sum(row[2] for row in rows if row[2] is not None)
-        total_records = len(rows)
-        avg_expense = total_expenses / total_records if total_records > 0 else 0
-        
-        # Calculate monthly expenses
-        current_month = QDate.currentDate().toString('yyyy-MM')
-        monthly_expenses = sum(row[2] for row in rows if row[2] is not None and row[0].startswith(current_month))
+        total_expenses = total_expenses or 0
+        monthly_expenses = monthly_expenses or 0
+        avg_expense = total_expenses / total_records
         
         self.total_expenses_label.setText(f"Total Expenses: ₹{total_expenses:,.2f}")
         self.monthly_expenses_label.setText(f"This Month: ₹{monthly_expenses:,.2f}")
@@ -199,24 +203,27 @@ class ExpensesManagementWidget(QWidget):
         self.total_records_label.setText(f"Total Records: {total_records}")
 
     def filter_table(self):
-        text = self.search_input.text().lower()
         category_filter = self.category_filter.currentText()
         payment_filter = self.payment_filter.currentText()
         
-        filtered = []
-        for row in self.all_rows:
-            # Text search
-            text_match = not text or any(text in str(cell).lower() for cell in row)
-            # Category filter
-            category_match = category_filter == "All" or row[1] == category_filter
-            # Payment method filter
-            payment_match = payment_filter == "All" or row[4] == payment_filter
-            
-            if text_match and category_match and payment_match:
-                filtered.append(row)
-        
-        self.populate_table(filtered)
-        self.update_stats(filtered)
+        self.model.set_search(self.search_input.text())
+        if category_filter == "All":
+            self.model.set_filter('category')
+        else:
+            self.model.set_filter('category', 'category = ?', [category_filter])
+        if payment_filter == "All":
+            self.model.set_filter('payment')
+        else:
+            self.model.set_filter('payment', 'payment_method = ?', [payment_filter])
+        self.model.reload()
+
+    def on_write_succeeded(self, message):
+        QMessageBox.information(self, "Success", message)
+        self.load_expenses()
+        try:
+            data_manager.notify_expense_change()
+        except Exception:
+            pass
 
     def add_expense(self):
         dialog = ExpenseDialog(self)
@@ -225,81 +232,54 @@ class ExpensesManagementWidget(QWidget):
             if data['amount'] <= 0:
                 QMessageBox.warning(self, "Validation Error", "Amount must be greater than 0.")
                 return
-            conn = get_connection()
-            c = conn.cursor()
-            try:
+            def insert(c):
                 c.execute('''INSERT INTO expenses (date, category, amount, description, payment_method) 
                              VALUES (?, ?, ?, ?, ?)''',
                     (data['date'], data['category'], data['amount'], data['description'], data['payment_method']))
-                conn.commit()
-                QMessageBox.information(self, "Success", "Expense added successfully.")
-                self.load_expenses()
-                try:
-                    data_manager.notify_expense_change()
-                except Exception:
-                    pass
-            except Exception as e:
-                QMessageBox.critical(self, "Error", f"Failed to add expense: {e}")
-            finally:
-                conn.close()
+            data_manager.submit_write(
+                insert,
+                on_success=lambda _: self.on_write_succeeded("Expense added successfully."),
+                on_error=lambda e: QMessageBox.critical(self, "Error", f"Failed to add expense: {e}"))
 
     def edit_expense(self):
-        row = self.table.currentRow()
+        row = self.table.currentIndex().row()
         if row < 0:
             QMessageBox.warning(self, "Select Expense", "Please select an expense to edit.")
             return
-        expense = [self.table.item(row, i).text() for i in range(5)]
+        expense = self.model.row_text(row)
         dialog = ExpenseDialog(self, expense=expense)
         if dialog.exec() == QDialog.DialogCode.Accepted:
             data = dialog.get_data()
-            conn = get_connection()
-            c = conn.cursor()
-            try:
+            def update(c):
                 c.execute('''UPDATE expenses SET category=?, amount=?, description=?, payment_method=? 
                              WHERE date=? AND category=? AND amount=? AND description=? AND payment_method=?''',
                     (data['category'], data['amount'], data['description'], data['payment_method'],
                      expense[0], expense[1], expense[2], expense[3], expense[4]))
-                conn.commit()
-                QMessageBox.information(self, "Success", "Expense updated successfully.")
-                self.load_expenses()
-                try:
-                    data_manager.notify_expense_change()
-                except Exception:
-                    pass
-            except Exception as e:
-                QMessageBox.critical(self, "Error", f"Failed to update expense: {e}")
-            finally:
-                conn.close()
+            data_manager.submit_write(
+                update,
+                on_success=lambda _: self.on_write_succeeded("Expense updated successfully."),
+                on_error=lambda e: QMessageBox.critical(self, "Error", f"Failed to update expense: {e}"))
 
     def delete_expense(self):
-        row = self.table.currentRow()
+        row = self.table.currentIndex().row()
         if row < 0:
             QMessageBox.warning(self, "Select Expense", "Please select an expense to delete.")
             return
-        expense = [self.table.item(row, i).text() for i in range(5)]
+        expense = self.model.row_text(row)
         reply = QMessageBox.question(self, "Confirm Delete", 
                                    f"Are you sure you want to delete this expense?\n\nDate: {expense[0]}\nCategory: {expense[1]}\nAmount: ₹{expense[2]}\nDescription: {expense[3]}",
                                    QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
         if reply == QMessageBox.StandardButton.Yes:
-            conn = get_connection()
-            c = conn.cursor()
-            try:
+            def delete(c):
                 c.execute('DELETE FROM expenses WHERE date=? AND category=? AND amount=? AND description=? AND payment_method=?',
                     (expense[0], expense[1], expense[2], expense[3], expense[4]))
-                conn.commit()
-                QMessageBox.information(self, "Success", "Expense deleted successfully.")
-                self.load_expenses()
-                try:
-                    data_manager.notify_expense_change()
-                except Exception:
-                    pass
-            except Exception as e:
-                QMessageBox.critical(self, "Error", f"Failed to delete expense: {e}")
-            finally:
-                conn.close()
+            data_manager.submit_write(
+                delete,
+                on_success=lambda _: self.on_write_succeeded("Expense deleted successfully."),
+                on_error=lambda e: QMessageBox.critical(self, "Error", f"Failed to delete expense: {e}"))
 
     def export_csv(self):
-        if not self.all_rows:
+        if not self.model.rowCount():
             QMessageBox.warning(self, "No Data", "No expenses to export.")
             return
         filename, _ = QFileDialog.getSaveFileName(self, "Export Expenses", "", "CSV Files (*.csv)")
@@ -308,7 +288,7 @@ class ExpensesManagementWidget(QWidget):
                 with open(filename, 'w', newline='', encoding='utf-8') as file:
                     writer = csv.writer(file)
                     writer.writerow(["Date", "Category", "Amount (₹)", "Description", "Payment Method"])
-                    writer.writerows(self.all_rows)
+                    writer.writerows(self.model.iter_rows())
                 QMessageBox.information(self, "Success", f"Expenses exported to {filename}")
             except Exception as e:
                 QMessageBox.critical(self, "Error", f"Failed to export: {e}") 
\ No newline at end of file
@@ -1,22 +1,214 @@
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QTableWidget, QTableWidgetItem, 
                              QMessageBox, QLabel, QComboBox, QFrame, QGridLayout, QFileDialog, QProgressBar)
-from PyQt6.QtCore import Qt, QThread, pyqtSignal
+from PyQt6.QtCore import Qt, QSettings, QThread, pyqtSignal
 import csv
 import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from database.init_db import get_connection
+from database.init_db import open_connection, read_snapshot
+from database import changes
+
+# Tables in an "All Data" export, in export order
+ALL_TABLES = ['batches', 'feed_logs', 'water_logs', 'vaccinations', 'mortality', 'workers', 'expenses', 'revenue']
+
+# Single-table exports: export type -> (table, columns, headers)
+TABLE_MAP = {
+    "Batches": ("batches", ["batch_id", "num_chicks", "breed", "date_in", "expected_out", "mortality_rate"],
+                ["Batch ID", "Num Chicks", "Breed", "Date In", "Expected Out", "Mortality Rate"]),
+    "Feed/Water Logs": ("feed_logs", ["batch_id", "date", "quantity_kg"], ["Batch ID", "Date", "Quantity (kg)"]),
+    "Vaccinations": ("vaccinations", ["batch_id", "date", "vaccine", "status"], ["Batch ID", "Date", "Vaccine", "Status"]),
+    "Mortality": ("mortality", ["batch_id", "date", "count", "reason"], ["Batch ID", "Date", "Count", "Reason"]),
+    "Workers": ("workers", ["worker_id", "name", "role", "phone", "email", "address", "salary", "hire_date", "status"],
+                ["Worker ID", "Name", "Role", "Phone", "Email", "Address", "Salary", "Hire Date", "Status"]),
+    "Expenses": ("expenses", ["date", "category", "amount", "description", "payment_method"],
+                 ["Date", "Category", "Amount", "Description", "Payment Method"]),
+    "Revenue": ("revenue", ["date", "batch_id", "amount"], ["Date", "Batch ID", "Amount"]),
+}
+
+# Rows per PDF table: about one A4 page, so no table needs splitting across many pages
+PDF_CHUNK_ROWS = 40
+
+# Rows per record batch / Parquet row group in the columnar formats
+COLUMNAR_CHUNK_ROWS = 65536
+
+# TEXT columns holding ISO dates; written as date32 in the columnar formats
+DATE_COLUMNS = {'date', 'date_in', 'expected_out', 'hire_date'}
+
+# Format entry for delta exports: CSV of the rows changed since the last export
+CHANGES_FORMAT = "Changes since last export"
+
+class ExportCancelled(Exception):
+    pass
+
+def _have_pypdf():
+    try:
+        import pypdf  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+class _StreamingStory(list):
+    """Flowable list for doc.build() that is refilled from a generator as it is consumed.
+
+    reportlab only ever looks at the head of the story, so keeping a couple of
+    flowables queued lets a document of any length build in bounded memory.
+    """
+
+    def __init__(self, flowables, lookahead=2):
+        super().__init__()
+        self._source = iter(flowables)
+        self._lookahead = lookahead
+
+    def __len__(self):
+        while list.__len__(self) < self._lookahead:
+            flowable = next(self._source, None)
+            if flowable is None:
+                break
+            self.append(flowable)
+        return list.__len__(self)
+
+def _column_widths(headers, rows, total_width):
+    """Split total_width between columns in proportion to the header and sample text lengths"""
+    lengths = [
+        max([len(str(header))] + [len(str(row[col])) for row in rows if row[col] is not None])
+        for col, header in enumerate(headers)
+    ]
+    # Keep narrow columns readable and stop long text from starving the rest
+    lengths = [min(max(length, 4), 40) for length in lengths]
+    return [total_width * length / sum(lengths) for length in lengths]
+
+def build_pdf(filename, sections, read_chunks, title=True, headings=True):
+    """Build a PDF of sections, one page-sized LongTable per chunk from read_chunks(table, columns)"""
+    from reportlab.lib.pagesizes import A4
+    from reportlab.platypus import SimpleDocTemplate, LongTable, TableStyle, Paragraph, Spacer
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib import colors
+    
+    doc = SimpleDocTemplate(filename, pagesize=A4)
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=16,
+        spaceAfter=30,
+        alignment=1  # Center alignment
+    )
+    # One style shared by every chunk; ranges are relative, so it fits any size
+    table_style = TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 12),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ])
+    
+    def story():
+        if title:
+            yield Paragraph("Dash Poultry - Data Export", title_style)
+            yield Spacer(1, 20)
+        for section_title, table, columns, headers in sections:
+            if headings:
+                yield Paragraph(section_title, styles['Heading2'])
+            widths = None
+            for rows in read_chunks(table, columns):
+                if widths is None:
+                    widths = _column_widths(headers, rows, doc.width)
+                # repeatRows keeps the header on every page a chunk spills onto
+                yield LongTable([headers] + [list(row) for row in rows], colWidths=widths,
+                                repeatRows=1, style=table_style)
+            yield Spacer(1, 20)
+    
+    doc.build(_StreamingStory(story()))
+
+def arrow_schema(c, table, columns):
+    """Arrow schema for the columns, mapped from the table's declared SQLite types"""
+    import pyarrow as pa
+    c.execute(f'PRAGMA table_info({table})')
+    declared = {row[1]: (row[2] or '').upper() for row in c.fetchall()}
+    fields = []
+    for column in columns:
+        decl = declared.get(column, '')
+        if column in DATE_COLUMNS:
+            arrow_type = pa.date32()
+        elif 'INT' in decl:
+            # Row ids can grow past 32 bits; counts, quantities of chicks etc. cannot
+            arrow_type = pa.int64() if column == 'id' else pa.int32()
+        elif any(name in decl for name in ('REAL', 'FLOA', 'DOUB')):
+            arrow_type = pa.float64()
+        else:
+            arrow_type = pa.string()
+        fields.append(pa.field(column, arrow_type))
+    return pa.schema(fields)
+
+def arrow_batch(schema, rows):
+    """Convert a chunk of cursor rows to a RecordBatch of the schema"""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    arrays = []
+    for field, values in zip(schema, zip(*rows)):
+        if pa.types.is_date32(field.type):
+            text = pa.array(values, pa.string())
+            # Malformed dates become nulls rather than failing the export
+            arrays.append(pc.strptime(text, format='%Y-%m-%d', unit='s', error_is_null=True).cast(pa.date32()))
+        elif pa.types.is_string(field.type):
+            # SQLite does not enforce column types, so a TEXT column may hold numbers
+            arrays.append(pa.array([v if v is None or isinstance(v, str) else str(v) for v in values], field.type))
+        else:
+            arrays.append(pa.array(values, field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+def render_pdf_part(db_path, filename, sections, title, progress=None, cancel=None):
+    """Process-pool entry point: build one part of a concurrent PDF export on its own connection.
+
+    Reports rows rendered to the progress queue after each chunk and stops
+    between chunks once cancel is set, as export_bundle.export_table_csv does.
+    """
+    conn = open_connection(db_path, read_only=True)
+    try:
+        c = conn.cursor()
+        def read_chunks(table, columns):
+            c.execute(f"SELECT {', '.join(columns)} FROM {table}")
+            while True:
+                if cancel is not None and cancel.is_set():
+                    raise ExportCancelled()
+                rows = c.fetchmany(PDF_CHUNK_ROWS)
+                if not rows:
+                    break
+                yield rows
+                if progress is not None:
+                    progress.put(len(rows))
+        build_pdf(filename, sections, read_chunks, title=title)
+    finally:
+        conn.close()
 
 class ExportWorker(QThread):
     progress = pyqtSignal(int)
     finished = pyqtSignal(str)
     error = pyqtSignal(str)
+    cancelled = pyqtSignal(str)
+    
+    # Rows read from the cursor and written at a time
+    chunk_size = 1000
+    # Render "All Data" PDF sections in parallel processes, then merge them (needs
+    # pypdf and more than one CPU); the export page sets it from the settings
+    concurrent_pdf = False
+    # Worker processes for bundle and concurrent PDF exports; None uses every CPU
+    max_processes = None
     
-    def __init__(self, export_type, format_type, filename):
+    def __init__(self, export_type, format_type, filename, destination=None):
         super().__init__()
         self.export_type = export_type
         self.format_type = format_type
         self.filename = filename
+        # Where delta exports keep their watermark; defaults to the output folder
+        self.destination = destination or os.path.dirname(os.path.abspath(filename))
+        # Every file this export writes (several for columnar "All Data")
+        self.output_paths = [filename]
+        self.rows_total = 0
+        self.rows_done = 0
     
     def run(self):
         try:
@@ -26,217 +218,391 @@ class ExportWorker(QThread):
                 self.export_pdf()
             elif self.format_type == "Excel":
                 self.export_excel()
-            self.finished.emit(f"Export completed: {self.filename}")
+            elif self.format_type in ("Parquet", "Arrow"):
+                self.export_columnar()
+            elif self.format_type == "Bundle":
+                self.export_bundle()
+            elif self.format_type == CHANGES_FORMAT:
+                self.export_changes()
+            if len(self.output_paths) == 1:
+                self.finished.emit(f"Export completed: {self.filename}")
+            else:
+                self.finished.emit(f"Export completed: {len(self.output_paths)} files in "
+                                   f"{os.path.dirname(self.filename) or '.'}")
+        except ExportCancelled:
+            # Don't leave half-written files behind
+            for path in self.output_paths:
+                if os.path.exists(path):
+                    os.remove(path)
+            self.cancelled.emit("Export cancelled")
         except Exception as e:
             self.error.emit(f"Export failed: {str(e)}")
     
-    def export_csv(self):
-        conn = get_connection()
-        c = conn.cursor()
-        
+    def cancel(self):
+        """Stop the export before its next chunk"""
+        self.requestInterruption()
+    
+    def process_count(self, jobs):
+        return max(1, min(jobs, self.max_processes or os.cpu_count() or 1))
+    
+    def sections(self, c):
+        """(title, table, columns, headers) for each table in this export"""
         if self.export_type == "All Data":
-            # Export all tables
-            tables = ['batches', 'feed_logs', 'water_logs', 'vaccinations', 'mortality', 'workers', 'expenses', 'revenue']
+            sections = []
+            for table in ALL_TABLES:
+                c.execute(f'PRAGMA table_info({table})')
+                columns = [col[1] for col in c.fetchall()]
+                sections.append((table.upper(), table, columns, columns))
+            return sections
+        table, columns, headers = TABLE_MAP[self.export_type]
+        return [(self.export_type, table, columns, headers)]
+    
+    def count_rows(self, c, sections):
+        """Total the rows to export, so progress can be reported per row; returns {table: rows}"""
+        self.rows_total = 0
+        self.rows_done = 0
+        counts = {}
+        for _, table, _, _ in sections:
+            c.execute(f'SELECT COUNT(*) FROM {table}')
+            counts[table] = c.fetchone()[0]
+            self.rows_total += counts[table]
+        return counts
+    
+    def stream_rows(self, c, table, columns, size=None):
+        """Yield the table's rows in chunks of size (default chunk_size), checking for cancellation between them"""
+        return self.stream_query(c, f"SELECT {', '.join(columns)} FROM {table}", (), size)
+    
+    def stream_query(self, c, sql, params=(), size=None):
+        """Yield the query's rows in chunks of size (default chunk_size), checking for cancellation between them"""
+        c.execute(sql, params)
+        while True:
+            if self.isInterruptionRequested():
+                raise ExportCancelled()
+            rows = c.fetchmany(size or self.chunk_size)
+            if not rows:
+                break
+            yield rows
+    
+    def advance(self, rows):
+        """Count rows as written and report progress"""
+        before = self.rows_done * 100 // self.rows_total if self.rows_total else 0
+        self.rows_done += rows
+        after = self.rows_done * 100 // self.rows_total if self.rows_total else 100
+        if after != before:
+            self.progress.emit(after)
+    
+    def export_csv(self):
+        with read_snapshot() as conn:
+            c = conn.cursor()
+            sections = self.sections(c)
+            self.count_rows(c, sections)
             with open(self.filename, 'w', newline='', encoding='utf-8') as file:
-                for i, table in enumerate(tables):
-                    c.execute(f'SELECT * FROM {table}')
-                    rows = c.fetchall()
-                    if rows:
-                        # Get column names
-                        c.execute(f'PRAGMA table_info({table})')
-                        columns = [col[1] for col in c.fetchall()]
-                        
-                        writer = csv.writer(file)
-                        writer.writerow([f'=== {table.upper()} ==='])
-                        writer.writerow(columns)
+                writer = csv.writer(file)
+                for title, table, columns, headers in sections:
+                    chunks = self.stream_rows(c, table, columns)
+                    if self.export_type == "All Data":
+                        # Empty tables are left out of the combined file
+                        first = next(chunks, None)
+                        if first is None:
+                            continue
+                        writer.writerow([f'=== {title} ==='])
+                        writer.writerow(headers)
+                        writer.writerows(first)
+                        self.advance(len(first))
+                    else:
+                        writer.writerow(headers)
+                    for rows in chunks:
                         writer.writerows(rows)
+                        self.advance(len(rows))
+                    if self.export_type == "All Data":
                         writer.writerow([])  # Empty row between tables
-                    
-                    self.progress.emit((i + 1) * 100 // len(tables))
-        
-        else:
-            # Export specific table
-            table_map = {
-                "Batches": ("batches", ["Batch ID", "Num Chicks", "Breed", "Date In", "Expected Out", "Mortality Rate"]),
-                "Feed/Water Logs": ("feed_logs", ["Batch ID", "Date", "Quantity (kg)"]),
-                "Vaccinations": ("vaccinations", ["Batch ID", "Date", "Vaccine", "Status"]),
-                "Mortality": ("mortality", ["Batch ID", "Date", "Count", "Reason"]),
-                "Workers": ("workers", ["Worker ID", "Name", "Role", "Phone", "Email", "Address", "Salary", "Hire Date", "Status"]),
-                "Expenses": ("expenses", ["Date", "Category", "Amount", "Description", "Payment Method"]),
-                "Revenue": ("revenue", ["Date", "Batch ID", "Amount"])
-            }
-            
-            table_name, headers = table_map[self.export_type]
-            c.execute(f'SELECT * FROM {table_name}')
-            rows = c.fetchall()
-            
-            with open(self.filename, 'w', newline='', encoding='utf-8') as file:
-                writer = csv.writer(file)
-                writer.writerow(headers)
-                writer.writerows(rows)
-        
-        conn.close()
+            self.progress.emit(100)
     
     def export_pdf(self):
         try:
-            from reportlab.lib.pagesizes import letter, A4
-            from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-            from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-            from reportlab.lib import colors
-            from reportlab.lib.units import inch
-            
-            doc = SimpleDocTemplate(self.filename, pagesize=A4)
-            story = []
-            styles = getSampleStyleSheet()
-            
-            # Title
-            title_style = ParagraphStyle(
-                'CustomTitle',
-                parent=styles['Heading1'],
-                fontSize=16,
-                spaceAfter=30,
-                alignment=1  # Center alignment
-            )
-            story.append(Paragraph("Dash Poultry - Data Export", title_style))
-            story.append(Spacer(1, 20))
-            
-            conn = get_connection()
-            c = conn.cursor()
-            
-            if self.export_type == "All Data":
-                tables = ['batches', 'feed_logs', 'water_logs', 'vaccinations', 'mortality', 'workers', 'expenses', 'revenue']
-                for table in tables:
-                    c.execute(f'SELECT * FROM {table}')
-                    rows = c.fetchall()
-                    if rows:
-                        # Get column names
-                        c.execute(f'PRAGMA table_info({table})')
-                        columns = [col[1] for col in c.fetchall()]
-                        
-                        # Create table
-                        data = [columns] + [list(row) for row in rows]
-                        table_obj = Table(data)
-                        table_obj.setStyle(TableStyle([
-                            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                            ('FONTSIZE', (0, 0), (-1, 0), 12),
-                            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-                        ]))
-                        
-                        story.append(Paragraph(f"{table.upper()}", styles['Heading2']))
-                        story.append(table_obj)
-                        story.append(Spacer(1, 20))
-            else:
-                # Export specific table
-                table_map = {
-                    "Batches": ("batches", ["Batch ID", "Num Chicks", "Breed", "Date In", "Expected Out", "Mortality Rate"]),
-                    "Feed/Water Logs": ("feed_logs", ["Batch ID", "Date", "Quantity (kg)"]),
-                    "Vaccinations": ("vaccinations", ["Batch ID", "Date", "Vaccine", "Status"]),
-                    "Mortality": ("mortality", ["Batch ID", "Date", "Count", "Reason"]),
-                    "Workers": ("workers", ["Worker ID", "Name", "Role", "Phone", "Email", "Address", "Salary", "Hire Date", "Status"]),
-                    "Expenses": ("expenses", ["Date", "Category", "Amount", "Description", "Payment Method"]),
-                    "Revenue": ("revenue", ["Date", "Batch ID", "Amount"])
-                }
-                
-                table_name, headers = table_map[self.export_type]
-                c.execute(f'SELECT * FROM {table_name}')
-                rows = c.fetchall()
-                
-                data = [headers] + [list(row) for row in rows]
-                table_obj = Table(data)
-                table_obj.setStyle(TableStyle([
-                    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                    ('FONTSIZE', (0, 0), (-1, 0), 12),
-                    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                    ('GRID', (0, 0), (-1, -1), 1, colors.black)
-                ]))
-                
-                story.append(table_obj)
-            
-            conn.close()
-            doc.build(story)
-            
+            import reportlab  # noqa: F401
         except ImportError:
             raise Exception("PDF export requires reportlab library. Install with: pip install reportlab")
+        
+        with read_snapshot() as conn:
+            c = conn.cursor()
+            sections = self.sections(c)
+            counts = self.count_rows(c, sections)
+            headings = self.export_type == "All Data"
+            if headings:
+                # Empty tables are left out, as in the CSV export
+                sections = [section for section in sections if counts[section[1]]]
+            if self.concurrent_pdf and len(sections) > 1 and (os.cpu_count() or 1) > 1 and _have_pypdf():
+                self.export_pdf_concurrent(sections)
+            else:
+                def read_chunks(table, columns):
+                    for rows in self.stream_rows(c, table, columns, PDF_CHUNK_ROWS):
+                        yield rows
+                        self.advance(len(rows))
+                build_pdf(self.filename, sections, read_chunks, headings=headings)
+            self.progress.emit(100)
     
-    def export_excel(self):
+    def export_pdf_concurrent(self, sections):
+        """Render each section to its own PDF in a process pool, then concatenate them"""
+        from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+        import multiprocessing
+        import queue
+        import tempfile
+        from pypdf import PdfWriter
+        
+        from utils.export_bundle import snapshot_database
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            # The parts read a backup snapshot, so they agree with each other
+            snapshot = os.path.join(tmp, 'snapshot.db')
+            snapshot_database(snapshot)
+            parts = [os.path.join(tmp, f'part{i}.pdf') for i in range(len(sections))]
+            # Spawned, not forked: forking a process that runs Qt threads is unsafe
+            context = multiprocessing.get_context('spawn')
+            with context.Manager() as manager:
+                progress, cancel = manager.Queue(), manager.Event()
+                with ProcessPoolExecutor(max_workers=self.process_count(len(sections)), mp_context=context) as pool:
+                    pending = {
+                        pool.submit(render_pdf_part, snapshot, part, [section], i == 0, progress, cancel)
+                        for i, (part, section) in enumerate(zip(parts, sections))
+                    }
+                    while pending:
+                        done, pending = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+                        while True:
+                            try:
+                                rows = progress.get_nowait()
+                            except queue.Empty:
+                                break
+                            self.advance(rows)
+                        if self.isInterruptionRequested():
+                            # Running parts stop at their next chunk; queued ones never start
+                            cancel.set()
+                            pool.shutdown(cancel_futures=True)
+                            raise ExportCancelled()
+                        for future in done:
+                            future.result()
+            writer = PdfWriter()
+            for part in parts:
+                writer.append(part)
+            with open(self.filename, 'wb') as file:
+                writer.write(file)
+    
+    def export_excel(self, infer_widths=True):
+        """Write each section to its own sheet of a write-only (streamed) workbook.
+
+        Rows go straight from the cursor to the sheet's temporary XML file, so
+        memory does not grow with the table. With infer_widths, column widths
+        are sized from the header and the first chunk of rows.
+        """
         try:
             import openpyxl
-            from openpyxl.styles import Font, PatternFill, Alignment
+            from openpyxl.cell import WriteOnlyCell
+            from openpyxl.styles import Font, PatternFill
+            from openpyxl.utils import get_column_letter
+        except ImportError:
+            raise Exception("Excel export requires openpyxl library. Install with: pip install openpyxl")
+        
+        wb = openpyxl.Workbook(write_only=True)
+        # Built once and shared by every header cell
+        header_font = Font(bold=True)
+        header_fill = PatternFill(start_color="CCCCCC", end_color="CCCCCC", fill_type="solid")
+        
+        with read_snapshot() as conn:
+            c = conn.cursor()
+            sections = self.sections(c)
+            self.count_rows(c, sections)
+            for title, table, columns, headers in sections:
+                ws = wb.create_sheet(table.capitalize())
+                chunks = self.stream_rows(c, table, columns)
+                first = next(chunks, [])
+                # Column widths must be set before the first row is written
+                if infer_widths:
+                    for col, header in enumerate(headers):
+                        width = max([len(str(header))] + [len(str(row[col])) for row in first if row[col] is not None])
+                        ws.column_dimensions[get_column_letter(col + 1)].width = min(width + 2, 60)
+                header_cells = []
+                for header in headers:
+                    cell = WriteOnlyCell(ws, value=header)
+                    cell.font = header_font
+                    cell.fill = header_fill
+                    header_cells.append(cell)
+                ws.append(header_cells)
+                for row in first:
+                    ws.append(row)
+                self.advance(len(first))
+                for rows in chunks:
+                    for row in rows:
+                        ws.append(row)
+                    self.advance(len(rows))
+            wb.save(self.filename)
+            self.progress.emit(100)
+    
+    def export_columnar(self):
+        """Write typed, zstd-compressed Parquet or Arrow IPC files, one per table.
+
+        Rows are converted and written one record batch at a time, so memory
+        is bounded by COLUMNAR_CHUNK_ROWS. An "All Data" export writes
+        <name>_<table>.<ext> next to the chosen file name.
+        """
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise Exception("Parquet/Arrow export requires pyarrow library. Install with: pip install pyarrow")
+        
+        with read_snapshot() as conn:
+            c = conn.cursor()
+            sections = self.sections(c)
+            self.count_rows(c, sections)
+            if len(sections) > 1:
+                base, ext = os.path.splitext(self.filename)
+                self.output_paths = [f'{base}_{table}{ext}' for _, table, _, _ in sections]
+            for (_, table, columns, _), path in zip(sections, self.output_paths):
+                schema = arrow_schema(c, table, columns)
+                if self.format_type == "Parquet":
+                    writer = pq.ParquetWriter(path, schema, compression='zstd')
+                else:
+                    writer = pa.ipc.new_file(path, schema, options=pa.ipc.IpcWriteOptions(compression='zstd'))
+                try:
+                    for rows in self.stream_rows(c, table, columns, COLUMNAR_CHUNK_ROWS):
+                        writer.write_batch(arrow_batch(schema, rows))
+                        self.advance(len(rows))
+                finally:
+                    writer.close()
+            self.progress.emit(100)
+    
+    def export_bundle(self):
+        """Export every table in parallel into one zip with a manifest.
+
+        The database is first snapshotted with the backup API; each table is
+        then written to CSV by its own process from that snapshot, so the
+        tables are mutually consistent and the work spreads across cores.
+        manifest.json records row counts, SHA-256 checksums and the schema
+        version.
+        """
+        from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+        import multiprocessing
+        import queue
+        import tempfile
+        from utils import export_bundle
+        
+        with read_snapshot() as conn:
+            sections = self.sections(conn.cursor())
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            snapshot = os.path.join(tmp, 'snapshot.db')
+            manifest = export_bundle.new_manifest(export_bundle.snapshot_database(snapshot))
+            snapshot_conn = open_connection(snapshot, read_only=True)
+            try:
+                self.count_rows(snapshot_conn.cursor(), sections)
+            finally:
+                snapshot_conn.close()
             
-            wb = openpyxl.Workbook()
+            # Spawned, not forked: forking a process that runs Qt threads is unsafe
+            context = multiprocessing.get_context('spawn')
+            with context.Manager() as manager:
+                progress, cancel = manager.Queue(), manager.Event()
+                with ProcessPoolExecutor(max_workers=self.process_count(len(sections)), mp_context=context) as pool:
+                    futures = {
+                        pool.submit(export_bundle.export_table_csv, snapshot, table, columns, headers,
+                                    os.path.join(tmp, f'{table}.csv'), self.chunk_size, progress, cancel): table
+                        for _, table, columns, headers in sections
+                    }
+                    pending = set(futures)
+                    while pending:
+                        done, pending = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+                        # Progress from all workers is summed into one figure
+                        while True:
+                            try:
+                                _, rows = progress.get_nowait()
+                            except queue.Empty:
+                                break
+                            self.advance(rows)
+                        if self.isInterruptionRequested():
+                            cancel.set()
+                            for future in pending:
+                                future.cancel()
+                            wait(pending)
+                            raise ExportCancelled()
+                        for future in done:
+                            manifest['tables'][futures[future]] = future.result()
             
-            conn = get_connection()
+            # Keep the bundle in export order, whichever worker finished first
+            tables = [table for _, table, _, _ in sections]
+            manifest['tables'] = {table: manifest['tables'][table] for table in tables}
+            export_bundle.write_bundle(self.filename, [os.path.join(tmp, f'{table}.csv') for table in tables], manifest)
+            self.progress.emit(100)
+    
+    def export_changes(self):
+        """Write only the rows inserted, updated or deleted since the last export to this destination.
+
+        Rows come from the change journal with an op column ('I', 'U', 'D');
+        deleted rows carry just their id. Each table has its own watermark per
+        destination, and a table without one gets every current row as an
+        insert. Journal and tables are read in one snapshot, so the file
+        matches the watermarks exactly; once the file is complete the exported
+        tables' watermarks move to the journal head of that snapshot, and the
+        journal is pruned, in one transaction.
+        """
+        with read_snapshot() as conn:
             c = conn.cursor()
+            sections = self.sections(c)
+            until = changes.journal_head(c)
+            queries = []
+            self.rows_total = 0
+            self.rows_done = 0
+            for title, table, columns, headers in sections:
+                since = changes.read_watermark(c, self.destination, table)
+                values = [col for col in columns if col != 'id']
+                labels = [header for col, header in zip(columns, headers) if col != 'id']
+                if since is None:
+                    sql, params = f"SELECT 'I', id, {', '.join(values)} FROM {table} ORDER BY id", ()
+                    c.execute(f'SELECT COUNT(*) FROM {table}')
+                else:
+                    sql, params = changes.changes_query(table, values, since, until)
+                    c.execute('SELECT COUNT(DISTINCT row_id) FROM change_journal '
+                              'WHERE table_name = ? AND seq > ? AND seq <= ?', (table, since, until))
+                self.rows_total += c.fetchone()[0]
+                queries.append((title, ['op', 'id'] + labels, sql, params))
             
-            if self.export_type == "All Data":
-                tables = ['batches', 'feed_logs', 'water_logs', 'vaccinations', 'mortality', 'workers', 'expenses', 'revenue']
-                for i, table in enumerate(tables):
-                    if i == 0:
-                        ws = wb.active
-                        ws.title = table.capitalize()
-                    else:
-                        ws = wb.create_sheet(table.capitalize())
-                    
-                    c.execute(f'SELECT * FROM {table}')
-                    rows = c.fetchall()
-                    if rows:
-                        # Get column names
-                        c.execute(f'PRAGMA table_info({table})')
-                        columns = [col[1] for col in c.fetchall()]
-                        
-                        # Write headers
-                        for col, header in enumerate(columns, 1):
-                            cell = ws.cell(row=1, column=col, value=header)
-                            cell.font = Font(bold=True)
-                            cell.fill = PatternFill(start_color="CCCCCC", end_color="CCCCCC", fill_type="solid")
-                        
-                        # Write data
-                        for row_idx, row in enumerate(rows, 2):
-                            for col_idx, value in enumerate(row, 1):
-                                ws.cell(row=row_idx, column=col_idx, value=value)
-                    
-                    self.progress.emit((i + 1) * 100 // len(tables))
-            else:
-                # Export specific table
-                table_map = {
-                    "Batches": ("batches", ["Batch ID", "Num Chicks", "Breed", "Date In", "Expected Out", "Mortality Rate"]),
-                    "Feed/Water Logs": ("feed_logs", ["Batch ID", "Date", "Quantity (kg)"]),
-                    "Vaccinations": ("vaccinations", ["Batch ID", "Date", "Vaccine", "Status"]),
-                    "Mortality": ("mortality", ["Batch ID", "Date", "Count", "Reason"]),
-                    "Workers": ("workers", ["Worker ID", "Name", "Role", "Phone", "Email", "Address", "Salary", "Hire Date", "Status"]),
-                    "Expenses": ("expenses", ["Date", "Category", "Amount", "Description", "Payment Method"]),
-                    "Revenue": ("revenue", ["Date", "Batch ID", "Amount"])
-                }
-                
-                table_name, headers = table_map[self.export_type]
-                c.execute(f'SELECT * FROM {table_name}')
-                rows = c.fetchall()
-                
-                # Write headers
-                for col, header in enumerate(headers, 1):
-                    cell = ws.cell(row=1, column=col, value=header)
-                    cell.font = Font(bold=True)
-                    cell.fill = PatternFill(start_color="CCCCCC", end_color="CCCCCC", fill_type="solid")
-                
-                # Write data
-                for row_idx, row in enumerate(rows, 2):
-                    for col_idx, value in enumerate(row, 1):
-                        ws.cell(row=row_idx, column=col_idx, value=value)
-            
+            with open(self.filename, 'w', newline='', encoding='utf-8') as file:
+                writer = csv.writer(file)
+                for title, headers, sql, params in queries:
+                    chunks = self.stream_query(c, sql, params)
+                    # Tables without changes are left out
+                    first = next(chunks, None)
+                    if first is None:
+                        continue
+                    if len(queries) > 1:
+                        writer.writerow([f'=== {title} ==='])
+                    writer.writerow(headers)
+                    writer.writerows(first)
+                    self.advance(len(first))
+                    for rows in chunks:
+                        writer.writerows(rows)
+                        self.advance(len(rows))
+                    if len(queries) > 1:
+                        writer.writerow([])  # Empty row between tables
+        # Written here rather than on the writer thread, so a failure fails the export
+        tables = [table for _, table, _, _ in sections]
+        conn = open_connection()
+        try:
+            c = conn.cursor()
+            c.execute('BEGIN IMMEDIATE')
+            self.save_watermarks(c, self.destination, tables, until)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
             conn.close()
-            wb.save(self.filename)
-            
-        except ImportError:
-            raise Exception("Excel export requires openpyxl library. Install with: pip install openpyxl")
+        self.progress.emit(100)
+    
+    @staticmethod
+    def save_watermarks(c, destination, tables, seq):
+        for table in tables:
+            changes.record_watermark(c, destination, table, seq)
+        changes.prune_journal(c, tables)
 
 class ExportModuleWidget(QWidget):
     def __init__(self):
@@ -271,7 +637,7 @@ class ExportModuleWidget(QWidget):
         format_layout = QHBoxLayout()
         format_layout.addWidget(QLabel("Export Format:"))
         self.format_combo = QComboBox()
-        self.format_combo.addItems(["CSV", "PDF", "Excel"])
+        self.format_combo.addItems(["CSV", "PDF", "Excel", "Parquet", "Arrow", "Bundle", CHANGES_FORMAT])
         format_layout.addWidget(self.format_combo)
         format_layout.addStretch()
         options_layout.addLayout(format_layout)
@@ -299,6 +665,12 @@ class ExportModuleWidget(QWidget):
         self.export_btn.clicked.connect(self.start_export)
         layout.addWidget(self.export_btn)
         
+        # Cancel button, shown while an export is running
+        self.cancel_btn = QPushButton("Cancel Export")
+        self.cancel_btn.setVisible(False)
+        self.cancel_btn.clicked.connect(self.cancel_export)
+        layout.addWidget(self.cancel_btn)
+        
         # Progress bar
         self.progress_bar = QProgressBar()
         self.progress_bar.setVisible(False)
@@ -316,32 +688,57 @@ class ExportModuleWidget(QWidget):
         format_type = self.format_combo.currentText()
         
         # Get filename
-        if format_type == "CSV":
+        if format_type in ("CSV", CHANGES_FORMAT):
             filename, _ = QFileDialog.getSaveFileName(self, "Export Data", "", "CSV Files (*.csv)")
         elif format_type == "PDF":
             filename, _ = QFileDialog.getSaveFileName(self, "Export Data", "", "PDF Files (*.pdf)")
         elif format_type == "Excel":
             filename, _ = QFileDialog.getSaveFileName(self, "Export Data", "", "Excel Files (*.xlsx)")
+        elif format_type == "Parquet":
+            filename, _ = QFileDialog.getSaveFileName(self, "Export Data", "", "Parquet Files (*.parquet)")
+        elif format_type == "Arrow":
+            filename, _ = QFileDialog.getSaveFileName(self, "Export Data", "", "Arrow IPC Files (*.arrow)")
+        elif format_type == "Bundle":
+            filename, _ = QFileDialog.getSaveFileName(self, "Export Data", "", "Zip Bundles (*.zip)")
         
         if filename:
             self.export_btn.setEnabled(False)
+            self.cancel_btn.setVisible(True)
+            self.progress_bar.setValue(0)
             self.progress_bar.setVisible(True)
             self.status_label.setText("Exporting data...")
             
             self.export_worker = ExportWorker(export_type, format_type, filename)
+            settings = QSettings('DashPoultry', 'DashPoultryApp')
+            self.export_worker.concurrent_pdf = settings.value('concurrent_pdf', False, type=bool)
             self.export_worker.progress.connect(self.progress_bar.setValue)
             self.export_worker.finished.connect(self.export_finished)
             self.export_worker.error.connect(self.export_error)
+            self.export_worker.cancelled.connect(self.export_cancelled)
             self.export_worker.start()
 
-    def export_finished(self, message):
+    def cancel_export(self):
+        if self.export_worker is not None:
+            self.cancel_btn.setEnabled(False)
+            self.status_label.setText("Cancelling export...")
+            self.export_worker.cancel()
+
+    def reset_export_controls(self):
         self.export_btn.setEnabled(True)
+        self.cancel_btn.setVisible(False)
+        self.cancel_btn.setEnabled(True)
         self.progress_bar.setVisible(False)
+
+    def export_finished(self, message):
+        self.reset_export_controls()
         self.status_label.setText(message)
         QMessageBox.information(self, "Export Complete", message)
 
+    def export_cancelled(self, message):
+        self.reset_export_controls()
+        self.status_label.setText(message)
+
     def export_error(self, error_message):
-        self.export_btn.setEnabled(True)
-        self.progress_bar.setVisible(False)
+        self.reset_export_controls()
         self.status_label.setText("Export failed")
         QMessageBox.critical(self, "Export Error", error_message) 
\ No newline at end of file
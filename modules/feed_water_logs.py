@@ -1,10 +1,11 @@
-from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QTableWidget, QTableWidgetItem, QMessageBox, QLabel, QComboBox, QDialog, QFormLayout, QDateEdit, QDialogButtonBox, QDoubleSpinBox
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QTableView, QMessageBox, QLabel, QComboBox, QDialog, QFormLayout, QDateEdit, QDialogButtonBox, QDoubleSpinBox
 from PyQt6.QtCore import Qt, QDate
 import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from database.init_db import get_connection
 from utils.data_manager import data_manager
+from utils.refresh_scheduler import RefreshScheduler
+from utils.sql_table_model import SqlTableModel
 
 class LogDialog(QDialog):
     def __init__(self, parent=None, batches=None, log=None):
@@ -53,12 +54,12 @@ class LogDialog(QDialog):
 class FeedWaterLogsWidget(QWidget):
     def __init__(self):
         super().__init__()
+        self.batches = []
         self.init_ui()
         self.load_batches()
-        try:
-            data_manager.batch_data_changed.connect(self.on_batch_data_changed)
-        except Exception:
-            pass
+        # Reload on batch changes, deferred until the page is shown
+        self.refresher = RefreshScheduler(self, self.on_batch_data_changed)
+        self.refresher.watch(data_manager.batch_data_changed, data_manager.database_replaced)
         self.load_logs()
 
     def on_batch_data_changed(self):
@@ -77,12 +78,17 @@ class FeedWaterLogsWidget(QWidget):
         filter_layout.addWidget(self.batch_filter)
         filter_layout.addStretch()
         layout.addLayout(filter_layout)
-        self.table = QTableWidget()
-        self.table.setColumnCount(4)
-        self.table.setHorizontalHeaderLabels(["Batch ID", "Date", "Feed (kg)", "Water (L)"])
-        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
-        self.table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
-        self.table.setSelectionMode(QTableWidget.SelectionMode.SingleSelection)
+        # Reads the per-batch daily rollup; a side with no entries that day shows blank
+        self.model = SqlTableModel(
+            'batch_daily_feed_water',
+            ['batch_id', 'date', 'CASE WHEN feed_rows > 0 THEN feed_kg END', 'CASE WHEN water_rows > 0 THEN water_l END'],
+            ["Batch ID", "Date", "Feed (kg)", "Water (L)"],
+            order_by=['date', 'batch_id'], descending=True, parent=self)
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setEditTriggers(QTableView.EditTrigger.NoEditTriggers)
+        self.table.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
+        self.table.setSelectionMode(QTableView.SelectionMode.SingleSelection)
         self.table.verticalHeader().setVisible(False)
         self.table.setAlternatingRowColors(True)
         layout.addWidget(self.table)
@@ -100,50 +106,29 @@ class FeedWaterLogsWidget(QWidget):
         layout.addLayout(btn_layout)
 
     def load_batches(self):
-        conn = get_connection()
-        c = conn.cursor()
-        c.execute('SELECT batch_id FROM batches ORDER BY batch_id')
-        self.batches = [row[0] for row in c.fetchall()]
+        data_manager.request_batch_list(self.set_batches)
+
+    def set_batches(self, batches):
+        self.batches = batches
         self.batch_filter.clear()
         self.batch_filter.addItem("All")
         self.batch_filter.addItems(self.batches)
-        conn.close()
 
     def load_logs(self):
-        conn = get_connection()
-        c = conn.cursor()
         batch = self.batch_filter.currentText()
         if batch == "All":
-            c.execute('''
-                SELECT DISTINCT batch_id, date FROM (
-                    SELECT batch_id, date FROM feed_logs
-                    UNION
-                    SELECT batch_id, date FROM water_logs
-                ) ORDER BY date DESC
-            ''')
-            pairs = c.fetchall()
+            self.model.set_filter('batch')
         else:
-            c.execute('''
-                SELECT DISTINCT batch_id, date FROM (
-                    SELECT batch_id, date FROM feed_logs WHERE batch_id=?
-                    UNION
-                    SELECT batch_id, date FROM water_logs WHERE batch_id=?
-                ) ORDER BY date DESC
-            ''', (batch, batch))
-            pairs = c.fetchall()
-        rows = []
-        for batch_id, date in pairs:
-            c.execute('SELECT quantity_kg FROM feed_logs WHERE batch_id=? AND date=?', (batch_id, date))
-            feed = c.fetchone()
-            c.execute('SELECT quantity_l FROM water_logs WHERE batch_id=? AND date=?', (batch_id, date))
-            water = c.fetchone()
-            rows.append((batch_id, date, feed[0] if feed else '', water[0] if water else ''))
-        self.table.setRowCount(len(rows))
-        for row_idx, row in enumerate(rows):
-            for col_idx, value in enumerate(row):
-                item = QTableWidgetItem(str(value) if value is not None else "")
-                self.table.setItem(row_idx, col_idx, item)
-        conn.close()
+            self.model.set_filter('batch', 'batch_id = ?', [batch])
+        self.model.reload()
+
+    def on_write_succeeded(self, title, message):
+        QMessageBox.information(self, title, message)
+        self.load_logs()
+        try:
+            data_manager.notify_feed_water_change()
+        except Exception:
+            pass
 
     def add_log(self):
         dialog = LogDialog(self, batches=self.batches)
@@ -152,35 +137,28 @@ class FeedWaterLogsWidget(QWidget):
             if data['feed'] == 0 and data['water'] == 0:
                 QMessageBox.warning(self, "Validation Error", "Enter feed or water value.")
                 return
-            conn = get_connection()
-            c = conn.cursor()
-            try:
+            def insert(c):
                 if data['feed'] > 0:
                     c.execute('INSERT INTO feed_logs (batch_id, date, quantity_kg) VALUES (?, ?, ?)',
                               (data['batch_id'], data['date'], data['feed']))
                 if data['water'] > 0:
                     c.execute('INSERT INTO water_logs (batch_id, date, quantity_l) VALUES (?, ?, ?)',
                               (data['batch_id'], data['date'], data['water']))
-                conn.commit()
-                QMessageBox.information(self, "Success", "Log added successfully.")
-                self.load_logs()
-            except Exception as e:
-                QMessageBox.critical(self, "Error", f"Failed to add log: {e}")
-            finally:
-                conn.close()
+            data_manager.submit_write(
+                insert,
+                on_success=lambda _: self.on_write_succeeded("Success", "Log added successfully."),
+                on_error=lambda e: QMessageBox.critical(self, "Error", f"Failed to add log: {e}"))
 
     def edit_log(self):
-        row = self.table.currentRow()
+        row = self.table.currentIndex().row()
         if row < 0:
             QMessageBox.warning(self, "Select Log", "Please select a log to edit.")
             return
-        log = [self.table.item(row, i).text() for i in range(4)]
+        log = self.model.row_text(row)
         dialog = LogDialog(self, batches=self.batches, log=log)
         if dialog.exec() == QDialog.DialogCode.Accepted:
             data = dialog.get_data()
-            conn = get_connection()
-            c = conn.cursor()
-            try:
+            def update(c):
                 # Delete old log
                 if log[2]:
                     c.execute('DELETE FROM feed_logs WHERE batch_id=? AND date=?', (log[0], log[1]))
@@ -193,34 +171,26 @@ class FeedWaterLogsWidget(QWidget):
                 if data['water'] > 0:
                     c.execute('INSERT INTO water_logs (batch_id, date, quantity_l) VALUES (?, ?, ?)',
                               (data['batch_id'], data['date'], data['water']))
-                conn.commit()
-                QMessageBox.information(self, "Success", "Log updated successfully.")
-                self.load_logs()
-            except Exception as e:
-                QMessageBox.critical(self, "Error", f"Failed to update log: {e}")
-            finally:
-                conn.close()
+            data_manager.submit_write(
+                update,
+                on_success=lambda _: self.on_write_succeeded("Success", "Log updated successfully."),
+                on_error=lambda e: QMessageBox.critical(self, "Error", f"Failed to update log: {e}"))
 
     def delete_log(self):
-        row = self.table.currentRow()
+        row = self.table.currentIndex().row()
         if row < 0:
             QMessageBox.warning(self, "Select Log", "Please select a log to delete.")
             return
-        log = [self.table.item(row, i).text() for i in range(4)]
+        log = self.model.row_text(row)
         reply = QMessageBox.question(self, "Confirm Delete", f"Delete log for batch '{log[0]}' on {log[1]}?",
                                      QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
         if reply == QMessageBox.StandardButton.Yes:
-            conn = get_connection()
-            c = conn.cursor()
-            try:
+            def delete(c):
                 if log[2]:
                     c.execute('DELETE FROM feed_logs WHERE batch_id=? AND date=?', (log[0], log[1]))
                 if log[3]:
                     c.execute('DELETE FROM water_logs WHERE batch_id=? AND date=?', (log[0], log[1]))
-                conn.commit()
-                QMessageBox.information(self, "Deleted", "Log deleted.")
-                self.load_logs()
-            except Exception as e:
-                QMessageBox.critical(self, "Error", f"Failed to delete log: {e}")
-            finally:
-                conn.close() 
\ No newline at end of file
+            data_manager.submit_write(
+                delete,
+                on_success=lambda _: self.on_write_succeeded("Deleted", "Log deleted."),
+                on_error=lambda e: QMessageBox.critical(self, "Error", f"Failed to delete log: {e}"))
@@ -1,13 +1,15 @@
-from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QTableWidget, QTableWidgetItem, 
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QTableView,
                              QMessageBox, QLabel, QComboBox, QDialog, QFormLayout, QDateEdit, QDialogButtonBox, 
                              QLineEdit, QFileDialog, QAbstractItemView, QHeaderView, QSpinBox, QTextEdit)
 from PyQt6.QtCore import Qt, QDate
+from PyQt6.QtGui import QColor
 import csv
 import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from database.init_db import get_connection
 from utils.data_manager import data_manager
+from utils.refresh_scheduler import RefreshScheduler
+from utils.sql_table_model import SqlTableModel, debounce_search
 
 class MortalityDialog(QDialog):
     def __init__(self, parent=None, batches=None, mortality=None):
@@ -56,13 +58,12 @@ class MortalityDialog(QDialog):
 class MortalityTrackerWidget(QWidget):
     def __init__(self):
         super().__init__()
-        self.all_rows = []  # Store all rows for filtering
+        self.batches = []
         self.init_ui()
         self.load_batches()
-        try:
-            data_manager.batch_data_changed.connect(self.on_batch_data_changed)
-        except Exception:
-            pass
+        # Reload on batch changes, deferred until the page is shown
+        self.refresher = RefreshScheduler(self, self.on_batch_data_changed)
+        self.refresher.watch(data_manager.batch_data_changed, data_manager.database_replaced)
         self.load_mortality()
 
     def on_batch_data_changed(self):
@@ -80,7 +81,7 @@ class MortalityTrackerWidget(QWidget):
         filter_layout.addWidget(QLabel("Search:"))
         self.search_input = QLineEdit()
         self.search_input.setPlaceholderText("Search by reason, batch, etc...")
-        self.search_input.textChanged.connect(self.filter_table)
+        self.search_timer = debounce_search(self.search_input, self.filter_table)
         filter_layout.addWidget(self.search_input)
         
         filter_layout.addWidget(QLabel("Batch:"))
@@ -104,12 +105,17 @@ class MortalityTrackerWidget(QWidget):
         layout.addLayout(stats_layout)
         
         # Table
-        self.table = QTableWidget()
-        self.table.setColumnCount(4)
-        self.table.setHorizontalHeaderLabels(["Batch ID", "Date", "Count", "Reason"])
-        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
-        self.table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
-        self.table.setSelectionMode(QTableWidget.SelectionMode.SingleSelection)
+        self.model = SqlTableModel(
+            'mortality', ['batch_id', 'date', 'count', 'reason'], ["Batch ID", "Date", "Count", "Reason"],
+            order_by=['date', 'rowid'], descending=True,
+            full_text=True, parent=self)
+        self.model.background = self.cell_background
+        self.model.loaded.connect(self.load_stats)
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setEditTriggers(QTableView.EditTrigger.NoEditTriggers)
+        self.table.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
+        self.table.setSelectionMode(QTableView.SelectionMode.SingleSelection)
         self.table.verticalHeader().setVisible(False)
         self.table.setAlternatingRowColors(True)
         self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
@@ -137,58 +143,56 @@ class MortalityTrackerWidget(QWidget):
         layout.addLayout(btn_layout)
 
     def load_batches(self):
-        conn = get_connection()
-        c = conn.cursor()
-        c.execute('SELECT batch_id FROM batches ORDER BY batch_id')
-        self.batches = [row[0] for row in c.fetchall()]
+        data_manager.request_batch_list(self.set_batches)
+
+    def set_batches(self, batches):
+        self.batches = batches
         self.batch_filter.clear()
         self.batch_filter.addItem("All")
         self.batch_filter.addItems(self.batches)
-        conn.close()
 
     def load_mortality(self):
-        conn = get_connection()
-        c = conn.cursor()
         batch = self.batch_filter.currentText()
         if batch == "All":
-            c.execute('SELECT batch_id, date, count, reason FROM mortality ORDER BY date DESC')
+            self.model.set_filter('batch')
         else:
-            c.execute('SELECT batch_id, date, count, reason FROM mortality WHERE batch_id=? ORDER BY date DESC', (batch,))
-        rows = c.fetchall()
-        self.all_rows = rows
-        self.populate_table(rows)
-        self.update_stats(rows)
-        conn.close()
+            self.model.set_filter('batch', 'batch_id = ?', [batch])
+        self.model.reload()
+
+    def cell_background(self, column, value):
+        if column == 2:  # Count column - make it stand out
+            return QColor(Qt.GlobalColor.lightGray)
+        return None
 
-    def populate_table(self, rows):
-        self.table.setRowCount(len(rows))
-        for row_idx, row in enumerate(rows):
-            for col_idx, value in enumerate(row):
-                item = QTableWidgetItem(str(value) if value is not None else "")
-                if col_idx == 2:  # Count column - make it stand out
-                    item.setBackground(Qt.GlobalColor.lightGray)
-                self.table.setItem(row_idx, col_idx, item)
+    def load_stats(self):
+        where, params = self.model.where()
+        def query(c):
+            c.execute(f'SELECT SUM(count), COUNT(*) FROM mortality WHERE {where}', params)
+            return c.fetchone()
+        data_manager.submit_query(query, key='mortality_stats', on_result=lambda row: self.update_stats(*row))
 
-    def update_stats(self, rows):
-        if not rows:
+    def update_stats(self, total, records):
+        if not records:
             self.total_mortality_label.setText("Total Mortality: 0")
             self.avg_mortality_label.setText("Avg per Record: 0")
             return
         
-        total = sum(row[2] for row in rows)
-        avg = total / len(rows)
+        total = total or 0
+        avg = total / records
         self.total_mortality_label.setText(f"Total Mortality: {total}")
         self.avg_mortality_label.setText(f"Avg per Record: {avg:.1f}")
 
     def filter_table(self):
-        text = self.search_input.text().lower()
-        if not text:
-            self.populate_table(self.all_rows)
-            self.update_stats(self.all_rows)
-            return
-        filtered = [row for row in self.all_rows if any(text in str(cell).lower() for cell in row)]
-        self.populate_table(filtered)
-        self.update_stats(filtered)
+        self.model.set_search(self.search_input.text())
+        self.model.reload()
+
+    def on_write_succeeded(self, message):
+        QMessageBox.information(self, "Success", message)
+        self.load_mortality()
+        try:
+            data_manager.notify_mortality_change()
+        except Exception:
+            pass
 
     def add_mortality(self):
         dialog = MortalityDialog(self, batches=self.batches)
@@ -197,66 +201,51 @@ class MortalityTrackerWidget(QWidget):
             if not data['reason']:
                 QMessageBox.warning(self, "Validation Error", "Reason is required.")
                 return
-            conn = get_connection()
-            c = conn.cursor()
-            try:
+            def insert(c):
                 c.execute('INSERT INTO mortality (batch_id, date, count, reason) VALUES (?, ?, ?, ?)',
                     (data['batch_id'], data['date'], data['count'], data['reason']))
-                conn.commit()
-                QMessageBox.information(self, "Success", "Mortality record added successfully.")
-                self.load_mortality()
-            except Exception as e:
-                QMessageBox.critical(self, "Error", f"Failed to add mortality record: {e}")
-            finally:
-                conn.close()
+            data_manager.submit_write(
+                insert,
+                on_success=lambda _: self.on_write_succeeded("Mortality record added successfully."),
+                on_error=lambda e: QMessageBox.critical(self, "Error", f"Failed to add mortality record: {e}"))
 
     def edit_mortality(self):
-        row = self.table.currentRow()
+        row = self.table.currentIndex().row()
         if row < 0:
             QMessageBox.warning(self, "Select Record", "Please select a mortality record to edit.")
             return
-        mortality = [self.table.item(row, i).text() for i in range(4)]
+        mortality = self.model.row_text(row)
         dialog = MortalityDialog(self, batches=self.batches, mortality=mortality)
         if dialog.exec() == QDialog.DialogCode.Accepted:
             data = dialog.get_data()
-            conn = get_connection()
-            c = conn.cursor()
-            try:
+            def update(c):
                 c.execute('UPDATE mortality SET date=?, count=?, reason=? WHERE batch_id=? AND date=? AND count=? AND reason=?',
                     (data['date'], data['count'], data['reason'], mortality[0], mortality[1], mortality[2], mortality[3]))
-                conn.commit()
-                QMessageBox.information(self, "Success", "Mortality record updated successfully.")
-                self.load_mortality()
-            except Exception as e:
-                QMessageBox.critical(self, "Error", f"Failed to update mortality record: {e}")
-            finally:
-                conn.close()
+            data_manager.submit_write(
+                update,
+                on_success=lambda _: self.on_write_succeeded("Mortality record updated successfully."),
+                on_error=lambda e: QMessageBox.critical(self, "Error", f"Failed to update mortality record: {e}"))
 
     def delete_mortality(self):
-        row = self.table.currentRow()
+        row = self.table.currentIndex().row()
         if row < 0:
             QMessageBox.warning(self, "Select Record", "Please select a mortality record to delete.")
             return
-        mortality = [self.table.item(row, i).text() for i in range(4)]
+        mortality = self.model.row_text(row)
         reply = QMessageBox.question(self, "Confirm Delete", 
                                    f"Are you sure you want to delete this mortality record?\n\nBatch: {mortality[0]}\nDate: {mortality[1]}\nCount: {mortality[2]}\nReason: {mortality[3]}",
                                    QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
         if reply == QMessageBox.StandardButton.Yes:
-            conn = get_connection()
-            c = conn.cursor()
-            try:
+            def delete(c):
                 c.execute('DELETE FROM mortality WHERE batch_id=? AND date=? AND count=? AND reason=?',
                     (mortality[0], mortality[1], mortality[2], mortality[3]))
-                conn.commit()
-                QMessageBox.information(self, "Success", "Mortality record deleted successfully.")
-                self.load_mortality()
-            except Exception as e:
-                QMessageBox.critical(self, "Error", f"Failed to delete mortality record: {e}")
-            finally:
-                conn.close()
+            data_manager.submit_write(
+                delete,
+                on_success=lambda _: self.on_write_succeeded("Mortality record deleted successfully."),
+                on_error=lambda e: QMessageBox.critical(self, "Error", f"Failed to delete mortality record: {e}"))
 
     def export_csv(self):
-        if not self.all_rows:
+        if not self.model.rowCount():
             QMessageBox.warning(self, "No Data", "No mortality records to export.")
             return
         filename, _ = QFileDialog.getSaveFileName(self, "Export Mortality Records", "", "CSV Files (*.csv)")
@@ -265,7 +254,8 @@ class MortalityTrackerWidget(QWidget):
                 with open(filename, 'w', newline='', encoding='utf-8') as file:
                     writer = csv.writer(file)
                     writer.writerow(["Batch ID", "Date", "Count", "Reason"])
-                    writer.writerows(self.all_rows)
+                    writer.writerows(self.model.iter_rows())
                 QMessageBox.information(self, "Success", f"Mortality records exported to {filename}")
             except Exception as e:
-                QMessageBox.critical(self, "Error", f"Failed to export: {e}") 
\ No newline at end of file
+                QMessageBox.critical(self, "Error", f"Failed to export: {e}") 
+
@@ -6,21 +6,18 @@ import numpy as np
 import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from database.init_db import get_connection
 from utils.data_manager import data_manager
+from utils.refresh_scheduler import RefreshScheduler
 
 class ProfitLossAnalysisWidget(QWidget):
     def __init__(self):
         super().__init__()
         self.init_ui()
-        # Connect to data manager signals so charts/labels update live
-        try:
-            data_manager.revenue_data_changed.connect(self.on_financial_data_changed)
-            data_manager.expense_data_changed.connect(self.on_financial_data_changed)
-            data_manager.revenue_data_changed.connect(self.load_data)
-            data_manager.expense_data_changed.connect(self.load_data)
-        except Exception:
-            pass
+        # Update charts/labels when revenue or expenses change; once per burst,
+        # and only while the page is shown
+        self.refresher = RefreshScheduler(self, self.on_financial_data_changed)
+        self.refresher.watch(data_manager.revenue_data_changed, data_manager.expense_data_changed,
+                             data_manager.database_replaced)
         self.load_data()
 
     def init_ui(self):
@@ -104,17 +101,33 @@ class ProfitLossAnalysisWidget(QWidget):
         layout.addWidget(chart)
         return card
 
-    def load_data(self):
-        conn = get_connection()
-        c = conn.cursor()
-        
-        # Get revenue data
+    @staticmethod
+    def query_data(c):
+        """Read totals, breakdowns and chart series (runs on the query pool)"""
         c.execute('SELECT SUM(amount) FROM revenue')
         total_revenue = c.fetchone()[0] or 0
-        
-        # Get expenses data
         c.execute('SELECT SUM(amount) FROM expenses')
         total_expenses = c.fetchone()[0] or 0
+        c.execute('SELECT month, revenue, expenses FROM monthly_financials ORDER BY month')
+        monthly = c.fetchall()
+        c.execute('SELECT category, SUM(amount) FROM monthly_expense_by_category GROUP BY category ORDER BY SUM(amount) DESC')
+        expenses_by_category = c.fetchall()
+        c.execute('SELECT batch_id, amount FROM revenue_by_batch ORDER BY amount DESC')
+        revenue_by_batch = c.fetchall()
+        return {
+            'revenue': total_revenue,
+            'expenses': total_expenses,
+            'monthly': monthly,
+            'expenses_by_category': expenses_by_category,
+            'revenue_by_batch': revenue_by_batch,
+        }
+
+    def load_data(self):
+        data_manager.submit_query(self.query_data, key='profit_loss', on_result=self.show_data)
+
+    def show_data(self, data):
+        total_revenue = data['revenue']
+        total_expenses = data['expenses']
         
         # Calculate net profit and margin
         net_profit = total_revenue - total_expenses
@@ -127,65 +140,18 @@ class ProfitLossAnalysisWidget(QWidget):
         self.profit_margin_label.setText(f"Profit Margin: {profit_margin:.1f}%")
         
         # Load breakdown data
-        self.load_breakdown_data()
+        self.load_breakdown_data(dict(data['revenue_by_batch']), dict(data['expenses_by_category']))
         
-        conn.close()
+        self.update_revenue_expenses_chart(data['monthly'])
+        self.update_monthly_profit_chart(data['monthly'])
+        self.update_expense_breakdown_chart(data['expenses_by_category'])
+        self.update_revenue_by_batch_chart(data['revenue_by_batch'])
 
     def on_financial_data_changed(self):
         """Refresh charts when revenue/expense data changes."""
-        try:
-            # Recreate and replace each chart widget inside its card
-            new_rev_exp = self.create_revenue_expenses_chart()
-            rev_layout = self.revenue_card.layout()
-            # replace old chart (assumed at index 1)
-            old_widget = rev_layout.itemAt(1).widget()
-            if old_widget:
-                old_widget.deleteLater()
-            rev_layout.insertWidget(1, new_rev_exp)
-            self.revenue_expenses_chart = new_rev_exp
-
-            new_monthly = self.create_monthly_profit_chart()
-            mon_layout = self.monthly_card.layout()
-            old_widget = mon_layout.itemAt(1).widget()
-            if old_widget:
-                old_widget.deleteLater()
-            mon_layout.insertWidget(1, new_monthly)
-            self.monthly_profit_chart = new_monthly
-
-            new_expense = self.create_expense_breakdown_chart()
-            exp_layout = self.expense_card.layout()
-            old_widget = exp_layout.itemAt(1).widget()
-            if old_widget:
-                old_widget.deleteLater()
-            exp_layout.insertWidget(1, new_expense)
-            self.expense_breakdown_chart = new_expense
-
-            new_rev_by_batch = self.create_revenue_by_batch_chart()
-            rb_layout = self.revenue_by_batch_card.layout()
-            old_widget = rb_layout.itemAt(1).widget()
-            if old_widget:
-                old_widget.deleteLater()
-            rb_layout.insertWidget(1, new_rev_by_batch)
-            self.revenue_by_batch_chart = new_rev_by_batch
-
-            # Update breakdown table/labels as well
-            self.load_data()
-        except Exception:
-            # Non-fatal: ignore errors during UI refresh
-            pass
+        self.load_data()
 
-    def load_breakdown_data(self):
-        conn = get_connection()
-        c = conn.cursor()
-        
-        # Get revenue by batch
-        c.execute('SELECT batch_id, SUM(amount) FROM revenue GROUP BY batch_id')
-        revenue_by_batch = dict(c.fetchall())
-        
-        # Get expenses by category
-        c.execute('SELECT category, SUM(amount) FROM expenses GROUP BY category')
-        expenses_by_category = dict(c.fetchall())
-        
+    def load_breakdown_data(self, revenue_by_batch, expenses_by_category):
         # Create breakdown table
         categories = list(set(list(revenue_by_batch.keys()) + list(expenses_by_category.keys())))
         categories.sort()
@@ -206,187 +172,70 @@ class ProfitLossAnalysisWidget(QWidget):
             elif profit < 0:
                 profit_item.setBackground(Qt.GlobalColor.red)
             self.breakdown_table.setItem(i, 3, profit_item)
-        
-        conn.close()
 
-    def create_revenue_expenses_chart(self):
+    @staticmethod
+    def new_plot(left, bottom):
         plot = pg.PlotWidget()
         plot.setMouseEnabled(False, False)
         plot.hideButtons()
-        
-        conn = get_connection()
-        c = conn.cursor()
-        
-        # Get monthly data
-        c.execute('SELECT strftime("%Y-%m", date) as month, SUM(amount) FROM revenue GROUP BY month ORDER BY month')
-        revenue_data = c.fetchall()
-        
-        c.execute('SELECT strftime("%Y-%m", date) as month, SUM(amount) FROM expenses GROUP BY month ORDER BY month')
-        expenses_data = c.fetchall()
-        
-        conn.close()
-        
-        if revenue_data or expenses_data:
-            # Create a combined set of all months
-            all_months = set()
-            revenue_dict = {}
-            expenses_dict = {}
-            
-            for month, amount in revenue_data:
-                all_months.add(month)
-                revenue_dict[month] = amount
-            
-            for month, amount in expenses_data:
-                all_months.add(month)
-                expenses_dict[month] = amount
-            
-            # Sort months
-            months = sorted(list(all_months))
-            x = list(range(len(months)))
-            
-            # Get values for each month, defaulting to 0 if no data
-            revenue_vals = [revenue_dict.get(month, 0) for month in months]
-            expenses_vals = [expenses_dict.get(month, 0) for month in months]
-            
-            # Only plot if we have data
-            if any(revenue_vals):
-                plot.plot(x, revenue_vals, pen=pg.mkPen('#059669', width=3), name='Revenue', symbol='o', symbolBrush='#059669')
-            if any(expenses_vals):
-                plot.plot(x, expenses_vals, pen=pg.mkPen('#dc2626', width=3), name='Expenses', symbol='s', symbolBrush='#dc2626')
-            
-            if months:
-                ticks = list(zip(x, months))
-                plot.getPlotItem().getAxis('bottom').setTicks([ticks])
-                plot.getPlotItem().setLabels(left='Amount (₹)', bottom='Month')
-                plot.getPlotItem().addLegend()
-        
+        plot.getPlotItem().setLabels(left=left, bottom=bottom)
         plot.setBackground('w')
         return plot
 
+    @staticmethod
+    def set_ticks(plot, labels):
+        plot.getPlotItem().getAxis('bottom').setTicks([list(enumerate(labels))])
+
+    # The charts are built once; show_data() updates their items in place
+
+    def create_revenue_expenses_chart(self):
+        plot = self.new_plot('Amount (₹)', 'Month')
+        plot.getPlotItem().addLegend()
+        self.revenue_curve = plot.plot([], [], pen=pg.mkPen('#059669', width=3), name='Revenue', symbol='o', symbolBrush='#059669')
+        self.expenses_curve = plot.plot([], [], pen=pg.mkPen('#dc2626', width=3), name='Expenses', symbol='s', symbolBrush='#dc2626')
+        return plot
+
+    def update_revenue_expenses_chart(self, monthly_data):
+        x = list(range(len(monthly_data)))
+        self.revenue_curve.setData(x, [row[1] for row in monthly_data])
+        self.expenses_curve.setData(x, [row[2] for row in monthly_data])
+        self.set_ticks(self.revenue_expenses_chart, [row[0] for row in monthly_data])
+
     def create_monthly_profit_chart(self):
-        plot = pg.PlotWidget()
-        plot.setMouseEnabled(False, False)
-        plot.hideButtons()
-        
-        conn = get_connection()
-        c = conn.cursor()
-        
-        # Get all months from both revenue and expenses
-        c.execute('''
-            SELECT DISTINCT month FROM (
-                SELECT strftime("%Y-%m", date) as month FROM revenue
-                UNION
-                SELECT strftime("%Y-%m", date) as month FROM expenses
-            ) ORDER BY month
-        ''')
-        all_months = [row[0] for row in c.fetchall()]
-        
-        if all_months:
-            profits = []
-            for month in all_months:
-                # Get revenue for this month
-                c.execute('SELECT SUM(amount) FROM revenue WHERE strftime("%Y-%m", date) = ?', (month,))
-                revenue = c.fetchone()[0] or 0
-                
-                # Get expenses for this month
-                c.execute('SELECT SUM(amount) FROM expenses WHERE strftime("%Y-%m", date) = ?', (month,))
-                expenses = c.fetchone()[0] or 0
-                
-                profit = revenue - expenses
-                profits.append(profit)
-            
-            x = list(range(len(all_months)))
-            # Use single color for all bars or create proper color array
-            if all(p >= 0 for p in profits):
-                bars = pg.BarGraphItem(x0=x, height=profits, brush='g', width=0.8)
-            elif all(p < 0 for p in profits):
-                bars = pg.BarGraphItem(x0=x, height=profits, brush='r', width=0.8)
-            else:
-                # Mixed positive and negative - use green for positive, red for negative
-                positive_bars = [(i, p) for i, p in enumerate(profits) if p >= 0]
-                negative_bars = [(i, p) for i, p in enumerate(profits) if p < 0]
-                
-                if positive_bars:
-                    pos_x = [x[i] for i, _ in positive_bars]
-                    pos_heights = [p for _, p in positive_bars]
-                    pos_bars = pg.BarGraphItem(x0=pos_x, height=pos_heights, brush='g', width=0.8)
-                    plot.addItem(pos_bars)
-                
-                if negative_bars:
-                    neg_x = [x[i] for i, _ in negative_bars]
-                    neg_heights = [p for _, p in negative_bars]
-                    neg_bars = pg.BarGraphItem(x0=neg_x, height=neg_heights, brush='r', width=0.8)
-                    plot.addItem(neg_bars)
-                
-                # Skip the single bars addition since we added them separately
-                if positive_bars or negative_bars:
-                    ticks = list(zip(x, all_months))
-                    plot.getPlotItem().getAxis('bottom').setTicks([ticks])
-                    plot.getPlotItem().setLabels(left='Profit (₹)', bottom='Month')
-                    conn.close()
-                    plot.setBackground('w')
-                    return plot
-            
-            plot.addItem(bars)
-            
-            ticks = list(zip(x, all_months))
-            plot.getPlotItem().getAxis('bottom').setTicks([ticks])
-            plot.getPlotItem().setLabels(left='Profit (₹)', bottom='Month')
-        
-        conn.close()
-        plot.setBackground('w')
+        plot = self.new_plot('Profit (₹)', 'Month')
+        # Green bars for profitable months, red for loss-making ones
+        self.profit_bars = pg.BarGraphItem(x0=[], height=[], brush='g', width=0.8)
+        self.loss_bars = pg.BarGraphItem(x0=[], height=[], brush='r', width=0.8)
+        plot.addItem(self.profit_bars)
+        plot.addItem(self.loss_bars)
         return plot
 
+    def update_monthly_profit_chart(self, monthly_data):
+        # One pass over the monthly rollup instead of two SUM queries per month
+        profits = np.fromiter((rev - exp for _, rev, exp in monthly_data), dtype=float, count=len(monthly_data))
+        x = np.arange(len(monthly_data))
+        positive = profits >= 0
+        self.profit_bars.setOpts(x0=x[positive], height=profits[positive])
+        self.loss_bars.setOpts(x0=x[~positive], height=profits[~positive])
+        self.set_ticks(self.monthly_profit_chart, [row[0] for row in monthly_data])
+
     def create_expense_breakdown_chart(self):
-        plot = pg.PlotWidget()
-        plot.setMouseEnabled(False, False)
-        plot.hideButtons()
-        
-        conn = get_connection()
-        c = conn.cursor()
-        c.execute('SELECT category, SUM(amount) FROM expenses GROUP BY category ORDER BY SUM(amount) DESC')
-        expense_data = c.fetchall()
-        conn.close()
-        
-        if expense_data:
-            categories = [row[0] for row in expense_data]
-            amounts = [row[1] for row in expense_data]
-            
-            # Create pie chart using bar chart (PyQtGraph doesn't have built-in pie charts)
-            x = list(range(len(categories)))
-            # Use a single color for all bars to avoid color array issues
-            bars = pg.BarGraphItem(x0=x, height=amounts, brush='b', width=0.8)
-            plot.addItem(bars)
-            
-            ticks = list(zip(x, categories))
-            plot.getPlotItem().getAxis('bottom').setTicks([ticks])
-            plot.getPlotItem().setLabels(left='Amount (₹)', bottom='Category')
-        
-        plot.setBackground('w')
+        plot = self.new_plot('Amount (₹)', 'Category')
+        # A bar per category (PyQtGraph doesn't have built-in pie charts)
+        self.expense_bars = pg.BarGraphItem(x0=[], height=[], brush='b', width=0.8)
+        plot.addItem(self.expense_bars)
         return plot
 
+    def update_expense_breakdown_chart(self, expense_data):
+        self.expense_bars.setOpts(x0=list(range(len(expense_data))), height=[row[1] for row in expense_data])
+        self.set_ticks(self.expense_breakdown_chart, [row[0] for row in expense_data])
+
     def create_revenue_by_batch_chart(self):
-        plot = pg.PlotWidget()
-        plot.setMouseEnabled(False, False)
-        plot.hideButtons()
-        
-        conn = get_connection()
-        c = conn.cursor()
-        c.execute('SELECT batch_id, SUM(amount) FROM revenue GROUP BY batch_id ORDER BY SUM(amount) DESC')
-        revenue_data = c.fetchall()
-        conn.close()
-        
-        if revenue_data:
-            batches = [row[0] for row in revenue_data]
-            amounts = [row[1] for row in revenue_data]
-            
-            x = list(range(len(batches)))
-            bars = pg.BarGraphItem(x0=x, height=amounts, brush='#059669', width=0.8)
-            plot.addItem(bars)
-            
-            ticks = list(zip(x, batches))
-            plot.getPlotItem().getAxis('bottom').setTicks([ticks])
-            plot.getPlotItem().setLabels(left='Revenue (₹)', bottom='Batch ID')
-        
-        plot.setBackground('w')
-        return plot 
\ No newline at end of file
+        plot = self.new_plot('Revenue (₹)', 'Batch ID')
+        self.batch_revenue_bars = pg.BarGraphItem(x0=[], height=[], brush='#059669', width=0.8)
+        plot.addItem(self.batch_revenue_bars)
+        return plot
+
+    def update_revenue_by_batch_chart(self, revenue_data):
+        self.batch_revenue_bars.setOpts(x0=list(range(len(revenue_data))), height=[row[1] for row in revenue_data])
+        self.set_ticks(self.revenue_by_batch_chart, [row[0] for row in revenue_data])
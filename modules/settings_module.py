@@ -1,18 +1,106 @@
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QComboBox, 
                              QFrame, QGridLayout, QLineEdit, QFormLayout, QDialog, QDialogButtonBox,
-                             QMessageBox, QCheckBox, QSpinBox, QFileDialog, QTabWidget)
-from PyQt6.QtCore import Qt, QSettings
+                             QMessageBox, QCheckBox, QSpinBox, QFileDialog, QTabWidget, QProgressBar,
+                             QInputDialog)
+from PyQt6.QtCore import Qt, QSettings, QThread, pyqtSignal
 from PyQt6.QtGui import QIcon
 import os
 import sys
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from database.init_db import get_connection
+from utils.data_manager import data_manager
+
+class BackupWorker(QThread):
+    progress = pyqtSignal(int)
+    finished = pyqtSignal(str)
+    error = pyqtSignal(str)
+
+    def __init__(self, directory, compress=False, keep=0):
+        super().__init__()
+        self.directory = directory
+        self.compress = compress
+        self.keep = keep
+
+    def run(self):
+        try:
+            from utils.backup import create_backup
+            filename = create_backup(self.directory, compress=self.compress, keep=self.keep,
+                                     progress=self.report_progress)
+            self.finished.emit(filename)
+        except Exception as e:
+            self.error.emit(f"Failed to backup database: {str(e)}")
+
+    def report_progress(self, done, total):
+        self.progress.emit(int(done * 100 / total) if total else 100)
+
+class RestoreWorker(QThread):
+    """Stages a backup for restore; the swap itself happens on the GUI thread"""
+    progress = pyqtSignal(int)
+    finished = pyqtSignal(str)
+    error = pyqtSignal(str)
+
+    def __init__(self, filename):
+        super().__init__()
+        self.filename = filename
+
+    def run(self):
+        try:
+            from utils.backup import prepare_restore
+            self.finished.emit(prepare_restore(self.filename, progress=self.report_progress))
+        except Exception as e:
+            self.error.emit(f"Failed to restore database: {str(e)}")
+
+    def report_progress(self, done, total):
+        self.progress.emit(int(done * 100 / total) if total else 100)
+
+class SnapshotWorker(QThread):
+    """Runs one block store job: 'create', 'extract' (a snapshot to a file) or 'cleanup'"""
+    progress = pyqtSignal(int)
+    finished = pyqtSignal(str)
+    error = pyqtSignal(str)
+
+    def __init__(self, store_dir, job, snapshot_id=None, filename=None, keep=0):
+        super().__init__()
+        self.store_dir = store_dir
+        self.job = job
+        self.snapshot_id = snapshot_id
+        self.filename = filename
+        self.keep = keep
+
+    def run(self):
+        try:
+            from utils import block_store
+            store = block_store.LocalBlockStore(self.store_dir)
+            if self.job == 'create':
+                manifest = block_store.create_snapshot(store, progress=self.report_progress)
+                self.finished.emit(f"Snapshot {manifest['id']} stored: {manifest['new_blocks']} of "
+                                   f"{len(manifest['blocks'])} blocks were new "
+                                   f"({manifest['new_bytes'] / (1024 * 1024):.2f} MB)")
+            elif self.job == 'extract':
+                block_store.restore_snapshot(store, self.snapshot_id, self.filename)
+                self.finished.emit(f"Snapshot {self.snapshot_id} written to: {self.filename}")
+            elif self.job == 'cleanup':
+                snapshots = block_store.list_snapshots(store)
+                expired = snapshots[:-self.keep] if self.keep > 0 else []
+                for manifest in expired:
+                    block_store.delete_snapshot(store, manifest['id'])
+                removed, kept = block_store.gc(store)
+                self.finished.emit(f"Removed {len(expired)} old snapshots and {removed} unused blocks; "
+                                   f"{kept} blocks still in use")
+        except Exception as e:
+            self.error.emit(f"Snapshot store error: {str(e)}")
+
+    def report_progress(self, done, total):
+        self.progress.emit(int(done * 100 / total) if total else 100)
 
 class SettingsModuleWidget(QWidget):
     def __init__(self, main_window=None):
         super().__init__()
         self.main_window = main_window
         self.settings = QSettings('DashPoultry', 'DashPoultryApp')
+        self.backup_worker = None
+        self.snapshot_worker = None
+        self.restore_worker = None
         self.init_ui()
         self.load_settings()
 
@@ -127,6 +215,38 @@ class SettingsModuleWidget(QWidget):
         self.backup_btn.clicked.connect(self.backup_database)
         actions_layout.addWidget(self.backup_btn)
         
+        backup_options = QHBoxLayout()
+        self.backup_compress_checkbox = QCheckBox("Compress backups (gzip)")
+        backup_options.addWidget(self.backup_compress_checkbox)
+        backup_options.addWidget(QLabel("Keep last:"))
+        self.backup_keep_spin = QSpinBox()
+        self.backup_keep_spin.setRange(0, 365)
+        self.backup_keep_spin.setSpecialValueText("All")
+        backup_options.addWidget(self.backup_keep_spin)
+        backup_options.addStretch()
+        actions_layout.addLayout(backup_options)
+        
+        self.backup_progress = QProgressBar()
+        self.backup_progress.setVisible(False)
+        actions_layout.addWidget(self.backup_progress)
+        
+        self.backup_status_label = QLabel("")
+        self.backup_status_label.setStyleSheet("color: #6b7280; font-style: italic;")
+        actions_layout.addWidget(self.backup_status_label)
+        
+        # Incremental snapshots into a deduplicating block store
+        snapshot_buttons = QHBoxLayout()
+        self.snapshot_btn = QPushButton("Incremental Snapshot")
+        self.snapshot_btn.clicked.connect(self.create_snapshot)
+        snapshot_buttons.addWidget(self.snapshot_btn)
+        self.extract_snapshot_btn = QPushButton("Extract Snapshot...")
+        self.extract_snapshot_btn.clicked.connect(self.extract_snapshot)
+        snapshot_buttons.addWidget(self.extract_snapshot_btn)
+        self.cleanup_snapshots_btn = QPushButton("Clean Up Snapshots")
+        self.cleanup_snapshots_btn.clicked.connect(self.cleanup_snapshots)
+        snapshot_buttons.addWidget(self.cleanup_snapshots_btn)
+        actions_layout.addLayout(snapshot_buttons)
+        
         self.restore_btn = QPushButton("Restore Database")
         self.restore_btn.clicked.connect(self.restore_database)
         actions_layout.addWidget(self.restore_btn)
@@ -184,6 +304,9 @@ class SettingsModuleWidget(QWidget):
         self.default_export_format.addItems(["CSV", "PDF", "Excel"])
         export_layout.addRow("Default Export Format:", self.default_export_format)
         
+        self.concurrent_pdf_checkbox = QCheckBox("Render multi-table PDF exports in parallel (needs pypdf)")
+        export_layout.addRow("PDF Export:", self.concurrent_pdf_checkbox)
+        
         layout.addWidget(export_frame)
         
         layout.addStretch()
@@ -272,6 +395,9 @@ class SettingsModuleWidget(QWidget):
         self.auto_save_checkbox.setChecked(self.settings.value('auto_save', True, type=bool))
         self.startup_checkbox.setChecked(self.settings.value('startup_dashboard', True, type=bool))
         self.notifications_checkbox.setChecked(self.settings.value('notifications', True, type=bool))
+        self.concurrent_pdf_checkbox.setChecked(self.settings.value('concurrent_pdf', False, type=bool))
+        self.backup_compress_checkbox.setChecked(self.settings.value('backup_compress', False, type=bool))
+        self.backup_keep_spin.setValue(self.settings.value('backup_keep', 7, type=int))
         
         currency = self.settings.value('currency', '₹ (INR)')
         index = self.currency_combo.findText(currency)
@@ -309,6 +435,9 @@ class SettingsModuleWidget(QWidget):
         self.settings.setValue('auto_save', self.auto_save_checkbox.isChecked())
         self.settings.setValue('startup_dashboard', self.startup_checkbox.isChecked())
         self.settings.setValue('notifications', self.notifications_checkbox.isChecked())
+        self.settings.setValue('concurrent_pdf', self.concurrent_pdf_checkbox.isChecked())
+        self.settings.setValue('backup_compress', self.backup_compress_checkbox.isChecked())
+        self.settings.setValue('backup_keep', self.backup_keep_spin.value())
         self.settings.setValue('currency', self.currency_combo.currentText())
         self.settings.setValue('default_export_format', self.default_export_format.currentText())
         
@@ -324,30 +453,149 @@ class SettingsModuleWidget(QWidget):
         QMessageBox.information(self, "Settings Saved", "Settings have been saved successfully!")
 
     def backup_database(self):
+        # Backups are timestamped files in a folder, so the last N can be rotated
+        directory = QFileDialog.getExistingDirectory(self, "Backup Folder", self.settings.value('backup_dir', ''))
+        if not directory:
+            return
+        self.settings.setValue('backup_dir', directory)
+        self.set_backup_controls_enabled(False)
+        self.backup_progress.setValue(0)
+        self.backup_progress.setVisible(True)
+        self.backup_status_label.setText("Backing up database...")
+        
+        self.backup_worker = BackupWorker(directory, self.backup_compress_checkbox.isChecked(),
+                                          self.backup_keep_spin.value())
+        self.backup_worker.progress.connect(self.backup_progress.setValue)
+        self.backup_worker.finished.connect(self.backup_finished)
+        self.backup_worker.error.connect(self.backup_error)
+        self.backup_worker.start()
+
+    def set_backup_controls_enabled(self, enabled):
+        # One backup, snapshot or restore job at a time
+        for btn in (self.backup_btn, self.restore_btn, self.snapshot_btn,
+                    self.extract_snapshot_btn, self.cleanup_snapshots_btn):
+            btn.setEnabled(enabled)
+
+    def reset_backup_controls(self):
+        self.set_backup_controls_enabled(True)
+        self.backup_progress.setVisible(False)
+
+    def backup_finished(self, filename):
+        self.reset_backup_controls()
+        self.backup_status_label.setText(f"Last backup: {filename}")
+        QMessageBox.information(self, "Backup Complete", f"Database backed up to: {filename}")
+
+    def backup_error(self, error_message):
+        self.reset_backup_controls()
+        self.backup_status_label.setText("Backup failed")
+        QMessageBox.critical(self, "Backup Error", error_message)
+
+    def snapshot_store_dir(self, ask=False):
+        """The block store folder, asking for one if there is none yet (or ask is set)"""
+        store_dir = self.settings.value('snapshot_store', '')
+        if ask or not store_dir:
+            store_dir = QFileDialog.getExistingDirectory(self, "Snapshot Store Folder", store_dir)
+            if store_dir:
+                self.settings.setValue('snapshot_store', store_dir)
+        return store_dir
+
+    def start_snapshot_job(self, store_dir, job, **kwargs):
+        self.set_backup_controls_enabled(False)
+        self.backup_progress.setValue(0)
+        self.backup_progress.setVisible(job == 'create')
+        self.backup_status_label.setText("Working on snapshot store...")
+        
+        self.snapshot_worker = SnapshotWorker(store_dir, job, **kwargs)
+        self.snapshot_worker.progress.connect(self.backup_progress.setValue)
+        self.snapshot_worker.finished.connect(self.snapshot_finished)
+        self.snapshot_worker.error.connect(self.snapshot_error)
+        self.snapshot_worker.start()
+
+    def create_snapshot(self):
+        store_dir = self.snapshot_store_dir(ask=True)
+        if store_dir:
+            self.start_snapshot_job(store_dir, 'create')
+
+    def extract_snapshot(self):
+        store_dir = self.snapshot_store_dir()
+        if not store_dir:
+            return
         try:
-            from database.init_db import DB_PATH
-            filename, _ = QFileDialog.getSaveFileName(self, "Backup Database", "", "SQLite Files (*.db);;All Files (*)")
-            if filename:
-                import shutil
-                shutil.copy2(DB_PATH, filename)
-                QMessageBox.information(self, "Backup Complete", f"Database backed up to: {filename}")
+            from utils.block_store import LocalBlockStore, list_snapshots
+            snapshots = list_snapshots(LocalBlockStore(store_dir))
         except Exception as e:
-            QMessageBox.critical(self, "Backup Error", f"Failed to backup database: {str(e)}")
+            QMessageBox.critical(self, "Snapshot Error", f"Failed to read snapshot store: {str(e)}")
+            return
+        if not snapshots:
+            QMessageBox.information(self, "No Snapshots", f"No snapshots found in: {store_dir}")
+            return
+        labels = [f"{manifest['id']}  ({manifest['size'] / (1024 * 1024):.2f} MB)" for manifest in reversed(snapshots)]
+        label, ok = QInputDialog.getItem(self, "Extract Snapshot", "Snapshot:", labels, 0, False)
+        if not ok:
+            return
+        filename, _ = QFileDialog.getSaveFileName(self, "Extract Snapshot", "", "SQLite Files (*.db);;All Files (*)")
+        if filename:
+            self.start_snapshot_job(store_dir, 'extract', snapshot_id=label.split()[0], filename=filename)
+
+    def cleanup_snapshots(self):
+        store_dir = self.snapshot_store_dir()
+        if store_dir:
+            # Snapshots follow the same "Keep last" setting as backups
+            self.start_snapshot_job(store_dir, 'cleanup', keep=self.backup_keep_spin.value())
+
+    def snapshot_finished(self, message):
+        self.reset_backup_controls()
+        self.backup_status_label.setText(message)
+        QMessageBox.information(self, "Snapshot Store", message)
+
+    def snapshot_error(self, error_message):
+        self.reset_backup_controls()
+        self.backup_status_label.setText("Snapshot store job failed")
+        QMessageBox.critical(self, "Snapshot Error", error_message)
 
     def restore_database(self):
+        filename, _ = QFileDialog.getOpenFileName(self, "Restore Database", self.settings.value('backup_dir', ''),
+                                                  "Database Backups (*.db *.db.gz);;All Files (*)")
+        if not filename:
+            return
+        reply = QMessageBox.question(self, "Confirm Restore", 
+                                   "This will replace the current database. Are you sure?",
+                                   QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+        if reply != QMessageBox.StandardButton.Yes:
+            return
+        self.set_backup_controls_enabled(False)
+        self.backup_progress.setValue(0)
+        self.backup_progress.setVisible(True)
+        self.backup_status_label.setText("Checking backup...")
+        
+        # The backup is copied, checked and migrated off to the side; the live database is untouched until the swap
+        self.restore_worker = RestoreWorker(filename)
+        self.restore_worker.progress.connect(self.backup_progress.setValue)
+        self.restore_worker.finished.connect(self.restore_staged)
+        self.restore_worker.error.connect(self.restore_error)
+        self.restore_worker.start()
+
+    def restore_staged(self, staged):
+        self.reset_backup_controls()
         try:
-            filename, _ = QFileDialog.getOpenFileName(self, "Restore Database", "", "SQLite Files (*.db);;All Files (*)")
-            if filename:
-                reply = QMessageBox.question(self, "Confirm Restore", 
-                                           "This will replace the current database. Are you sure?",
-                                           QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
-                if reply == QMessageBox.StandardButton.Yes:
-                    from database.init_db import DB_PATH
-                    import shutil
-                    shutil.copy2(filename, DB_PATH)
-                    QMessageBox.information(self, "Restore Complete", "Database restored successfully!")
+            from database.init_db import replace_database
+            data_manager.shutdown()
+            replace_database(staged)
         except Exception as e:
-            QMessageBox.critical(self, "Restore Error", f"Failed to restore database: {str(e)}")
+            if os.path.exists(staged):
+                os.remove(staged)
+            self.restore_error(f"Failed to restore database: {str(e)}")
+            return
+        # Every module reloads once from the restored data
+        data_manager.notify_database_replaced()
+        self.load_database_info()
+        self.backup_status_label.setText("Database restored")
+        QMessageBox.information(self, "Restore Complete", "Database restored successfully!")
+
+    def restore_error(self, error_message):
+        self.reset_backup_controls()
+        self.backup_status_label.setText("Restore failed")
+        QMessageBox.critical(self, "Restore Error", error_message)
 
     def reset_database(self):
         reply = QMessageBox.question(self, "Confirm Reset", 
@@ -355,11 +603,15 @@ class SettingsModuleWidget(QWidget):
                                    QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
         if reply == QMessageBox.StandardButton.Yes:
             try:
-                from database.init_db import DB_PATH
-                if os.path.exists(DB_PATH):
-                    os.remove(DB_PATH)
+                from database.init_db import DB_PATH, close_all_connections
+                data_manager.shutdown()
+                close_all_connections(reopen=True, require_idle=True)
+                for path in (DB_PATH, DB_PATH + '-wal', DB_PATH + '-shm'):
+                    if os.path.exists(path):
+                        os.remove(path)
                 from database.init_db import init_db
                 init_db()
+                data_manager.notify_database_replaced()
                 QMessageBox.information(self, "Reset Complete", "Database has been reset to default state!")
             except Exception as e:
                 QMessageBox.critical(self, "Reset Error", f"Failed to reset database: {str(e)}") 
\ No newline at end of file
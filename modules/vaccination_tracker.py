@@ -1,4 +1,4 @@
-from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QTableWidget, QTableWidgetItem, 
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QTableView,
                              QMessageBox, QLabel, QComboBox, QDialog, QFormLayout, QDateEdit, QDialogButtonBox, 
                              QLineEdit, QFileDialog, QAbstractItemView, QHeaderView)
 from PyQt6.QtCore import Qt, QDate
@@ -6,8 +6,9 @@ import csv
 import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from database.init_db import get_connection
 from utils.data_manager import data_manager
+from utils.refresh_scheduler import RefreshScheduler
+from utils.sql_table_model import SqlTableModel, debounce_search
 
 class VaccinationDialog(QDialog):
     def __init__(self, parent=None, batches=None, vaccination=None):
@@ -54,14 +55,12 @@ class VaccinationDialog(QDialog):
 class VaccinationTrackerWidget(QWidget):
     def __init__(self):
         super().__init__()
-        self.all_rows = []  # Store all rows for filtering
+        self.batches = []
         self.init_ui()
         self.load_batches()
-        # Refresh batch list when batches change
-        try:
-            data_manager.batch_data_changed.connect(self.on_batch_data_changed)
-        except Exception:
-            pass
+        # Reload on batch changes, deferred until the page is shown
+        self.refresher = RefreshScheduler(self, self.on_batch_data_changed)
+        self.refresher.watch(data_manager.batch_data_changed, data_manager.database_replaced)
         self.load_vaccinations()
 
     def on_batch_data_changed(self):
@@ -79,7 +78,7 @@ class VaccinationTrackerWidget(QWidget):
         filter_layout.addWidget(QLabel("Search:"))
         self.search_input = QLineEdit()
         self.search_input.setPlaceholderText("Search by vaccine, status, etc...")
-        self.search_input.textChanged.connect(self.filter_table)
+        self.search_timer = debounce_search(self.search_input, self.filter_table)
         filter_layout.addWidget(self.search_input)
         
         filter_layout.addWidget(QLabel("Batch:"))
@@ -90,12 +89,15 @@ class VaccinationTrackerWidget(QWidget):
         layout.addLayout(filter_layout)
         
         # Table
-        self.table = QTableWidget()
-        self.table.setColumnCount(4)
-        self.table.setHorizontalHeaderLabels(["Batch ID", "Date", "Vaccine", "Status"])
-        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
-        self.table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
-        self.table.setSelectionMode(QTableWidget.SelectionMode.SingleSelection)
+        self.model = SqlTableModel(
+            'vaccinations', ['batch_id', 'date', 'vaccine', 'status'], ["Batch ID", "Date", "Vaccine", "Status"],
+            order_by=['date', 'rowid'], descending=True,
+            full_text=True, parent=self)
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setEditTriggers(QTableView.EditTrigger.NoEditTriggers)
+        self.table.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
+        self.table.setSelectionMode(QTableView.SelectionMode.SingleSelection)
         self.table.verticalHeader().setVisible(False)
         self.table.setAlternatingRowColors(True)
         self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
@@ -127,42 +129,33 @@ class VaccinationTrackerWidget(QWidget):
         layout.addLayout(btn_layout)
 
     def load_batches(self):
-        conn = get_connection()
-        c = conn.cursor()
-        c.execute('SELECT batch_id FROM batches ORDER BY batch_id')
-        self.batches = [row[0] for row in c.fetchall()]
+        data_manager.request_batch_list(self.set_batches)
+
+    def set_batches(self, batches):
+        self.batches = batches
         self.batch_filter.clear()
         self.batch_filter.addItem("All")
         self.batch_filter.addItems(self.batches)
-        conn.close()
 
     def load_vaccinations(self):
-        conn = get_connection()
-        c = conn.cursor()
         batch = self.batch_filter.currentText()
         if batch == "All":
-            c.execute('SELECT batch_id, date, vaccine, status FROM vaccinations ORDER BY date DESC')
+            self.model.set_filter('batch')
         else:
-            c.execute('SELECT batch_id, date, vaccine, status FROM vaccinations WHERE batch_id=? ORDER BY date DESC', (batch,))
-        rows = c.fetchall()
-        self.all_rows = rows
-        self.populate_table(rows)
-        conn.close()
-
-    def populate_table(self, rows):
-        self.table.setRowCount(len(rows))
-        for row_idx, row in enumerate(rows):
-            for col_idx, value in enumerate(row):
-                item = QTableWidgetItem(str(value) if value is not None else "")
-                self.table.setItem(row_idx, col_idx, item)
+            self.model.set_filter('batch', 'batch_id = ?', [batch])
+        self.model.reload()
 
     def filter_table(self):
-        text = self.search_input.text().lower()
-        if not text:
-            self.populate_table(self.all_rows)
-            return
-        filtered = [row for row in self.all_rows if any(text in str(cell).lower() for cell in row)]
-        self.populate_table(filtered)
+        self.model.set_search(self.search_input.text())
+        self.model.reload()
+
+    def on_write_succeeded(self, message):
+        QMessageBox.information(self, "Success", message)
+        self.load_vaccinations()
+        try:
+            data_manager.notify_vaccination_change()
+        except Exception:
+            pass
 
     def add_vaccination(self):
         dialog = VaccinationDialog(self, batches=self.batches)
@@ -171,66 +164,51 @@ class VaccinationTrackerWidget(QWidget):
             if not data['vaccine']:
                 QMessageBox.warning(self, "Validation Error", "Vaccine name is required.")
                 return
-            conn = get_connection()
-            c = conn.cursor()
-            try:
+            def insert(c):
                 c.execute('INSERT INTO vaccinations (batch_id, date, vaccine, status) VALUES (?, ?, ?, ?)',
                     (data['batch_id'], data['date'], data['vaccine'], data['status']))
-                conn.commit()
-                QMessageBox.information(self, "Success", "Vaccination added successfully.")
-                self.load_vaccinations()
-            except Exception as e:
-                QMessageBox.critical(self, "Error", f"Failed to add vaccination: {e}")
-            finally:
-                conn.close()
+            data_manager.submit_write(
+                insert,
+                on_success=lambda _: self.on_write_succeeded("Vaccination added successfully."),
+                on_error=lambda e: QMessageBox.critical(self, "Error", f"Failed to add vaccination: {e}"))
 
     def edit_vaccination(self):
-        row = self.table.currentRow()
+        row = self.table.currentIndex().row()
         if row < 0:
             QMessageBox.warning(self, "Select Vaccination", "Please select a vaccination to edit.")
             return
-        vaccination = [self.table.item(row, i).text() for i in range(4)]
+        vaccination = self.model.row_text(row)
         dialog = VaccinationDialog(self, batches=self.batches, vaccination=vaccination)
         if dialog.exec() == QDialog.DialogCode.Accepted:
             data = dialog.get_data()
-            conn = get_connection()
-            c = conn.cursor()
-            try:
+            def update(c):
                 c.execute('UPDATE vaccinations SET date=?, vaccine=?, status=? WHERE batch_id=? AND date=? AND vaccine=?',
                     (data['date'], data['vaccine'], data['status'], vaccination[0], vaccination[1], vaccination[2]))
-                conn.commit()
-                QMessageBox.information(self, "Success", "Vaccination updated successfully.")
-                self.load_vaccinations()
-            except Exception as e:
-                QMessageBox.critical(self, "Error", f"Failed to update vaccination: {e}")
-            finally:
-                conn.close()
+            data_manager.submit_write(
+                update,
+                on_success=lambda _: self.on_write_succeeded("Vaccination updated successfully."),
+                on_error=lambda e: QMessageBox.critical(self, "Error", f"Failed to update vaccination: {e}"))
 
     def delete_vaccination(self):
-        row = self.table.currentRow()
+        row = self.table.currentIndex().row()
         if row < 0:
             QMessageBox.warning(self, "Select Vaccination", "Please select a vaccination to delete.")
             return
-        vaccination = [self.table.item(row, i).text() for i in range(4)]
+        vaccination = self.model.row_text(row)
         reply = QMessageBox.question(self, "Confirm Delete", 
                                    f"Are you sure you want to delete this vaccination?\n\nBatch: {vaccination[0]}\nDate: {vaccination[1]}\nVaccine: {vaccination[2]}",
                                    QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
         if reply == QMessageBox.StandardButton.Yes:
-            conn = get_connection()
-            c = conn.cursor()
-            try:
+            def delete(c):
                 c.execute('DELETE FROM vaccinations WHERE batch_id=? AND date=? AND vaccine=?',
                     (vaccination[0], vaccination[1], vaccination[2]))
-                conn.commit()
-                QMessageBox.information(self, "Success", "Vaccination deleted successfully.")
-                self.load_vaccinations()
-            except Exception as e:
-                QMessageBox.critical(self, "Error", f"Failed to delete vaccination: {e}")
-            finally:
-                conn.close()
+            data_manager.submit_write(
+                delete,
+                on_success=lambda _: self.on_write_succeeded("Vaccination deleted successfully."),
+                on_error=lambda e: QMessageBox.critical(self, "Error", f"Failed to delete vaccination: {e}"))
 
     def export_csv(self):
-        if not self.all_rows:
+        if not self.model.rowCount():
             QMessageBox.warning(self, "No Data", "No vaccinations to export.")
             return
         filename, _ = QFileDialog.getSaveFileName(self, "Export Vaccinations", "", "CSV Files (*.csv)")
@@ -239,15 +217,17 @@ class VaccinationTrackerWidget(QWidget):
                 with open(filename, 'w', newline='', encoding='utf-8') as file:
                     writer = csv.writer(file)
                     writer.writerow(["Batch ID", "Date", "Vaccine", "Status"])
-                    writer.writerows(self.all_rows)
+                    writer.writerows(self.model.iter_rows())
                 QMessageBox.information(self, "Success", f"Vaccinations exported to {filename}")
             except Exception as e:
                 QMessageBox.critical(self, "Error", f"Failed to export: {e}")
 
     def print_table(self):
-        if not self.all_rows:
+        if not self.model.rowCount():
             QMessageBox.warning(self, "No Data", "No vaccinations to print.")
             return
+        # The printed report holds every matching row, not just the ones scrolled to
+        rows = list(self.model.iter_rows())
         
         try:
             # Try to import printing components
@@ -273,7 +253,7 @@ class VaccinationTrackerWidget(QWidget):
                 table_format = QTextTableFormat()
                 table_format.setHeaderRowCount(1)
                 table_format.setBorder(1)
-                table = cursor.insertTable(len(self.all_rows) + 1, 4, table_format)
+                table = cursor.insertTable(len(rows) + 1, 4, table_format)
                 
                 # Headers
                 headers = ["Batch ID", "Date", "Vaccine", "Status"]
@@ -283,7 +263,7 @@ class VaccinationTrackerWidget(QWidget):
                     cell_cursor.insertText(header)
                 
                 # Data
-                for row_idx, row in enumerate(self.all_rows):
+                for row_idx, row in enumerate(rows):
                     for col_idx, value in enumerate(row):
                         cell = table.cellAt(row_idx + 1, col_idx)
                         cell_cursor = cell.firstCursorPosition()
@@ -303,7 +283,7 @@ class VaccinationTrackerWidget(QWidget):
                         f.write("=" * 50 + "\n\n")
                         f.write(f"{'Batch ID':<15} {'Date':<12} {'Vaccine':<25} {'Status':<15}\n")
                         f.write("-" * 70 + "\n")
-                        for row in self.all_rows:
+                        for row in rows:
                             f.write(f"{row[0]:<15} {row[1]:<12} {row[2]:<25} {row[3]:<15}\n")
                     QMessageBox.information(self, "Success", f"Report saved as text file: {filename}")
             except Exception as save_error:
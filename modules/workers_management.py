@@ -1,12 +1,15 @@
-from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QTableWidget, QTableWidgetItem, 
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QTableView,
                              QMessageBox, QLabel, QComboBox, QDialog, QFormLayout, QDateEdit, QDialogButtonBox, 
                              QLineEdit, QFileDialog, QAbstractItemView, QHeaderView, QSpinBox, QTextEdit, QDoubleSpinBox)
 from PyQt6.QtCore import Qt, QDate
+from PyQt6.QtGui import QColor
 import csv
 import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from database.init_db import get_connection
+from utils.data_manager import data_manager
+from utils.sql_table_model import SqlTableModel, debounce_search
+from utils.refresh_scheduler import RefreshScheduler
 
 class WorkerDialog(QDialog):
     def __init__(self, parent=None, worker=None):
@@ -82,8 +85,9 @@ class WorkerDialog(QDialog):
 class WorkersManagementWidget(QWidget):
     def __init__(self):
         super().__init__()
-        self.all_rows = []  # Store all rows for filtering
         self.init_ui()
+        self.refresher = RefreshScheduler(self, self.load_workers)
+        self.refresher.watch(data_manager.database_replaced)
         self.load_workers()
 
     def init_ui(self):
@@ -97,7 +101,7 @@ class WorkersManagementWidget(QWidget):
         filter_layout.addWidget(QLabel("Search:"))
         self.search_input = QLineEdit()
         self.search_input.setPlaceholderText("Search by name, role, ID, etc...")
-        self.search_input.textChanged.connect(self.filter_table)
+        self.search_timer = debounce_search(self.search_input, self.filter_table)
         filter_layout.addWidget(self.search_input)
         
         filter_layout.addWidget(QLabel("Role:"))
@@ -137,12 +141,18 @@ class WorkersManagementWidget(QWidget):
         layout.addLayout(stats_layout)
         
         # Table
-        self.table = QTableWidget()
-        self.table.setColumnCount(9)
-        self.table.setHorizontalHeaderLabels(["Worker ID", "Name", "Role", "Phone", "Email", "Address", "Salary (₹)", "Hire Date", "Status"])
-        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
-        self.table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
-        self.table.setSelectionMode(QTableWidget.SelectionMode.SingleSelection)
+        self.model = SqlTableModel(
+            'workers', ['worker_id', 'name', 'role', 'phone', 'email', 'address', 'salary', 'hire_date', 'status'],
+            ["Worker ID", "Name", "Role", "Phone", "Email", "Address", "Salary (₹)", "Hire Date", "Status"],
+            order_by=['name', 'rowid'],
+            full_text=True, parent=self)
+        self.model.background = self.cell_background
+        self.model.loaded.connect(self.load_stats)
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setEditTriggers(QTableView.EditTrigger.NoEditTriggers)
+        self.table.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
+        self.table.setSelectionMode(QTableView.SelectionMode.SingleSelection)
         self.table.verticalHeader().setVisible(False)
         self.table.setAlternatingRowColors(True)
         self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
@@ -170,70 +180,68 @@ class WorkersManagementWidget(QWidget):
         layout.addLayout(btn_layout)
 
     def load_workers(self):
-        conn = get_connection()
-        c = conn.cursor()
-        c.execute('SELECT worker_id, name, role, phone, email, address, salary, hire_date, status FROM workers ORDER BY name')
-        rows = c.fetchall()
-        self.all_rows = rows
-        self.populate_table(rows)
-        self.update_stats(rows)
-        conn.close()
+        self.model.reload()
 
-    def populate_table(self, rows):
-        self.table.setRowCount(len(rows))
-        for row_idx, row in enumerate(rows):
-            for col_idx, value in enumerate(row):
-                item = QTableWidgetItem(str(value) if value is not None else "")
-                if col_idx == 6:  # Salary column - make it stand out
-                    item.setBackground(Qt.GlobalColor.lightGray)
-                elif col_idx == 8:  # Status column - color code
-                    if value == "Active":
-                        item.setBackground(Qt.GlobalColor.green)
-                    elif value == "Inactive":
-                        item.setBackground(Qt.GlobalColor.lightGray)
-                    elif value == "On Leave":
-                        item.setBackground(Qt.GlobalColor.yellow)
-                    elif value == "Terminated":
-                        item.setBackground(Qt.GlobalColor.red)
-                self.table.setItem(row_idx, col_idx, item)
+    def cell_background(self, column, value):
+        if column == 6:  # Salary column - make it stand out
+            return QColor(Qt.GlobalColor.lightGray)
+        if column == 8:  # Status column - color code
+            if value == "Active":
+                return QColor(Qt.GlobalColor.green)
+            elif value == "Inactive":
+                return QColor(Qt.GlobalColor.lightGray)
+            elif value == "On Leave":
+                return QColor(Qt.GlobalColor.yellow)
+            elif value == "Terminated":
+                return QColor(Qt.GlobalColor.red)
+        return None
 
-    def update_stats(self, rows):
-        if not rows:
+    def load_stats(self):
+        where, params = self.model.where()
+        def query(c):
+            c.execute(f'''SELECT COUNT(*), SUM(status = 'Active'), SUM(salary)
+                         FROM workers WHERE {where}''', params)
+            return c.fetchone()
+        data_manager.submit_query(query, key='workers_stats', on_result=lambda row: self.update_stats(*row))
+
+    def update_stats(self, total_workers, active_workers, total_salary):
+        if not total_workers:
             self.total_workers_label.setText("Total Workers: 0")
             self.active_workers_label.setText("Active: 0")
             self.total_salary_label.setText("Total Salary: ₹0")
             self.avg_salary_label.setText("Avg Salary: ₹0")
             return
         
-        total_workers = len(rows)
-        active_workers = len([row for row in rows if row[8] == "Active"])
-        total_salary = sum(row[6] for row in rows if row[6] is not None)
-        avg_salary = total_salary / total_workers if total_workers > 0 else 0
+        total_salary = total_salary or 0
+        avg_salary = total_salary / total_workers
         
         self.total_workers_label.setText(f"Total Workers: {total_workers}")
-        self.active_workers_label.setText(f"Active: {active_workers}")
+        self.active_workers_label.setText(f"Active: {active_workers or 0}")
         self.total_salary_label.setText(f"Total Salary: ₹{total_salary:,.2f}")
         self.avg_salary_label.setText(f"Avg Salary: ₹{avg_salary:,.2f}")
 
     def filter_table(self):
-        text = self.search_input.text().lower()
         role_filter = self.role_filter.currentText()
         status_filter = self.status_filter.currentText()
         
-        filtered = []
-        for row in self.all_rows:
-            # Text search
-            text_match = not text or any(text in str(cell).lower() for cell in row)
-            # Role filter
-            role_match = role_filter == "All" or row[2] == role_filter
-            # Status filter
-            status_match = status_filter == "All" or row[8] == status_filter
-            
-            if text_match and role_match and status_match:
-                filtered.append(row)
-        
-        self.populate_table(filtered)
-        self.update_stats(filtered)
+        self.model.set_search(self.search_input.text())
+        if role_filter == "All":
+            self.model.set_filter('role')
+        else:
+            self.model.set_filter('role', 'role = ?', [role_filter])
+        if status_filter == "All":
+            self.model.set_filter('status')
+        else:
+            self.model.set_filter('status', 'status = ?', [status_filter])
+        self.model.reload()
+
+    def on_write_succeeded(self, message):
+        QMessageBox.information(self, "Success", message)
+        self.load_workers()
+        try:
+            data_manager.notify_worker_change()
+        except Exception:
+            pass
 
     def add_worker(self):
         dialog = WorkerDialog(self)
@@ -242,69 +250,54 @@ class WorkersManagementWidget(QWidget):
             if not data['worker_id'] or not data['name']:
                 QMessageBox.warning(self, "Validation Error", "Worker ID and Name are required.")
                 return
-            conn = get_connection()
-            c = conn.cursor()
-            try:
+            def insert(c):
                 c.execute('''INSERT INTO workers (worker_id, name, role, phone, email, address, salary, hire_date, status) 
                              VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)''',
                     (data['worker_id'], data['name'], data['role'], data['phone'], data['email'], 
                      data['address'], data['salary'], data['hire_date'], data['status']))
-                conn.commit()
-                QMessageBox.information(self, "Success", "Worker added successfully.")
-                self.load_workers()
-            except Exception as e:
-                QMessageBox.critical(self, "Error", f"Failed to add worker: {e}")
-            finally:
-                conn.close()
+            data_manager.submit_write(
+                insert,
+                on_success=lambda _: self.on_write_succeeded("Worker added successfully."),
+                on_error=lambda e: QMessageBox.critical(self, "Error", f"Failed to add worker: {e}"))
 
     def edit_worker(self):
-        row = self.table.currentRow()
+        row = self.table.currentIndex().row()
         if row < 0:
             QMessageBox.warning(self, "Select Worker", "Please select a worker to edit.")
             return
-        worker = [self.table.item(row, i).text() for i in range(9)]
+        worker = self.model.row_text(row)
         dialog = WorkerDialog(self, worker=worker)
         if dialog.exec() == QDialog.DialogCode.Accepted:
             data = dialog.get_data()
-            conn = get_connection()
-            c = conn.cursor()
-            try:
+            def update(c):
                 c.execute('''UPDATE workers SET name=?, role=?, phone=?, email=?, address=?, salary=?, hire_date=?, status=? 
                              WHERE worker_id=?''',
                     (data['name'], data['role'], data['phone'], data['email'], data['address'], 
                      data['salary'], data['hire_date'], data['status'], data['worker_id']))
-                conn.commit()
-                QMessageBox.information(self, "Success", "Worker updated successfully.")
-                self.load_workers()
-            except Exception as e:
-                QMessageBox.critical(self, "Error", f"Failed to update worker: {e}")
-            finally:
-                conn.close()
+            data_manager.submit_write(
+                update,
+                on_success=lambda _: self.on_write_succeeded("Worker updated successfully."),
+                on_error=lambda e: QMessageBox.critical(self, "Error", f"Failed to update worker: {e}"))
 
     def delete_worker(self):
-        row = self.table.currentRow()
+        row = self.table.currentIndex().row()
         if row < 0:
             QMessageBox.warning(self, "Select Worker", "Please select a worker to delete.")
             return
-        worker = [self.table.item(row, i).text() for i in range(9)]
+        worker = self.model.row_text(row)
         reply = QMessageBox.question(self, "Confirm Delete", 
                                    f"Are you sure you want to delete this worker?\n\nID: {worker[0]}\nName: {worker[1]}\nRole: {worker[2]}",
                                    QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
         if reply == QMessageBox.StandardButton.Yes:
-            conn = get_connection()
-            c = conn.cursor()
-            try:
+            def delete(c):
                 c.execute('DELETE FROM workers WHERE worker_id=?', (worker[0],))
-                conn.commit()
-                QMessageBox.information(self, "Success", "Worker deleted successfully.")
-                self.load_workers()
-            except Exception as e:
-                QMessageBox.critical(self, "Error", f"Failed to delete worker: {e}")
-            finally:
-                conn.close()
+            data_manager.submit_write(
+                delete,
+                on_success=lambda _: self.on_write_succeeded("Worker deleted successfully."),
+                on_error=lambda e: QMessageBox.critical(self, "Error", f"Failed to delete worker: {e}"))
 
     def export_csv(self):
-        if not self.all_rows:
+        if not self.model.rowCount():
             QMessageBox.warning(self, "No Data", "No workers to export.")
             return
         filename, _ = QFileDialog.getSaveFileName(self, "Export Workers", "", "CSV Files (*.csv)")
@@ -313,7 +306,7 @@ class WorkersManagementWidget(QWidget):
                 with open(filename, 'w', newline='', encoding='utf-8') as file:
                     writer = csv.writer(file)
                     writer.writerow(["Worker ID", "Name", "Role", "Phone", "Email", "Address", "Salary (₹)", "Hire Date", "Status"])
-                    writer.writerows(self.all_rows)
+                    writer.writerows(self.model.iter_rows())
                 QMessageBox.information(self, "Success", f"Workers exported to {filename}")
             except Exception as e:
                 QMessageBox.critical(self, "Error", f"Failed to export: {e}") 
\ No newline at end of file
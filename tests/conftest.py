@@ -0,0 +1,16 @@
+import os
+import sys
+import pytest
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+from database import init_db
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """A freshly migrated database in tmp_path, used by every connection the app opens"""
+    init_db.close_all_connections(reopen=True)
+    monkeypatch.setattr(init_db, 'DB_PATH', str(tmp_path / 'dash_poultry.db'))
+    init_db.init_db()
+    yield init_db.DB_PATH
+    init_db.close_all_connections(reopen=True)
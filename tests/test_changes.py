@@ -0,0 +1,70 @@
+from database import changes
+from database.init_db import open_connection
+
+COLUMNS = ['date', 'category', 'amount']
+
+
+def add_expense(c, amount):
+    c.execute("INSERT INTO expenses (date, category, amount) VALUES ('2024-06-01', 'Feed', ?)", (amount,))
+    return c.lastrowid
+
+
+def net_changes(c, since, until):
+    sql, params = changes.changes_query('expenses', COLUMNS, since, until)
+    c.execute(sql, params)
+    return {row[1]: (row[0], row[4]) for row in c.fetchall()}
+
+
+def test_each_row_appears_once_with_its_net_operation(db):
+    conn = open_connection()
+    c = conn.cursor()
+    kept, updated, deleted, updated_then_deleted = (add_expense(c, n) for n in (1, 2, 3, 4))
+    since = changes.journal_head(c)
+
+    inserted = add_expense(c, 5)
+    inserted_then_updated = add_expense(c, 6)
+    inserted_then_deleted = add_expense(c, 7)
+    c.execute('UPDATE expenses SET amount = 20 WHERE id = ?', (updated,))
+    c.execute('UPDATE expenses SET amount = 21 WHERE id = ?', (updated,))
+    c.execute('DELETE FROM expenses WHERE id = ?', (deleted,))
+    c.execute('UPDATE expenses SET amount = 60 WHERE id = ?', (inserted_then_updated,))
+    c.execute('DELETE FROM expenses WHERE id = ?', (inserted_then_deleted,))
+    c.execute('UPDATE expenses SET amount = 40 WHERE id = ?', (updated_then_deleted,))
+    c.execute('DELETE FROM expenses WHERE id = ?', (updated_then_deleted,))
+    until = changes.journal_head(c)
+
+    assert net_changes(c, since, until) == {
+        inserted: ('I', 5),
+        inserted_then_updated: ('I', 60),
+        updated: ('U', 21),
+        deleted: ('D', None),
+        updated_then_deleted: ('D', None),
+    }
+    # Nothing changed after until
+    assert net_changes(c, until, changes.journal_head(c)) == {}
+    conn.close()
+
+
+def test_watermarks_and_pruning_are_per_table(db):
+    conn = open_connection()
+    c = conn.cursor()
+    c.execute("INSERT INTO mortality (batch_id, date, count) VALUES ('B001', '2024-06-01', 1)")
+    add_expense(c, 1)
+    head = changes.journal_head(c)
+
+    changes.record_watermark(c, 'usb', 'mortality', head)
+    changes.prune_journal(c)
+    assert changes.read_watermark(c, 'usb', 'mortality') == head
+    assert changes.read_watermark(c, 'usb', 'expenses') is None
+    c.execute('SELECT DISTINCT table_name FROM change_journal')
+    # The expense was never exported, so its journal entry stays
+    assert [row[0] for row in c.fetchall()] == ['expenses']
+
+    # A second destination holds mortality entries back until it has exported them too
+    c.execute("INSERT INTO mortality (batch_id, date, count) VALUES ('B001', '2024-06-02', 2)")
+    changes.record_watermark(c, 'share', 'mortality', head)
+    changes.record_watermark(c, 'usb', 'mortality', changes.journal_head(c))
+    changes.prune_journal(c)
+    c.execute("SELECT COUNT(*) FROM change_journal WHERE table_name = 'mortality'")
+    assert c.fetchone()[0] == 1
+    conn.close()
@@ -0,0 +1,97 @@
+import threading
+from database.connection_pool import ConnectionManager
+
+
+class FakeConnection:
+    in_transaction = False
+
+    def __init__(self):
+        self.healthy = True
+        self.closed = False
+
+    def execute(self, sql):
+        if not self.healthy or self.closed:
+            raise RuntimeError('connection is broken')
+        return self
+
+    def fetchone(self):
+        return (1,)
+
+    def close(self):
+        self.closed = True
+
+
+def on_thread(func):
+    result = []
+    thread = threading.Thread(target=lambda: result.append(func()))
+    thread.start()
+    return thread, result
+
+
+def test_waiting_checkout_skips_a_broken_connection():
+    opened = []
+    manager = ConnectionManager(lambda: opened.append(FakeConnection()) or opened[-1], max_pool_size=1, timeout=5)
+    holding, release = threading.Event(), threading.Event()
+
+    def hold():
+        conn = manager.acquire()
+        holding.set()
+        release.wait()
+        opened[0].healthy = False
+        conn.close()
+
+    holder, _ = on_thread(hold)
+    holding.wait()
+    # The pool is full, so this checkout blocks until the broken connection comes back
+    waiter, result = on_thread(lambda: manager.acquire()._conn)
+    release.set()
+    holder.join()
+    waiter.join()
+    assert result == [opened[1]]
+    assert opened[0].closed
+
+
+def test_connection_checked_out_before_close_all_is_not_reused():
+    opened = []
+    manager = ConnectionManager(lambda: opened.append(FakeConnection()) or opened[-1])
+    holding, release = threading.Event(), threading.Event()
+
+    def hold():
+        conn = manager.acquire()
+        holding.set()
+        release.wait()
+        conn.close()
+
+    holder, _ = on_thread(hold)
+    holding.wait()
+    manager.close_all()
+    manager.reopen()
+    release.set()
+    holder.join()
+    assert opened[0].closed
+    reader, result = on_thread(lambda: manager.acquire()._conn)
+    reader.join()
+    assert result == [opened[1]]
+
+
+def test_close_all_can_require_idle():
+    manager = ConnectionManager(FakeConnection)
+    holding, release = threading.Event(), threading.Event()
+
+    def hold():
+        conn = manager.acquire()
+        holding.set()
+        release.wait()
+        conn.close()
+
+    holder, _ = on_thread(hold)
+    holding.wait()
+    try:
+        manager.close_all(require_idle=True)
+        refused = False
+    except RuntimeError:
+        refused = True
+    release.set()
+    holder.join()
+    assert refused
+    manager.close_all(require_idle=True)
@@ -0,0 +1,35 @@
+import time
+from PyQt6.QtCore import QCoreApplication
+from database.init_db import open_connection
+from utils.data_manager import data_manager
+
+
+def request_batch_list():
+    results = []
+    data_manager.request_batch_list(results.append)
+    deadline = time.monotonic() + 5
+    while not results and time.monotonic() < deadline:
+        QCoreApplication.processEvents()
+        time.sleep(0.01)
+    return results[0]
+
+
+def test_batch_list_is_cached_until_batches_change(db):
+    app = QCoreApplication.instance() or QCoreApplication([])
+    data_manager.invalidate()
+    hits, misses = data_manager.cache_hits, data_manager.cache_misses
+    first = request_batch_list()
+    assert request_batch_list() == first
+    assert (data_manager.cache_hits - hits, data_manager.cache_misses - misses) == (1, 1)
+
+    conn = open_connection()
+    conn.execute("INSERT INTO batches (batch_id) VALUES ('Z999')")
+    conn.commit()
+    conn.close()
+    # Unrelated changes keep the entry; a batch change drops it
+    data_manager.notify_expense_change()
+    assert request_batch_list() == first
+    data_manager.notify_batch_change()
+    assert request_batch_list() == first + ['Z999']
+    data_manager.flush_changes()
+    app.processEvents()
@@ -0,0 +1,68 @@
+import csv
+import queue
+from PyQt6.QtCore import Qt
+from database.init_db import open_connection
+from database.write_queue import WriteQueue
+from modules.export_module import ExportWorker
+
+ROWS = 20000
+INSERT = ("INSERT INTO expenses (date, category, amount, description, payment_method) "
+          "VALUES ('2024-07-01', 'Feed', 1, 'during export', 'Cash')")
+
+
+def add_expenses(rows):
+    conn = open_connection()
+    conn.executemany("INSERT INTO expenses (date, category, amount, description, payment_method) "
+                     "VALUES ('2024-06-01', 'Feed', ?, 'seed', 'Cash')", ((i,) for i in range(rows)))
+    conn.commit()
+    conn.close()
+
+
+def count_expenses():
+    conn = open_connection()
+    try:
+        return conn.execute('SELECT COUNT(*) FROM expenses').fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_writes_commit_while_export_reads(db, tmp_path):
+    add_expenses(ROWS)
+    before = count_expenses()
+    completed = queue.Queue()
+    writer = WriteQueue(open_connection, completed.put)
+    committed = []
+    stalled = []
+
+    def write_during_export(percent):
+        # Runs on the export's thread, inside its read snapshot: the export
+        # does not continue until the writer thread has committed
+        if percent >= 100:
+            return
+        job = writer.submit(lambda c: c.execute(INSERT))
+        try:
+            done = completed.get(timeout=10)
+        except queue.Empty:
+            stalled.append(percent)
+            return
+        committed.append(done is job and done.error is None)
+
+    filename = str(tmp_path / 'expenses.csv')
+    worker = ExportWorker("Expenses", "CSV", filename)
+    worker.chunk_size = 1000
+    errors = []
+    worker.error.connect(errors.append, Qt.ConnectionType.DirectConnection)
+    worker.progress.connect(write_during_export, Qt.ConnectionType.DirectConnection)
+    try:
+        worker.run()
+    finally:
+        writer.stop()
+
+    assert errors == []
+    assert stalled == []
+    assert committed and all(committed)
+    with open(filename, newline='', encoding='utf-8') as file:
+        exported = sum(1 for _ in csv.reader(file)) - 1
+    # The export holds exactly the rows of its snapshot, none of the concurrent inserts
+    assert exported == before
+    assert count_expenses() == before + len(committed)
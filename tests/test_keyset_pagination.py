@@ -0,0 +1,42 @@
+import random
+import pytest
+from database.init_db import open_connection
+from utils.sql_table_model import SqlTableModel
+
+
+def read_in_pages(model, c):
+    """Walk the model's keyset pages synchronously, as fetchMore() does on the query pool"""
+    rows, last = [], None
+    while True:
+        page = model._fetch(c, model._page_queries(last))
+        rows.extend(page)
+        if len(page) < model.page_size:
+            return rows
+        last = [page[-1][i] for i in model._key_index]
+
+
+@pytest.mark.parametrize('descending', [False, True])
+@pytest.mark.parametrize('category', [None, 'Feed'])
+def test_pages_read_every_row_once_in_order(db, descending, category):
+    rng = random.Random(3)
+    conn = open_connection()
+    c = conn.cursor()
+    # Few distinct dates (so pages split ties) and some NULL dates
+    c.executemany("INSERT INTO expenses (date, category, amount) VALUES (?, ?, ?)",
+                  [(rng.choice(['2024-06-01', '2024-06-02', '2024-06-03', None]), rng.choice(['Feed', 'Labor']), i)
+                   for i in range(500)])
+    conn.commit()
+    model = SqlTableModel('expenses', ['date', 'category', 'amount'], ['Date', 'Category', 'Amount'],
+                          order_by=['date', 'id'], descending=descending, page_size=37)
+    if category:
+        model.set_filter('category', 'category = ?', [category])
+
+    paged = [row[-1] for row in read_in_pages(model, c)]
+
+    where, params = model.where()
+    direction = ' DESC' if descending else ''
+    c.execute(f'SELECT id FROM expenses WHERE {where} ORDER BY date{direction}, id{direction}', params)
+    expected = [row[0] for row in c.fetchall()]
+    conn.close()
+    assert paged == expected
+    assert len(expected) > 3 * model.page_size
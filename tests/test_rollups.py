@@ -0,0 +1,68 @@
+import random
+from database.init_db import open_connection
+from database.rollups import ROLLUP_TABLES, rebuild_rollups
+
+
+def rollup_contents(c):
+    """Every rollup table's rows, with sums rounded so float order doesn't matter"""
+    contents = {}
+    for table in ROLLUP_TABLES:
+        c.execute(f'SELECT * FROM {table}')
+        contents[table] = sorted(tuple(round(v, 6) if isinstance(v, float) else v for v in row)
+                                 for row in c.fetchall())
+    return contents
+
+
+def test_triggers_match_a_rebuild(db):
+    """Inserts, updates (including moved keys) and deletes keep every rollup equal to a full recompute"""
+    rng = random.Random(7)
+    dates = ['2024-06-01', '2024-06-02', '2024-07-15', None]
+    batches = ['B001', 'B002', 'B003']
+    conn = open_connection()
+    c = conn.cursor()
+    for _ in range(300):
+        table = rng.choice(['feed_logs', 'water_logs', 'expenses', 'revenue'])
+        c.execute(f'SELECT id FROM {table}')
+        ids = [row[0] for row in c.fetchall()]
+        action = rng.choice(['insert', 'insert', 'update', 'delete']) if ids else 'insert'
+        amount = rng.choice([rng.uniform(1, 100), None])
+        if table == 'feed_logs':
+            values = {'batch_id': rng.choice(batches), 'date': rng.choice(dates), 'quantity_kg': amount}
+        elif table == 'water_logs':
+            values = {'batch_id': rng.choice(batches), 'date': rng.choice(dates), 'quantity_l': amount}
+        elif table == 'expenses':
+            values = {'date': rng.choice(dates), 'category': rng.choice(['Feed', 'Labor']), 'amount': amount}
+        else:
+            values = {'batch_id': rng.choice(batches), 'date': rng.choice(dates), 'amount': amount}
+        if action == 'insert':
+            c.execute(f"INSERT INTO {table} ({', '.join(values)}) VALUES ({', '.join('?' for _ in values)})",
+                      list(values.values()))
+        elif action == 'update':
+            c.execute(f"UPDATE {table} SET {', '.join(f'{col} = ?' for col in values)} WHERE id = ?",
+                      list(values.values()) + [rng.choice(ids)])
+        else:
+            c.execute(f'DELETE FROM {table} WHERE id = ?', (rng.choice(ids),))
+    conn.commit()
+    maintained = rollup_contents(c)
+    c.execute('BEGIN')
+    rebuild_rollups(c)
+    rebuilt = rollup_contents(c)
+    conn.rollback()
+    conn.close()
+    assert maintained == rebuilt
+    assert any(maintained.values())
+
+
+def test_last_row_removes_its_key(db):
+    conn = open_connection()
+    c = conn.cursor()
+    c.execute("INSERT INTO revenue (date, batch_id, amount) VALUES ('2031-01-05', 'B009', 10)")
+    row_id = c.lastrowid
+    c.execute("SELECT revenue, revenue_rows FROM monthly_financials WHERE month = '2031-01'")
+    assert c.fetchone() == (10, 1)
+    c.execute('DELETE FROM revenue WHERE id = ?', (row_id,))
+    c.execute("SELECT COUNT(*) FROM monthly_financials WHERE month = '2031-01'")
+    assert c.fetchone()[0] == 0
+    c.execute("SELECT COUNT(*) FROM revenue_by_batch WHERE batch_id = 'B009'")
+    assert c.fetchone()[0] == 0
+    conn.close()
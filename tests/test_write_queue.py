@@ -0,0 +1,43 @@
+import queue
+import sqlite3
+from database.write_queue import WriteQueue
+
+
+def test_failed_connect_fails_queued_jobs_and_next_submit_retries(tmp_path):
+    path = str(tmp_path / 'writes.db')
+    attempts = []
+
+    def connect():
+        attempts.append(path)
+        if len(attempts) == 1:
+            raise sqlite3.OperationalError('unable to open database file')
+        return sqlite3.connect(path, check_same_thread=False)
+
+    completed = queue.Queue()
+    writer = WriteQueue(connect, completed.put)
+    failed = writer.submit(lambda c: c.execute('CREATE TABLE t (x)'))
+    assert completed.get(timeout=5) is failed
+    assert isinstance(failed.error, sqlite3.OperationalError)
+
+    job = writer.submit(lambda c: c.execute('CREATE TABLE t (x)'))
+    assert completed.get(timeout=5) is job
+    assert job.error is None
+    writer.stop()
+    assert len(attempts) == 2
+
+
+def test_failing_job_does_not_lose_the_rest_of_its_burst(tmp_path):
+    path = str(tmp_path / 'writes.db')
+    completed = queue.Queue()
+    writer = WriteQueue(lambda: sqlite3.connect(path, check_same_thread=False), completed.put)
+    writer.submit(lambda c: c.execute('CREATE TABLE t (x UNIQUE)'))
+    jobs = [writer.submit(lambda c, x=x: c.execute('INSERT INTO t VALUES (?)', (x,))) for x in (1, 1, 2)]
+    writer.stop()
+    results = {}
+    while not completed.empty():
+        job = completed.get()
+        results[id(job)] = job.error
+    assert [results[id(job)] is None for job in jobs] == [True, False, True]
+    conn = sqlite3.connect(path)
+    assert conn.execute('SELECT x FROM t ORDER BY x').fetchall() == [(1,), (2,)]
+    conn.close()
@@ -6,7 +6,7 @@ import bcrypt
 import sys
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from database import init_db
-from ui.main_window import MainWindow
+from utils import startup
 
 class LoginWindow(QWidget):
     def __init__(self):
@@ -66,6 +66,9 @@ class LoginWindow(QWidget):
 
     def handle_login(self):
         from database.init_db import get_connection
+        startup.mark('login submitted')
+        # Warm up the main window's plotting libraries while bcrypt runs
+        startup.preload()
         username = self.user_input.text().strip()
         password = self.pass_input.text().encode()
         conn = get_connection()
@@ -80,6 +83,9 @@ class LoginWindow(QWidget):
 
     def open_main_window(self):
         print("Opening main window...")
+        startup.wait_for_preload()
+        from ui.main_window import MainWindow
+        startup.mark('main window imported')
         self.main_window = MainWindow()
         self.main_window.show()
         self.close() 
\ No newline at end of file
@@ -1,21 +1,14 @@
 from PyQt6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QStackedWidget, QListWidget, QListWidgetItem, QFrame)
 from PyQt6.QtGui import QIcon
-from PyQt6.QtCore import Qt, QSize
+from PyQt6.QtCore import Qt, QSize, QEvent, QTimer
 import os
 import sys
+import time
+import importlib
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from utils.data_manager import data_manager
 from utils.notification_manager import NotificationManager
-from modules.dashboard import DashboardWidget
-from modules.batch_management import BatchManagementWidget
-from modules.feed_water_logs import FeedWaterLogsWidget
-from modules.vaccination_tracker import VaccinationTrackerWidget
-from modules.mortality_tracker import MortalityTrackerWidget
-from modules.workers_management import WorkersManagementWidget
-from modules.expenses_management import ExpensesManagementWidget
-from modules.profit_loss_analysis import ProfitLossAnalysisWidget
-from modules.export_module import ExportModuleWidget
-from modules.settings_module import SettingsModuleWidget
+from utils import startup
 
 MODULES = [
     ("Dashboard", "dashboard"),
@@ -30,9 +23,33 @@ MODULES = [
     ("Settings", "settings"),
 ]
 
+# (module, widget class) for each sidebar entry, in the same order. Modules
+# are only imported and built the first time they are shown (or prefetched
+# once the window is idle).
+MODULE_WIDGETS = [
+    ('modules.dashboard', 'DashboardWidget'),
+    ('modules.batch_management', 'BatchManagementWidget'),
+    ('modules.feed_water_logs', 'FeedWaterLogsWidget'),
+    ('modules.vaccination_tracker', 'VaccinationTrackerWidget'),
+    ('modules.mortality_tracker', 'MortalityTrackerWidget'),
+    ('modules.workers_management', 'WorkersManagementWidget'),
+    ('modules.expenses_management', 'ExpensesManagementWidget'),
+    ('modules.profit_loss_analysis', 'ProfitLossAnalysisWidget'),
+    ('modules.export_module', 'ExportModuleWidget'),
+    ('modules.settings_module', 'SettingsModuleWidget'),
+]
+# Widgets whose constructor takes the main window
+NEEDS_MAIN_WINDOW = {'SettingsModuleWidget'}
+
 class MainWindow(QMainWindow):
+    # Build the remaining modules one at a time once the dashboard has painted
+    prefetch_modules = True
+    prefetch_delay_ms = 1500
+
     def __init__(self):
         super().__init__()
+        self.created_at = time.perf_counter()
+        self.first_paint_ms = None
         self.setWindowTitle("Dash Poultry")
         self.setMinimumSize(1280, 720)
         self.setWindowIcon(QIcon(os.path.join('resources', 'logo.png')))
@@ -103,34 +120,13 @@ class MainWindow(QMainWindow):
         top_bar.addWidget(self.logout_btn)
         central_layout.addLayout(top_bar)
 
-        # Stacked widget for modules
+        # Stacked widget for modules: an empty placeholder per sidebar entry,
+        # swapped for the real widget by module_widget()
         self.stack = QStackedWidget()
-        # Create widgets and store references
-        self.dashboard_widget = DashboardWidget()
-        self.batch_widget = BatchManagementWidget()
-        self.feed_water_widget = FeedWaterLogsWidget()
-        self.vaccination_widget = VaccinationTrackerWidget()
-        self.mortality_widget = MortalityTrackerWidget()
-        self.workers_widget = WorkersManagementWidget()
-        self.expenses_widget = ExpensesManagementWidget()
-        self.profit_loss_widget = ProfitLossAnalysisWidget()
-        self.export_widget = ExportModuleWidget()
-        self.settings_widget = SettingsModuleWidget(self)
-        
-        # Add widgets to stack
-        self.stack.addWidget(self.dashboard_widget)
-        self.stack.addWidget(self.batch_widget)
-        self.stack.addWidget(self.feed_water_widget)
-        self.stack.addWidget(self.vaccination_widget)
-        self.stack.addWidget(self.mortality_widget)
-        self.stack.addWidget(self.workers_widget)
-        self.stack.addWidget(self.expenses_widget)
-        self.stack.addWidget(self.profit_loss_widget)
-        self.stack.addWidget(self.export_widget)
-        self.stack.addWidget(self.settings_widget)
-        
-        # Connect dashboard signals
-        self.dashboard_widget.module_switch_requested.connect(self.switch_module)
+        self.module_widgets = [None] * len(MODULE_WIDGETS)
+        for _ in MODULE_WIDGETS:
+            self.stack.addWidget(QWidget())
+        self.dashboard_widget = self.module_widget(0)
         central_layout.addWidget(self.stack)
         
         # Add notification area
@@ -143,9 +139,45 @@ class MainWindow(QMainWindow):
         self.setCentralWidget(main_widget)
         self.load_theme()
 
+    def module_widget(self, idx):
+        """The module widget at idx, building it in place of its placeholder on first use"""
+        widget = self.module_widgets[idx]
+        if widget is None:
+            module_name, class_name = MODULE_WIDGETS[idx]
+            widget_class = getattr(importlib.import_module(module_name), class_name)
+            widget = widget_class(self) if class_name in NEEDS_MAIN_WINDOW else widget_class()
+            if hasattr(widget, 'module_switch_requested'):
+                widget.module_switch_requested.connect(self.switch_module)
+            current = self.stack.currentIndex()
+            placeholder = self.stack.widget(idx)
+            self.stack.removeWidget(placeholder)
+            placeholder.deleteLater()
+            self.stack.insertWidget(idx, widget)
+            self.stack.setCurrentIndex(current)
+            self.module_widgets[idx] = widget
+        return widget
+
     def switch_module(self, idx):
+        self.module_widget(idx)
         self.stack.setCurrentIndex(idx)
 
+    def event(self, event):
+        if event.type() == QEvent.Type.Paint and self.first_paint_ms is None:
+            self.first_paint_ms = (time.perf_counter() - self.created_at) * 1000
+            startup.mark('main window first paint')
+            startup.report()
+            if self.prefetch_modules:
+                QTimer.singleShot(self.prefetch_delay_ms, self.prefetch_next_module)
+        return super().event(event)
+
+    def prefetch_next_module(self):
+        """Build one not-yet-shown module, then yield to the event loop before the next"""
+        for idx, widget in enumerate(self.module_widgets):
+            if widget is None:
+                self.module_widget(idx)
+                QTimer.singleShot(0, self.prefetch_next_module)
+                return
+
     def toggle_theme(self):
         self.theme = 'dark' if self.theme == 'light' else 'light'
         self.load_theme()
@@ -215,41 +247,39 @@ class MainWindow(QMainWindow):
         data_manager.worker_data_changed.connect(self.on_worker_data_changed)
         data_manager.expense_data_changed.connect(self.on_expense_data_changed)
         data_manager.revenue_data_changed.connect(self.on_revenue_data_changed)
+        data_manager.background_error.connect(self.on_background_error)
+    
+    def on_background_error(self, message):
+        """Handle a failed background write or query nobody else reported"""
+        notification_manager.show_error("Database Error", message)
     
     def on_batch_data_changed(self):
         """Handle batch data changes"""
         notification_manager.show_success("Batch Updated", "Batch information has been updated successfully.")
-        self.dashboard_widget.refresh_data()
     
     def on_feed_water_data_changed(self):
         """Handle feed/water data changes"""
         notification_manager.show_info("Feed/Water Logged", "Feed and water consumption has been recorded.")
-        self.dashboard_widget.refresh_data()
     
     def on_vaccination_data_changed(self):
         """Handle vaccination data changes"""
         notification_manager.show_success("Vaccination Recorded", "Vaccination information has been saved.")
-        self.dashboard_widget.refresh_data()
     
     def on_mortality_data_changed(self):
         """Handle mortality data changes"""
         notification_manager.show_warning("Mortality Recorded", "Mortality data has been updated.")
-        self.dashboard_widget.refresh_data()
     
     def on_worker_data_changed(self):
         """Handle worker data changes"""
         notification_manager.show_info("Worker Updated", "Worker information has been modified.")
-        self.dashboard_widget.refresh_data()
     
     def on_expense_data_changed(self):
         """Handle expense data changes"""
         notification_manager.show_info("Expense Recorded", "New expense has been added to the system.")
-        self.dashboard_widget.refresh_data()
     
     def on_revenue_data_changed(self):
         """Handle revenue data changes"""
         notification_manager.show_success("Revenue Recorded", "Revenue information has been updated.")
-        self.dashboard_widget.refresh_data()
 
     def logout(self):
         self.close()
@@ -0,0 +1,155 @@
+import glob
+import gzip
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from database import init_db
+from database.init_db import open_connection, read_snapshot, get_schema_version, run_migrations, SCHEMA_VERSION
+
+# Pages copied per backup step; the source is only read between progress callbacks
+BACKUP_PAGES_PER_STEP = 256
+# Pause between steps so the copy doesn't starve the app's own queries of disk
+BACKUP_STEP_SLEEP = 0.002
+BACKUP_PREFIX = 'dash_poultry-'
+
+
+class BackupCancelled(Exception):
+    pass
+
+
+def backup_filename(directory, compress=False):
+    """Timestamped backup path in directory; rotate_backups() relies on the pattern"""
+    stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+    return os.path.join(directory, f"{BACKUP_PREFIX}{stamp}.db" + ('.gz' if compress else ''))
+
+
+def online_backup(target_path, pages=BACKUP_PAGES_PER_STEP, throttle=BACKUP_STEP_SLEEP, progress=None, cancel=None):
+    """Copy the live database to target_path with the sqlite3 backup API.
+
+    The copy runs in steps of pages pages under one read snapshot, so it is
+    consistent and the writer thread keeps committing meanwhile (without the
+    snapshot every commit would restart the backup). progress(done, total)
+    is called after each step; cancel() returning True stops the copy.
+    """
+    def step(status, remaining, total):
+        if cancel is not None and cancel():
+            raise BackupCancelled()
+        if progress is not None:
+            progress(total - remaining, total)
+        if throttle:
+            time.sleep(throttle)
+
+    target = open_connection(target_path)
+    try:
+        with read_snapshot() as conn:
+            conn.backup(target, pages=pages, progress=step)
+        # A standalone file: fold the copy's WAL back in before it is moved or compressed
+        target.execute('PRAGMA journal_mode = DELETE')
+    finally:
+        target.close()
+
+
+def integrity_check(path):
+    """Problems PRAGMA integrity_check reports for the database at path (empty if sound)"""
+    conn = open_connection(path)
+    try:
+        rows = conn.execute('PRAGMA integrity_check').fetchall()
+    finally:
+        conn.close()
+    return [] if rows == [('ok',)] else [row[0] for row in rows]
+
+
+def compress_file(path):
+    """gzip path to path + '.gz' and remove the original; returns the new path"""
+    compressed = path + '.gz'
+    with open(path, 'rb') as source, gzip.open(compressed, 'wb', compresslevel=6) as target:
+        shutil.copyfileobj(source, target, 1 << 20)
+    os.remove(path)
+    return compressed
+
+
+def rotate_backups(directory, keep):
+    """Delete all but the newest keep backups in directory; returns the removed paths"""
+    backups = glob.glob(os.path.join(directory, BACKUP_PREFIX + '*.db'))
+    backups += glob.glob(os.path.join(directory, BACKUP_PREFIX + '*.db.gz'))
+    # The timestamp in the name sorts chronologically
+    backups.sort(key=lambda path: os.path.basename(path).removesuffix('.gz'))
+    removed = backups[:-keep] if keep > 0 else []
+    for path in removed:
+        os.remove(path)
+    return removed
+
+
+def create_backup(directory, compress=False, keep=0, progress=None, cancel=None):
+    """Online backup into directory, verified, optionally gzipped, then rotated.
+
+    The copy is written under a temporary name and only renamed into place
+    once integrity_check passes, so rotation never counts a broken backup.
+    Returns the path of the new backup.
+    """
+    final = backup_filename(directory, compress)
+    partial = final.removesuffix('.gz') + '.partial'
+    try:
+        online_backup(partial, progress=progress, cancel=cancel)
+        problems = integrity_check(partial)
+        if problems:
+            raise ValueError(f"Backup failed integrity check: {problems[0]}")
+        if compress:
+            partial = compress_file(partial)
+        os.replace(partial, final)
+    finally:
+        for path in (partial, partial + '-journal', partial + '-wal', partial + '-shm'):
+            if os.path.exists(path):
+                os.remove(path)
+    rotate_backups(directory, keep)
+    return final
+
+
+def prepare_restore(source_path, progress=None):
+    """Stage a backup for restore next to the live database; returns the staged path.
+
+    The backup (plain or gzipped) is streamed into the staged file with the
+    backup API, checked with quick_check, and migrated to the current
+    schema, all without touching the live database. Hand the result to
+    init_db.replace_database() to swap it in.
+    """
+    staged = init_db.DB_PATH + '.restore'
+    if os.path.exists(staged):
+        os.remove(staged)
+    try:
+        with tempfile.TemporaryDirectory(dir=os.path.dirname(init_db.DB_PATH)) as tmp:
+            if source_path.endswith('.gz'):
+                unpacked = os.path.join(tmp, 'source.db')
+                with gzip.open(source_path, 'rb') as source, open(unpacked, 'wb') as target:
+                    shutil.copyfileobj(source, target, 1 << 20)
+                source_path = unpacked
+            source = open_connection(source_path, read_only=True)
+            target = open_connection(staged)
+            try:
+                source.backup(target, pages=BACKUP_PAGES_PER_STEP,
+                              progress=(lambda status, remaining, total: progress(total - remaining, total))
+                              if progress else None)
+                problems = [row[0] for row in target.execute('PRAGMA quick_check').fetchall()]
+                if problems != ['ok']:
+                    raise ValueError(f"Backup failed integrity check: {problems[0]}")
+                version = get_schema_version(target)
+                if version > SCHEMA_VERSION:
+                    raise ValueError(f"Backup is from a newer version of the app (schema {version})")
+                if not target.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'batches'").fetchone():
+                    raise ValueError("File is not a DashPoultry database")
+                run_migrations(target)
+                # replace_database() moves a single file: fold the WAL back in
+                target.execute('PRAGMA journal_mode = DELETE')
+            finally:
+                target.close()
+                source.close()
+    except BaseException:
+        for path in (staged, staged + '-journal', staged + '-wal', staged + '-shm'):
+            if os.path.exists(path):
+                os.remove(path)
+        raise
+    return staged
@@ -0,0 +1,225 @@
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import zlib
+from datetime import datetime
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from database.init_db import open_connection, get_schema_version
+from utils.backup import online_backup
+
+# SQLite only ever rewrites whole pages in place, so fixed blocks that are a
+# multiple of the page size dedupe unchanged regions exactly; no
+# content-defined chunking is needed.
+BLOCK_SIZE = 1 << 16
+STORE_VERSION = 1
+
+
+class LocalBlockStore:
+    """Blocks and manifests as files under a root directory.
+
+    Keys look like 'blocks/ab/abcd...' and 'snapshots/<id>.json'. Writes go
+    to a temporary file and are renamed into place, so a crash never leaves a
+    truncated object behind.
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    def _path(self, key):
+        return os.path.join(self.root, *key.split('/'))
+
+    def exists(self, key):
+        return os.path.exists(self._path(key))
+
+    def put(self, key, data):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, partial = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.partial')
+        with os.fdopen(fd, 'wb') as file:
+            file.write(data)
+        os.replace(partial, path)
+
+    def get(self, key):
+        with open(self._path(key), 'rb') as file:
+            return file.read()
+
+    def delete(self, key):
+        os.remove(self._path(key))
+
+    def list(self, prefix):
+        """Keys under prefix (a directory such as 'blocks/' or 'snapshots/')"""
+        base = self._path(prefix.rstrip('/'))
+        keys = []
+        for directory, _, files in os.walk(base):
+            for name in files:
+                if not name.endswith('.partial'):
+                    rel = os.path.relpath(os.path.join(directory, name), self.root)
+                    keys.append(rel.replace(os.sep, '/'))
+        return keys
+
+
+class S3BlockStore:
+    """The same store in an S3-compatible bucket (needs boto3).
+
+    endpoint_url points it at MinIO or any other S3-compatible server.
+    """
+
+    def __init__(self, bucket, prefix='', endpoint_url=None, client=None):
+        if client is None:
+            import boto3
+            client = boto3.client('s3', endpoint_url=endpoint_url)
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix.strip('/') + '/' if prefix.strip('/') else ''
+
+    def exists(self, key):
+        from botocore.exceptions import ClientError
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self.prefix + key)
+            return True
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return False
+            raise
+
+    def put(self, key, data):
+        self.client.put_object(Bucket=self.bucket, Key=self.prefix + key, Body=data)
+
+    def get(self, key):
+        return self.client.get_object(Bucket=self.bucket, Key=self.prefix + key)['Body'].read()
+
+    def delete(self, key):
+        self.client.delete_object(Bucket=self.bucket, Key=self.prefix + key)
+
+    def list(self, prefix):
+        keys = []
+        paginator = self.client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self.prefix + prefix):
+            keys.extend(obj['Key'][len(self.prefix):] for obj in page.get('Contents', []))
+        return keys
+
+
+def block_key(digest):
+    return f'blocks/{digest[:2]}/{digest}'
+
+
+def snapshot_key(snapshot_id):
+    return f'snapshots/{snapshot_id}.json'
+
+
+def store_file(store, path, progress=None):
+    """Split path into blocks and upload the ones the store lacks.
+
+    Returns (block digests in order, whole-file sha256, size, new blocks,
+    new bytes stored).
+    """
+    size = os.path.getsize(path)
+    digests = []
+    seen = set()
+    whole = hashlib.sha256()
+    new_blocks = new_bytes = 0
+    done = 0
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(BLOCK_SIZE), b''):
+            whole.update(block)
+            digest = hashlib.sha256(block).hexdigest()
+            if digest not in seen and not store.exists(block_key(digest)):
+                data = zlib.compress(block, 6)
+                store.put(block_key(digest), data)
+                new_blocks += 1
+                new_bytes += len(data)
+            digests.append(digest)
+            seen.add(digest)
+            done += len(block)
+            if progress is not None:
+                progress(done, size)
+    return digests, whole.hexdigest(), size, new_blocks, new_bytes
+
+
+def create_snapshot(store, progress=None, cancel=None):
+    """Back up the live database and add it to store as a new snapshot.
+
+    The database is first copied with the online backup API (a consistent
+    point in time), then chunked; the manifest is written last, so an
+    interrupted snapshot leaves only unreferenced blocks for gc(). Returns
+    the manifest.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        copy = os.path.join(tmp, 'snapshot.db')
+        # The copy is half the job, the chunking and upload the other half
+        online_backup(copy, cancel=cancel,
+                      progress=(lambda done, total: progress(done, 2 * total)) if progress else None)
+        conn = open_connection(copy)
+        try:
+            schema_version = get_schema_version(conn)
+        finally:
+            conn.close()
+        digests, sha256, size, new_blocks, new_bytes = store_file(
+            store, copy, progress=(lambda done, total: progress(total + done, 2 * total)) if progress else None)
+    created = datetime.now()
+    manifest = {
+        'store_version': STORE_VERSION,
+        'id': created.strftime('%Y%m%d-%H%M%S-%f'),
+        'created': created.isoformat(timespec='seconds'),
+        'schema_version': schema_version,
+        'size': size,
+        'block_size': BLOCK_SIZE,
+        'sha256': sha256,
+        'blocks': digests,
+        'new_blocks': new_blocks,
+        'new_bytes': new_bytes,
+    }
+    store.put(snapshot_key(manifest['id']), json.dumps(manifest).encode('utf-8'))
+    return manifest
+
+
+def list_snapshots(store):
+    """Manifests of every snapshot in store, oldest first"""
+    manifests = [json.loads(store.get(key)) for key in store.list('snapshots/') if key.endswith('.json')]
+    return sorted(manifests, key=lambda manifest: manifest['id'])
+
+
+def restore_snapshot(store, snapshot_id, path):
+    """Reassemble snapshot_id into a database file at path, verifying every block"""
+    manifest = json.loads(store.get(snapshot_key(snapshot_id)))
+    whole = hashlib.sha256()
+    partial = path + '.partial'
+    try:
+        with open(partial, 'wb') as file:
+            for digest in manifest['blocks']:
+                block = zlib.decompress(store.get(block_key(digest)))
+                if hashlib.sha256(block).hexdigest() != digest:
+                    raise ValueError(f"Block {digest} is corrupt")
+                whole.update(block)
+                file.write(block)
+        if whole.hexdigest() != manifest['sha256']:
+            raise ValueError(f"Snapshot {snapshot_id} does not match its checksum")
+        os.replace(partial, path)
+    finally:
+        if os.path.exists(partial):
+            os.remove(partial)
+    return manifest
+
+
+def delete_snapshot(store, snapshot_id):
+    """Forget a snapshot; its blocks go on the next gc() unless still referenced"""
+    store.delete(snapshot_key(snapshot_id))
+
+
+def gc(store):
+    """Delete blocks no snapshot references; returns (blocks removed, blocks kept).
+
+    Don't run this while a snapshot is being created: its blocks are not
+    referenced until its manifest is written.
+    """
+    referenced = set()
+    for manifest in list_snapshots(store):
+        referenced.update(manifest['blocks'])
+    removed = 0
+    for key in store.list('blocks/'):
+        if key.rsplit('/', 1)[-1] not in referenced:
+            store.delete(key)
+            removed += 1
+    return removed, len(referenced)
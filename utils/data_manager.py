@@ -1,8 +1,23 @@
-from PyQt6.QtCore import QObject, pyqtSignal
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+from collections import OrderedDict
 import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from database.init_db import get_connection
+from database.init_db import get_connection, open_connection
+from database.write_queue import WriteQueue
+from utils.query_executor import QueryExecutor
+
+# Tables whose cached results go stale when each kind of change is notified.
+# A batch edit can rename batch_id in every table that references it.
+CHANGE_TABLES = {
+    'batch': ('batches', 'feed_logs', 'water_logs', 'revenue', 'mortality', 'vaccinations'),
+    'feed_water': ('feed_logs', 'water_logs'),
+    'vaccination': ('vaccinations',),
+    'mortality': ('mortality',),
+    'worker': ('workers',),
+    'expense': ('expenses',),
+    'revenue': ('revenue',),
+}
 
 class DataManager(QObject):
     """Central data manager for cross-module communication"""
@@ -19,120 +34,192 @@ class DataManager(QObject):
     # General data refresh signal
     data_refresh_needed = pyqtSignal()
     
+    # Coalesced change event: set of table names changed during the last burst
+    tables_changed = pyqtSignal(object)
+    
+    # The whole database was restored or reset; every view reloads
+    database_replaced = pyqtSignal()
+    
+    # Emitted from the writer thread; delivered on the GUI thread
+    write_completed = pyqtSignal(object)
+    
+    # Failed background writes and queries that had no on_error of their own
+    background_error = pyqtSignal(str)
+    
     def __init__(self):
         super().__init__()
-        self._cache = {}
+        # key -> (tables the result depends on, result), oldest first
+        self._cache = OrderedDict()
+        self.cache_size = 128
+        self.cache_hits = 0
+        self.cache_misses = 0
+        # Bumped on every invalidation so late async loads are not cached stale
+        self._cache_generation = 0
+        # Change notifications arriving within this window are delivered once
+        self.coalesce_interval_ms = 150
+        self._pending_kinds = []
+        self._pending_tables = set()
+        self._notify_timer = None
+        self._writer = WriteQueue(open_connection, self.write_completed.emit)
+        self.write_completed.connect(self._on_write_completed)
+        self._queries = QueryExecutor()
+        self._queries.failed.connect(self.report_error)
+    
+    def submit_query(self, func, *args, key=None, on_result=None, on_error=None):
+        """Run func(cursor, *args) on the query thread pool.
+        
+        on_result(result) or on_error(exception) is called on the GUI thread.
+        A new request with the same key cancels the previous one.
+        """
+        return self._queries.submit(func, *args, key=key, on_result=on_result, on_error=on_error)
     
-    def get_batch_summary(self):
-        """Get summary data for batches"""
-        conn = get_connection()
-        c = conn.cursor()
-        c.execute('SELECT COUNT(*) FROM batches')
-        total_batches = c.fetchone()[0]
-        c.execute('SELECT COUNT(*) FROM batches WHERE date_in >= date("now", "-30 days")')
-        recent_batches = c.fetchone()[0]
-        conn.close()
-        return {
-            'total': total_batches,
-            'recent': recent_batches
-        }
+    def cancel_query(self, key):
+        """Cancel the pending query submitted under key"""
+        self._queries.cancel(key)
     
-    def get_financial_summary(self):
-        """Get financial summary data"""
-        conn = get_connection()
-        c = conn.cursor()
-        c.execute('SELECT SUM(amount) FROM revenue')
-        total_revenue = c.fetchone()[0] or 0
-        c.execute('SELECT SUM(amount) FROM expenses')
-        total_expenses = c.fetchone()[0] or 0
-        c.execute('SELECT SUM(count) FROM mortality')
-        total_mortality = c.fetchone()[0] or 0
-        conn.close()
+    def submit_write(self, func, *args, on_success=None, on_error=None):
+        """Queue func(cursor, *args) on the background writer thread.
         
-        net_profit = total_revenue - total_expenses
-        profit_margin = (net_profit / total_revenue * 100) if total_revenue > 0 else 0
+        on_success(result) or on_error(exception) is called on the GUI thread
+        once the transaction containing the job has been committed.
+        """
+        return self._writer.submit(func, *args, on_success=on_success, on_error=on_error)
+    
+    def _on_write_completed(self, job):
+        if job.error is not None:
+            if job.on_error:
+                job.on_error(job.error)
+            else:
+                self.report_error(f"Database write failed: {job.error}")
+        elif job.on_success:
+            job.on_success(job.result)
+    
+    def report_error(self, message):
+        """Show message through background_error, or on stderr before the UI listens"""
+        if self.receivers(self.background_error):
+            self.background_error.emit(message)
+        else:
+            print(message, file=sys.stderr)
+    
+    def shutdown(self):
+        """Flush pending writes, stop the writer thread and drain queued reads"""
+        self._queries.cancel_all()
+        self._queries.wait()
+        self._writer.stop()
+    
+    def _store(self, key, tables, value):
+        self._cache[key] = (frozenset(tables), value)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+    
+    def _cached_async(self, key, tables, loader, on_result):
+        """Deliver the cached result for key, running loader() on the query pool on a miss.
         
-        return {
-            'revenue': total_revenue,
-            'expenses': total_expenses,
-            'profit': net_profit,
-            'margin': profit_margin,
-            'mortality_cost': total_mortality * 5  # Estimated cost per bird
-        }
-    
-    def get_worker_summary(self):
-        """Get worker summary data"""
-        conn = get_connection()
-        c = conn.cursor()
-        c.execute('SELECT COUNT(*) FROM workers')
-        total_workers = c.fetchone()[0]
-        c.execute('SELECT COUNT(*) FROM workers WHERE status = "Active"')
-        active_workers = c.fetchone()[0]
-        c.execute('SELECT SUM(salary) FROM workers WHERE status = "Active"')
-        total_salary = c.fetchone()[0] or 0
-        conn.close()
+        on_result(value) is called on the GUI thread; immediately on a hit.
+        The result is cached until one of tables is invalidated, and must not
+        be mutated.
+        """
+        entry = self._cache.get(key)
+        if entry is not None:
+            self._cache.move_to_end(key)
+            self.cache_hits += 1
+            on_result(entry[1])
+            return None
+        self.cache_misses += 1
+        generation = self._cache_generation
         
-        return {
-            'total': total_workers,
-            'active': active_workers,
-            'total_salary': total_salary
-        }
-    
-    def get_health_summary(self):
-        """Get health-related summary data"""
-        conn = get_connection()
-        c = conn.cursor()
-        c.execute('SELECT COUNT(*) FROM vaccinations WHERE status = "Scheduled"')
-        scheduled_vaccinations = c.fetchone()[0]
-        c.execute('SELECT COUNT(*) FROM vaccinations WHERE status = "Completed"')
-        completed_vaccinations = c.fetchone()[0]
-        c.execute('SELECT SUM(count) FROM mortality')
-        total_mortality = c.fetchone()[0] or 0
-        conn.close()
+        def deliver(value):
+            if generation == self._cache_generation:
+                self._store(key, tables, value)
+            on_result(value)
+        return self.submit_query(lambda c: loader(), on_result=deliver)
+    
+    def invalidate(self, *tables):
+        """Drop cached results depending on any of tables (all results if none given)"""
+        self._cache_generation += 1
+        if not tables:
+            self._cache.clear()
+            return
+        tables = set(tables)
+        for key in [k for k, (deps, _) in self._cache.items() if deps & tables]:
+            del self._cache[key]
+    
+    def cache_stats(self):
+        """Get cache hit/miss counters"""
+        return {'hits': self.cache_hits, 'misses': self.cache_misses, 'entries': len(self._cache)}
+    
+    def request_batch_list(self, on_result):
+        """Deliver the batch list to on_result without blocking the GUI thread"""
+        return self._cached_async(('batch_list',), ('batches',), self._load_batch_list, on_result)
+    
+    def _queue_change(self, kind):
+        # Cached results are dropped right away; the signals wait for the burst to end
+        self.invalidate(*CHANGE_TABLES[kind])
+        if kind not in self._pending_kinds:
+            self._pending_kinds.append(kind)
+        self._pending_tables.update(CHANGE_TABLES[kind])
+        if self._notify_timer is None:
+            self._notify_timer = QTimer(self)
+            self._notify_timer.setSingleShot(True)
+            self._notify_timer.timeout.connect(self.flush_changes)
+        if not self._notify_timer.isActive():
+            self._notify_timer.start(self.coalesce_interval_ms)
+    
+    def flush_changes(self):
+        """Emit the change signals queued since the last flush, once each"""
+        if self._notify_timer is not None:
+            self._notify_timer.stop()
+        kinds, tables = self._pending_kinds, self._pending_tables
+        self._pending_kinds, self._pending_tables = [], set()
+        if not kinds:
+            return
+        for kind in kinds:
+            getattr(self, f'{kind}_data_changed').emit()
+        self.tables_changed.emit(tables)
+        self.data_refresh_needed.emit()
+    
+    def notify_database_replaced(self):
+        """Drop every cached result and emit database_replaced once.
         
-        return {
-            'scheduled_vaccinations': scheduled_vaccinations,
-            'completed_vaccinations': completed_vaccinations,
-            'total_mortality': total_mortality
-        }
+        Used after a restore or reset instead of the per-kind notifications,
+        which would each show a change toast in the main window.
+        """
+        # Changes queued against the old database are superseded
+        if self._notify_timer is not None:
+            self._notify_timer.stop()
+        self._pending_kinds, self._pending_tables = [], set()
+        self.invalidate()
+        self.database_replaced.emit()
     
     def notify_batch_change(self):
         """Notify that batch data has changed"""
-        self.batch_data_changed.emit()
-        self.data_refresh_needed.emit()
+        self._queue_change('batch')
     
     def notify_feed_water_change(self):
         """Notify that feed/water data has changed"""
-        self.feed_water_data_changed.emit()
-        self.data_refresh_needed.emit()
+        self._queue_change('feed_water')
     
     def notify_vaccination_change(self):
         """Notify that vaccination data has changed"""
-        self.vaccination_data_changed.emit()
-        self.data_refresh_needed.emit()
+        self._queue_change('vaccination')
     
     def notify_mortality_change(self):
         """Notify that mortality data has changed"""
-        self.mortality_data_changed.emit()
-        self.data_refresh_needed.emit()
+        self._queue_change('mortality')
     
     def notify_worker_change(self):
         """Notify that worker data has changed"""
-        self.worker_data_changed.emit()
-        self.data_refresh_needed.emit()
+        self._queue_change('worker')
     
     def notify_expense_change(self):
         """Notify that expense data has changed"""
-        self.expense_data_changed.emit()
-        self.data_refresh_needed.emit()
+        self._queue_change('expense')
     
     def notify_revenue_change(self):
         """Notify that revenue data has changed"""
-        self.revenue_data_changed.emit()
-        self.data_refresh_needed.emit()
+        self._queue_change('revenue')
     
-    def get_batch_list(self):
-        """Get list of all batches for dropdowns"""
+    def _load_batch_list(self):
         conn = get_connection()
         c = conn.cursor()
         c.execute('SELECT batch_id FROM batches ORDER BY batch_id')
@@ -140,15 +227,6 @@ class DataManager(QObject):
         conn.close()
         return batches
     
-    def get_worker_list(self):
-        """Get list of all workers for dropdowns"""
-        conn = get_connection()
-        c = conn.cursor()
-        c.execute('SELECT worker_id, name FROM workers WHERE status = "Active" ORDER BY name')
-        workers = [(row[0], row[1]) for row in c.fetchall()]
-        conn.close()
-        return workers
-    
     def get_expense_categories(self):
         """Get list of expense categories"""
         return ["Feed", "Medicine", "Electricity", "Water", "Fuel", "Equipment", "Labor", "Transport", "Maintenance", "Other"]
@@ -0,0 +1,109 @@
+import csv
+import hashlib
+import json
+import os
+import sys
+import zipfile
+from datetime import datetime
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from database.init_db import get_connection, open_connection, get_schema_version
+
+# Bundle layout version, recorded in manifest.json
+BUNDLE_VERSION = 1
+
+
+class BundleCancelled(Exception):
+    pass
+
+
+def snapshot_database(path):
+    """Copy the live database to path with the online backup API.
+
+    The copy is a single consistent point in time, so any number of export
+    workers can read it on their own connections without seeing each
+    other's (or the app's) later writes. Returns the schema version.
+    """
+    conn = get_connection()
+    target = open_connection(path)
+    try:
+        conn.backup(target)
+        # A single rollback-journal file, so workers can open it read-only
+        target.execute('PRAGMA journal_mode = DELETE')
+        return get_schema_version(target)
+    finally:
+        target.close()
+        conn.close()
+
+
+def file_sha256(path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def export_table_csv(snapshot_path, table, columns, headers, out_path, chunk_size, progress=None, cancel=None):
+    """Process-pool entry point: write one table of the snapshot to a CSV file.
+
+    Reports rows written to the progress queue as (table, rows) after each
+    chunk and stops between chunks once cancel is set. Returns the manifest
+    entry for the file.
+    """
+    conn = open_connection(snapshot_path, read_only=True)
+    try:
+        c = conn.cursor()
+        c.execute(f"SELECT {', '.join(columns)} FROM {table}")
+        rows_written = 0
+        with open(out_path, 'w', newline='', encoding='utf-8') as file:
+            writer = csv.writer(file)
+            writer.writerow(headers)
+            while True:
+                if cancel is not None and cancel.is_set():
+                    raise BundleCancelled()
+                rows = c.fetchmany(chunk_size)
+                if not rows:
+                    break
+                writer.writerows(rows)
+                rows_written += len(rows)
+                if progress is not None:
+                    progress.put((table, len(rows)))
+    finally:
+        conn.close()
+    return {
+        'file': os.path.basename(out_path),
+        'rows': rows_written,
+        'columns': list(columns),
+        'sha256': file_sha256(out_path),
+    }
+
+
+def write_bundle(filename, files, manifest):
+    """Zip the finished table files plus manifest.json into filename"""
+    with zipfile.ZipFile(filename, 'w', compression=zipfile.ZIP_DEFLATED) as bundle:
+        for path in files:
+            bundle.write(path, os.path.basename(path))
+        bundle.writestr('manifest.json', json.dumps(manifest, indent=2))
+
+
+def new_manifest(schema_version):
+    return {
+        'bundle_version': BUNDLE_VERSION,
+        'schema_version': schema_version,
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'tables': {},
+    }
+
+
+def verify_bundle(filename):
+    """Check every table file in a bundle against the manifest; returns the manifest"""
+    with zipfile.ZipFile(filename) as bundle:
+        manifest = json.loads(bundle.read('manifest.json'))
+        for table, entry in manifest['tables'].items():
+            digest = hashlib.sha256()
+            with bundle.open(entry['file']) as member:
+                for block in iter(lambda: member.read(1 << 20), b''):
+                    digest.update(block)
+            if digest.hexdigest() != entry['sha256']:
+                raise ValueError(f"Checksum mismatch for {table} ({entry['file']})")
+    return manifest
@@ -0,0 +1,110 @@
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+import threading
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from database.init_db import QUERY_THREADS, read_snapshot
+
+
+class QueryRequest(QRunnable):
+    """One read job: func(cursor, *args) run on a pool thread.
+
+    The cursor comes from the calling thread's pooled connection, inside a
+    single read transaction, so nested get_connection() calls inside func
+    share it and every query sees the same snapshot.
+    """
+
+    def __init__(self, executor, key, func, args, on_result, on_error):
+        super().__init__()
+        # The executor keeps the Python reference; Qt must not delete it
+        self.setAutoDelete(False)
+        self.executor = executor
+        self.key = key
+        self.func = func
+        self.args = args
+        self.on_result = on_result
+        self.on_error = on_error
+        self.result = None
+        self.error = None
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        """Drop the result; skips the query too if it has not started yet."""
+        self._cancelled.set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def run(self):
+        if not self.cancelled:
+            try:
+                # A multi-statement read (dashboard, P&L) sees one consistent snapshot
+                with read_snapshot() as conn:
+                    self.result = self.func(conn.cursor(), *self.args)
+            except Exception as e:
+                self.error = e
+        self.executor._finished.emit(self)
+
+
+class QueryExecutor(QObject):
+    """Runs read queries on a QThreadPool and reports back on the GUI thread.
+
+    Requests submitted under the same key replace each other: the older one
+    is cancelled and its callback never fires, so a filter changed twice in a
+    row only ever paints the latest result.
+    """
+
+    # Emitted from pool threads; queued to the thread owning the executor
+    _finished = pyqtSignal(object)
+    # Message for a failed request that has no on_error of its own
+    failed = pyqtSignal(str)
+
+    def __init__(self, max_threads=None):
+        super().__init__()
+        self._pool = QThreadPool()
+        # The connection pool keeps further connections free for exports and backups
+        self._pool.setMaxThreadCount(max_threads or QUERY_THREADS)
+        self._latest = {}
+        self._running = set()
+        self._finished.connect(self._deliver)
+
+    def submit(self, func, *args, key=None, on_result=None, on_error=None):
+        request = QueryRequest(self, key, func, args, on_result, on_error)
+        if key is not None:
+            previous = self._latest.get(key)
+            if previous is not None:
+                previous.cancel()
+            self._latest[key] = request
+        self._running.add(request)
+        self._pool.start(request)
+        return request
+
+    def cancel(self, key):
+        """Cancel the pending request submitted under key, if any"""
+        request = self._latest.pop(key, None)
+        if request is not None:
+            request.cancel()
+
+    def cancel_all(self):
+        for request in list(self._running):
+            request.cancel()
+        self._latest.clear()
+
+    def wait(self, msecs=-1):
+        """Block until every started request has finished running"""
+        return self._pool.waitForDone(msecs)
+
+    def _deliver(self, request):
+        self._running.discard(request)
+        if request.key is not None and self._latest.get(request.key) is request:
+            del self._latest[request.key]
+        if request.cancelled:
+            return
+        if request.error is not None:
+            if request.on_error:
+                request.on_error(request.error)
+            else:
+                self.failed.emit(f"Database query failed: {request.error}")
+        elif request.on_result:
+            request.on_result(request.result)
@@ -0,0 +1,46 @@
+from PyQt6.QtCore import QObject, QEvent, QTimer
+
+
+class RefreshScheduler(QObject):
+    """Runs a widget's refresh when its data changes, but only while it is shown.
+
+    Changes arriving while the widget is hidden (e.g. another page of the
+    main window's stack is current) just mark it dirty; it refreshes once when
+    it is next shown. Any number of watched signals firing in the same event
+    loop turn cause a single refresh.
+    """
+
+    def __init__(self, widget, refresh):
+        super().__init__(widget)
+        self._widget = widget
+        self._refresh = refresh
+        self._dirty = False
+        self._pending = False
+        widget.installEventFilter(self)
+
+    def watch(self, *signals):
+        """Request a refresh whenever any of the signals is emitted"""
+        for signal in signals:
+            signal.connect(self.request)
+
+    def request(self, *args):
+        if not self._widget.isVisible():
+            self._dirty = True
+        elif not self._pending:
+            self._pending = True
+            QTimer.singleShot(0, self._run)
+
+    @property
+    def dirty(self):
+        return self._dirty
+
+    def _run(self):
+        self._pending = False
+        self._dirty = False
+        self._refresh()
+
+    def eventFilter(self, obj, event):
+        if obj is self._widget and event.type() == QEvent.Type.Show and self._dirty:
+            self._dirty = False
+            self.request()
+        return False
@@ -0,0 +1,257 @@
+from PyQt6.QtCore import QAbstractTableModel, QModelIndex, Qt, QTimer, pyqtSignal
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from database.init_db import get_connection
+from database.search import search_clause
+from utils.data_manager import data_manager
+
+
+# Typing pause after which a search box queries
+SEARCH_DEBOUNCE_MS = 250
+
+
+def debounce_search(line_edit, slot, interval_ms=SEARCH_DEBOUNCE_MS):
+    """Call slot once typing in line_edit pauses, rather than on every keystroke.
+
+    Returns the single-shot timer, e.g. to fire it early with start(0).
+    """
+    timer = QTimer(line_edit)
+    timer.setSingleShot(True)
+    timer.setInterval(interval_ms)
+    timer.timeout.connect(slot)
+    line_edit.textChanged.connect(lambda _: timer.start())
+    return timer
+
+
+def _display(value):
+    return str(value) if value is not None else ""
+
+
+def _row_compare(columns, op):
+    if len(columns) == 1:
+        return f'{columns[0]} {op} ?'
+    placeholders = ', '.join('?' for _ in columns)
+    return f"({', '.join(columns)}) {op} ({placeholders})"
+
+
+def keyset_conditions(order_by, last, descending=False):
+    """WHERE conditions for the rows sorting after `last`, to be read in turn.
+
+    The row-value comparison lets SQLite seek straight to the next page in a
+    matching index. Only the first order_by column may be NULL; NULLs sort
+    first ascending and last descending, as SQLite orders them, so they get
+    a condition of their own.
+    """
+    first, rest = order_by[0], order_by[1:]
+    op = '<' if descending else '>'
+    if last[0] is None:
+        in_nulls = f'{first} IS NULL'
+        params = []
+        if rest:
+            in_nulls += ' AND ' + _row_compare(rest, op)
+            params = list(last[1:])
+        conditions = [(in_nulls, params)]
+        if not descending:
+            conditions.append((f'{first} IS NOT NULL', []))
+        return conditions
+    conditions = [(_row_compare(order_by, op), list(last))]
+    if descending:
+        conditions.append((f'{first} IS NULL', []))
+    return conditions
+
+
+class SqlTableModel(QAbstractTableModel):
+    """Read-only table model that pages rows in from SQL as the view scrolls.
+
+    Only the rows the user has scrolled to are held in memory. Pages are read
+    on the query pool with keyset pagination over `order_by` (which must end
+    in a unique, non-NULL column, e.g. ['date', 'rowid']), so every page
+    costs the same no matter how far down it is. Cell text and colours are
+    produced in data().
+    """
+
+    # Emitted after reload() has replaced the rows with the first page
+    loaded = pyqtSignal()
+
+    def __init__(self, source, columns, headers, order_by, descending=False, page_size=256,
+                 full_text=False, parent=None):
+        super().__init__(parent)
+        self.source = source
+        # Search through the source table's FTS index instead of LIKE over every column
+        self.full_text = full_text
+        self.columns = list(columns)
+        self.headers = list(headers)
+        self.order_by = list(order_by)
+        self.descending = descending
+        self.page_size = page_size
+        # Sort-key columns not shown in the view are selected after the visible ones
+        self._extra = [col for col in self.order_by if col not in self.columns]
+        self._key_index = [(self.columns + self._extra).index(col) for col in self.order_by]
+        self.source_params = ()
+        self._filters = {}
+        self.formatters = {}
+        self.background = None
+        self._rows = []
+        self._at_end = True
+        self._loading = False
+        self._generation = 0
+
+    # Query building
+
+    def set_filter(self, name, clause=None, params=()):
+        """Set (or clear, with clause=None) a named WHERE condition"""
+        if clause is None:
+            self._filters.pop(name, None)
+        else:
+            self._filters[name] = (clause, tuple(params))
+
+    def set_search(self, text):
+        """Match rows containing text (full-text words, or a substring of any visible column)"""
+        text = text.strip()
+        if not text:
+            self.set_filter('search')
+            return
+        if self.full_text:
+            self.set_filter('search', *search_clause(self.source, text))
+            return
+        pattern = '%' + text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+        clause = '(' + ' OR '.join(f"{col} LIKE ? ESCAPE '\\'" for col in self.columns) + ')'
+        self.set_filter('search', clause, [pattern] * len(self.columns))
+
+    def where(self):
+        """(WHERE clause, params) for the current filters; '1' when unfiltered"""
+        clauses = [clause for clause, _ in self._filters.values()]
+        params = [p for _, values in self._filters.values() for p in values]
+        return (' AND '.join(clauses) or '1'), list(self.source_params) + params
+
+    def _order_sql(self):
+        direction = ' DESC' if self.descending else ''
+        return ', '.join(col + direction for col in self.order_by)
+
+    def select_all(self):
+        """(sql, params) reading every matching row's visible columns, in view order"""
+        where, params = self.where()
+        sql = (f"SELECT {', '.join(self.columns)} FROM {self.source} "
+               f"WHERE {where} ORDER BY {self._order_sql()}")
+        return sql, params
+
+    def iter_rows(self, chunk_size=1000):
+        """Yield every matching row (visible columns) on the calling thread, chunk by chunk"""
+        sql, params = self.select_all()
+        conn = get_connection()
+        try:
+            c = conn.cursor()
+            c.execute(sql, params)
+            while True:
+                rows = c.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            conn.close()
+
+    def _page_queries(self, last):
+        """Statements to run in turn, until one page of rows has been read"""
+        where, params = self.where()
+        conditions = [('1', [])] if last is None else keyset_conditions(self.order_by, last, self.descending)
+        columns = ', '.join(self.columns + self._extra)
+        return [
+            (f"SELECT {columns} FROM {self.source} WHERE {where} AND {condition} "
+             f"ORDER BY {self._order_sql()} LIMIT ?", params + condition_params)
+            for condition, condition_params in conditions
+        ]
+
+    def _fetch(self, c, queries):
+        rows = []
+        for sql, params in queries:
+            c.execute(sql, params + [self.page_size - len(rows)])
+            rows.extend(c.fetchall())
+            if len(rows) >= self.page_size:
+                break
+        return rows
+
+    # Loading
+
+    def reload(self):
+        """Re-read from the first page; the old rows stay visible until it arrives"""
+        self._generation += 1
+        generation = self._generation
+        self._loading = True
+        data_manager.submit_query(self._fetch, self._page_queries(None), key=('sql_table_model', id(self)),
+                                  on_result=lambda rows: self._on_reloaded(generation, rows),
+                                  on_error=lambda error: self._on_error(generation, error))
+
+    def _on_reloaded(self, generation, rows):
+        if generation != self._generation:
+            return
+        self.beginResetModel()
+        self._rows = rows
+        self._at_end = len(rows) < self.page_size
+        self._loading = False
+        self.endResetModel()
+        self.loaded.emit()
+
+    def _on_error(self, generation, error):
+        if generation != self._generation:
+            return
+        # Let the next reload() or scroll try again
+        self._loading = False
+        data_manager.report_error(f"Failed to load {self.source}: {error}")
+
+    def canFetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return False
+        return not self._at_end and not self._loading
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or not self.canFetchMore():
+            return
+        generation = self._generation
+        last = [self._rows[-1][i] for i in self._key_index]
+        self._loading = True
+        data_manager.submit_query(self._fetch, self._page_queries(last), key=('sql_table_model', id(self)),
+                                  on_result=lambda rows: self._on_page(generation, rows),
+                                  on_error=lambda error: self._on_error(generation, error))
+
+    def _on_page(self, generation, rows):
+        if generation != self._generation:
+            return
+        self._loading = False
+        self._at_end = len(rows) < self.page_size
+        if rows:
+            first = len(self._rows)
+            self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+            self._rows.extend(rows)
+            self.endInsertRows()
+
+    # Model interface
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        value = self._rows[index.row()][index.column()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self.formatters.get(index.column(), _display)(value)
+        if role == Qt.ItemDataRole.BackgroundRole and self.background is not None:
+            return self.background(index.column(), value)
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.ToolTipRole):
+            return self.headers[section]
+        return None
+
+    def row_values(self, row):
+        """Raw values of the visible columns of a loaded row"""
+        return self._rows[row][:len(self.columns)]
+
+    def row_text(self, row):
+        """The visible columns of a loaded row as displayed"""
+        return [self.formatters.get(col, _display)(value) for col, value in enumerate(self.row_values(row))]
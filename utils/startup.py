@@ -0,0 +1,124 @@
+import importlib
+import sys
+import threading
+import time
+
+# Libraries only the main window needs; imported on a background thread while
+# the login is being checked so the login screen itself never waits for them.
+HEAVY_MODULES = ['numpy', 'pyqtgraph']
+
+_started_at = time.perf_counter()
+_phases = []
+_imports = []
+_local = threading.local()
+_preload = None
+
+
+class _TimingLoader:
+    """Wraps a module loader, recording how long the module took to execute."""
+
+    def __init__(self, name, loader):
+        self._name = name
+        self._loader = loader
+
+    def __getattr__(self, attr):
+        return getattr(self._loader, attr)
+
+    def create_module(self, spec):
+        # Extension modules do their loading here rather than in exec_module
+        return self._timed(self._loader.create_module, spec)
+
+    def exec_module(self, module):
+        self._timed(self._loader.exec_module, module)
+
+    def _timed(self, func, arg):
+        # Children's time is subtracted from ours to give the self time; each
+        # thread imports independently, so each keeps its own stack
+        stack = _local.__dict__.setdefault('stack', [])
+        stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            return func(arg)
+        finally:
+            cumulative = time.perf_counter() - start
+            children = stack.pop()
+            if stack:
+                stack[-1] += cumulative
+            _imports.append((self._name, cumulative - children, cumulative))
+
+
+class _TimingFinder:
+    """Meta path hook giving every found module a _TimingLoader."""
+
+    def find_spec(self, name, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+            spec = finder.find_spec(name, path, target)
+            if spec is None:
+                continue
+            if spec.loader is not None and hasattr(spec.loader, 'exec_module'):
+                spec.loader = _TimingLoader(name, spec.loader)
+            return spec
+        return None
+
+
+def enable_profiling():
+    """Start recording imports and phases; call before the app's own imports."""
+    if not profiling():
+        sys.meta_path.insert(0, _TimingFinder())
+
+
+def profiling():
+    return any(isinstance(finder, _TimingFinder) for finder in sys.meta_path)
+
+
+def mark(phase):
+    """Record the wall-clock time at which startup phase ended (profiling only)"""
+    if profiling():
+        _phases.append((phase, time.perf_counter()))
+
+
+def report(top=25, out=None):
+    """Print the phase timeline and the slowest imports, importtime-style"""
+    if not profiling():
+        return
+    out = out or sys.stderr
+    print("Startup phases (ms):", file=out)
+    previous = _started_at
+    for phase, at in _phases:
+        print(f"  {(at - _started_at) * 1000:9.1f}  +{(at - previous) * 1000:8.1f}  {phase}", file=out)
+        previous = at
+    # Extension modules are timed in both create_module and exec_module
+    totals = {}
+    for name, self_time, cumulative in _imports:
+        previous = totals.get(name, (0.0, 0.0))
+        totals[name] = (previous[0] + self_time, previous[1] + cumulative)
+    print(f"Slowest imports (us, {len(totals)} modules):", file=out)
+    print(f"  {'self':>9} | {'cumulative':>10} | imported package", file=out)
+    slowest = sorted(totals.items(), key=lambda item: item[1][1], reverse=True)[:top]
+    for name, (self_time, cumulative) in slowest:
+        print(f"  {self_time * 1e6:9.0f} | {cumulative * 1e6:10.0f} | {name}", file=out)
+
+
+def _import_all(modules):
+    for name in modules:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            # Surfaces again, with a proper traceback, where it is really imported
+            pass
+
+
+def preload(modules=HEAVY_MODULES):
+    """Import modules on a background thread; returns immediately"""
+    global _preload
+    if _preload is None:
+        _preload = threading.Thread(target=_import_all, args=(list(modules),), name='preload', daemon=True)
+        _preload.start()
+
+
+def wait_for_preload():
+    """Block until preload() has finished importing"""
+    if _preload is not None:
+        _preload.join()